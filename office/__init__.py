@@ -1,8 +1,11 @@
-__all__ = ["Office", "CalendarService", "Calendar", "Event", "OutlookService", "MessageFolder", "Message", "PeopleService", "ContactFolder", "Contact", "OfficeConfig", "BlobConfig", "BlobStorage"]
+__all__ = ["Office", "CalendarService", "Calendar", "Event", "OutlookService", "MessageFolder", "Message", "MessageTemplate", "PeopleService", "ContactFolder", "Contact", "OfficeConfig", "BlobConfig", "BlobStorage", "EntityStore", "Outbox", "AsyncOffice", "AsyncBlobStorage"]
 
 from .office import Office
 from .calendar import CalendarService, Calendar, Event
-from .outlook import OutlookService, MessageFolder, Message
+from .outlook import OutlookService, MessageFolder, Message, MessageTemplate
 from .people import PeopleService, ContactFolder, Contact
 from .config import OfficeConfig, BlobConfig
 from .blob import BlobStorage
+from .store import EntityStore
+from .outbox import Outbox
+from .aio import AsyncOffice, AsyncBlobStorage
@@ -0,0 +1,562 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+from io import BytesIO
+from types import ModuleType
+from typing import Any, AsyncIterator, Mapping, Optional, TYPE_CHECKING
+
+from maybe import Maybe
+from subtypes import NameSpace, Str, Dict
+from pathmagic import File, Dir, PathLike
+from miscutils import cached_property
+
+from .config import BlobConfig
+from .executor import Throttle
+from .office import Office
+from .query import Query
+from .calendar import Calendar
+from .outlook import MessageFolder
+from .outlook.folder import MessageFolderQuery
+from .people import ContactFolder
+from .people.folder import ContactFolderQuery
+
+if TYPE_CHECKING:
+    import aiohttp
+    from O365.connection import Connection
+    from azure.storage.blob.aio import ContainerClient, BlobClient
+
+
+def _import_aiohttp() -> ModuleType:
+    # aiohttp is an optional dependency (the 'async' extra), so it is only imported once an asynchronous client actually needs it
+    try:
+        import aiohttp
+    except ImportError as ex:
+        raise ImportError("The asynchronous clients require the 'aiohttp' package, which is installed by the 'async' extra: pip install office365[async]") from ex
+
+    return aiohttp
+
+
+class AsyncConnection:
+    """
+    A class sending Graph requests on behalf of a single mailbox over a pool of aiohttp connections, authenticated using the token of the given O365 connection.
+    A single aiohttp session (and therefore connection pool) can be shared by many instances so that one event loop can drive any number of mailboxes at once.
+    Requests that are throttled by the server are retried (up to 'max_retries' times) once the 'Retry-After' period has elapsed, without blocking the event loop.
+    """
+
+    def __init__(self, con: Connection, session: aiohttp.ClientSession = None, max_connections: int = 100, max_retries: int = 5) -> None:
+        self.con, self.max_connections, self.max_retries = con, max_connections, max_retries
+        self.throttle = Throttle()
+        self._session, self._owns_session = session, session is None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(max_connections={self.max_connections}, max_retries={self.max_retries})"
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The aiohttp session requests are sent through. One is created on first use unless it was provided."""
+        if self._session is None or (self._owns_session and self._session.closed):
+            aiohttp = _import_aiohttp()
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.max_connections), json_serialize=functools.partial(json.dumps, cls=self.con.json_encoder))
+
+        return self._session
+
+    async def get(self, url: str, params: dict = None, headers: dict = None) -> Any:
+        return await self.request("GET", url, params=params, headers=headers)
+
+    async def post(self, url: str, data: Any = None, headers: dict = None) -> Any:
+        return await self.request("POST", url, data=data, headers=headers)
+
+    async def patch(self, url: str, data: Any = None, headers: dict = None) -> Any:
+        return await self.request("PATCH", url, data=data, headers=headers)
+
+    async def delete(self, url: str, headers: dict = None) -> Any:
+        return await self.request("DELETE", url, headers=headers)
+
+    async def request(self, method: str, url: str, params: dict = None, data: Any = None, headers: dict = None) -> Any:
+        """Send a request and return its decoded body (JSON if the server sent any, otherwise text). Raises aiohttp.ClientResponseError if it ultimately fails."""
+        refreshed = False
+
+        for attempt in range(self.max_retries + 1):
+            while (delay := self.throttle.remaining) > 0:
+                await asyncio.sleep(delay)
+
+            async with self.session.request(method, url, params=params, json=data, headers={**self._headers(), **Maybe(headers).else_({})}) as response:
+                # the final attempt always falls through to raising (or returning), so that a request never silently runs out of attempts
+                if response.status == 401 and not refreshed and attempt < self.max_retries:
+                    await self._refresh_token()
+                    refreshed = True
+                elif response.status in self.throttle.throttling_statuses and attempt < self.max_retries:
+                    self.throttle.back_off(headers=response.headers, attempt=attempt)
+                else:
+                    response.raise_for_status()
+                    return await response.json() if response.content_type == "application/json" else await response.text()
+
+    async def close(self) -> None:
+        """Close the aiohttp session, unless it was provided (in which case its owner is responsible for closing it)."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+
+    def _headers(self) -> dict:
+        if self.con.session is None:
+            self.con.session = self.con.get_session(load_token=True)
+
+        return {**self.con.default_headers, "Authorization": self.con.session.headers.get("Authorization")}
+
+    async def _refresh_token(self) -> None:
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+
+        async with self._refresh_lock:
+            await asyncio.get_running_loop().run_in_executor(None, self.con.refresh_token)
+
+
+class AsyncQuery:
+    """
+    A class executing a query asynchronously. Clauses are set through the same methods as the query it wraps, while 'AsyncQuery.execute', 'AsyncQuery.stream' and 'AsyncQuery.count'
+    are coroutines (or async generators). Iterating over this object with 'async for' streams its results.
+    """
+
+    def __init__(self, query: Query, connection: AsyncConnection) -> None:
+        self.query, self.connection = query, connection
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({repr(self.query)})"
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self.stream()
+
+    def select(self, *args: Any) -> AsyncQuery:
+        """Set the attributes that will be queried. If this method is not called, all attributes will be returned."""
+        self.query.select(*args)
+        return self
+
+    def where(self, resolvable_element: Any) -> AsyncQuery:
+        """Set the filter clause on this query. Accepts a single boolean attribute, boolean expression or boolean expression clause."""
+        self.query.where(resolvable_element)
+        return self
+
+    def order_by(self, order_clause: Any) -> AsyncQuery:
+        """Set the order clause on this query."""
+        self.query.order_by(order_clause)
+        return self
+
+    def limit(self, limit: int = 25) -> AsyncQuery:
+        """Set the limit on the number of objects that may be returned."""
+        self.query.limit(limit)
+        return self
+
+    async def execute(self) -> list:
+        """Execute this query and return the results."""
+        return [item async for item in self.stream(page_size=self.query._container.protocol.max_top_value)]
+
+    async def stream(self, page_size: int = 100) -> AsyncIterator[Any]:
+        """Execute this query and lazily yield its results, requesting them from the server in pages of 'page_size' ($top) as they are consumed."""
+        container, constructor, limit = self.query._container, self.query._constructor(), self.query._limit
+        url, params, yielded = self.query._collection_url(), {"$top": page_size if limit is None else min(page_size, limit), **self.query._query.as_params()}, 0
+
+        while url and (limit is None or yielded < limit):
+            data = await self.connection.get(url, params=params)
+            for item in data.get("value", []):
+                if limit is not None and yielded >= limit:
+                    return
+
+                yield self._wrap(constructor(parent=container, **{container._cloud_data_key: item}))
+                yielded += 1
+
+            url, params = data.get("@odata.nextLink"), None
+
+    async def count(self) -> int:
+        """Return the number of objects that match this query as counted by the server, without downloading any of them."""
+        params = {key: value for key, value in self.query._query.as_params().items() if key in ("$filter", "$search")}
+        count = int(await self.connection.get(f"{self.query._collection_url()}/$count", params=params, headers={"ConsistencyLevel": "eventual"}))
+        return count if self.query._limit is None else min(count, self.query._limit)
+
+    def _wrap(self, entity: Any) -> Any:
+        return AsyncContainer(entity, connection=self.connection) if isinstance(self.query, (MessageFolderQuery, ContactFolderQuery)) else entity
+
+
+class AsyncContainer:
+    """A class wrapping a folder or calendar so that the queries it creates (such as 'MessageFolder.messages' or 'Calendar.events') are executed asynchronously. Other attributes are passed through."""
+
+    def __init__(self, container: Any, connection: AsyncConnection) -> None:
+        self.container, self.connection = container, connection
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({repr(self.container)})"
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.container, name)
+        return AsyncQuery(attribute, connection=self.connection) if isinstance(attribute, Query) else attribute
+
+
+class AsyncOutlookService:
+    """An asynchronous counterpart to OutlookService. Folders are returned wrapped in an AsyncContainer."""
+
+    def __init__(self, office: AsyncOffice) -> None:
+        self.office, self.service = office, office.office.outlook
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(office={repr(self.office)})"
+
+    @property
+    def main(self) -> AsyncContainer:
+        """A property that returns the main folder."""
+        return self._wrap(self.service.main)
+
+    @property
+    def inbox(self) -> AsyncContainer:
+        """A property that returns the inbox folder."""
+        return self._wrap(self.service.inbox)
+
+    @property
+    def outbox(self) -> AsyncContainer:
+        """A property that returns the outbox folder."""
+        return self._wrap(self.service.outbox)
+
+    @property
+    def sent(self) -> AsyncContainer:
+        """A property that returns the sent folder."""
+        return self._wrap(self.service.sent)
+
+    @property
+    def drafts(self) -> AsyncContainer:
+        """A property that returns the drafts folder."""
+        return self._wrap(self.service.drafts)
+
+    @property
+    def junk(self) -> AsyncContainer:
+        """A property that returns the junk folder."""
+        return self._wrap(self.service.junk)
+
+    @property
+    def deleted(self) -> AsyncContainer:
+        """A property that returns the deleted folder."""
+        return self._wrap(self.service.deleted)
+
+    async def custom(self, folder_name: str = None, folder_id: str = None) -> Optional[AsyncContainer]:
+        """Return the given custom folder by name or id."""
+        if folder_id is None:
+            folders = await self.main.folders.where(MessageFolder.Attributes.Name == folder_name).limit(1).execute()
+            return folders[0] if folders else None
+
+        mailbox = self.service.mailbox
+        data = await self.office.connection.get(mailbox.build_url(mailbox._endpoints.get("get_folder").format(id=folder_id)))
+        return self._wrap(MessageFolder(con=mailbox.con, protocol=mailbox.protocol, main_resource=mailbox.main_resource, **{mailbox._cloud_data_key: data}))
+
+    def _wrap(self, folder: MessageFolder) -> AsyncContainer:
+        return AsyncContainer(folder, connection=self.office.connection)
+
+
+class AsyncPeopleService:
+    """An asynchronous counterpart to PeopleService. Folders are returned wrapped in an AsyncContainer."""
+
+    def __init__(self, office: AsyncOffice) -> None:
+        self.office, self.service = office, office.office.people
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(office={repr(self.office)})"
+
+    @property
+    def personal(self) -> AsyncContainer:
+        """A property that returns the personal address book."""
+        return AsyncContainer(self.service.personal, connection=self.office.connection)
+
+    async def custom(self, folder_name: str) -> Optional[AsyncContainer]:
+        """Return the given custom contact folder by name."""
+        folders = await self.personal.folders.where(ContactFolder.Attributes.Name == folder_name).limit(1).execute()
+        return folders[0] if folders else None
+
+
+class AsyncCalendarService:
+    """An asynchronous counterpart to CalendarService. Calendars are returned wrapped in an AsyncContainer."""
+
+    def __init__(self, office: AsyncOffice) -> None:
+        self.office, self.service = office, office.office.calendar
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(office={repr(self.office)})"
+
+    async def default(self) -> AsyncContainer:
+        """Return the default calendar."""
+        schedule = self.service.schedule
+        return self._construct(await self.office.connection.get(schedule.build_url(schedule._endpoints.get("default_calendar"))))
+
+    async def custom(self, calendar_name: str = None, calendar_id: str = None) -> Optional[AsyncContainer]:
+        """Return the given custom calendar by name or id."""
+        schedule = self.service.schedule
+
+        if calendar_id is not None:
+            return self._construct(await self.office.connection.get(schedule.build_url(schedule._endpoints.get("get_calendar").format(id=calendar_id))))
+
+        data = await self.office.connection.get(schedule.build_url(schedule._endpoints.get("root_calendars")), params={"$filter": f"{schedule._cc('name')} eq '{calendar_name}'", "$top": 1})
+        return self._construct(data["value"][0]) if data.get("value") else None
+
+    def _construct(self, data: dict) -> AsyncContainer:
+        schedule = self.service.schedule
+        return AsyncContainer(Calendar(parent=schedule, **{schedule._cloud_data_key: data}), connection=self.office.connection)
+
+
+class AsyncOffice:
+    """
+    An asynchronous counterpart to the Office class, whose services' queries are awaitable and can be iterated over with 'async for'. Authentication is handled by the (synchronous) Office
+    object it wraps, while requests are sent through an aiohttp connection pool, which can be shared between many AsyncOffice objects by passing the same 'session' to each.
+    Requires the 'aiohttp' package (the 'async' extra). Use as an async context manager (or await 'AsyncOffice.close') to release the connection pool.
+    """
+
+    def __init__(self, office: Office, session: aiohttp.ClientSession = None, max_connections: int = 100) -> None:
+        self.office = office
+        self.connection = AsyncConnection(con=self.office.account.con, session=session, max_connections=max_connections)
+        self.outlook, self.people, self.calendar = AsyncOutlookService(office=self), AsyncPeopleService(office=self), AsyncCalendarService(office=self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(account={self.office.resource})"
+
+    async def __aenter__(self) -> AsyncOffice:
+        return self
+
+    async def __aexit__(self, ex_type: Any, ex_value: Any, ex_traceback: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Release the connection pool of this object, unless it was provided."""
+        await self.connection.close()
+
+    @classmethod
+    def from_token(cls, client_id: str, client_secret: str, token: dict, resource: str = "me", session: aiohttp.ClientSession = None, max_connections: int = 100) -> AsyncOffice:
+        return cls(office=Office.from_token(client_id=client_id, client_secret=client_secret, token=token, resource=resource), session=session, max_connections=max_connections)
+
+    @classmethod
+    def from_connection(cls, connection: str = None, resource: str = None, session: aiohttp.ClientSession = None, max_connections: int = 100) -> AsyncOffice:
+        return cls(office=Office.from_connection(connection=connection, resource=resource), session=session, max_connections=max_connections)
+
+
+class AsyncBlobStorage:
+    """
+    An asynchronous counterpart to BlobStorage, built on the async client of the storage SDK. Every container and blob of an instance sends its requests through one shared transport,
+    which can also be shared between many instances by passing the same aiohttp 'session' to each. Requires the 'aiohttp' package (the 'async' extra).
+    Use as an async context manager (or await 'AsyncBlobStorage.close') to release the transport.
+    """
+
+    def __init__(self, url: str, key: str, session: aiohttp.ClientSession = None) -> None:
+        _import_aiohttp()
+        from azure.core.pipeline.transport import AioHttpTransport
+        from azure.storage.blob.aio import BlobServiceClient
+
+        self.config = BlobConfig()
+        self.client = BlobServiceClient(account_url=url, credential=key, transport=AioHttpTransport(session=session, session_owner=session is None))
+        self.containers = AsyncBlobContainerNameSpace(self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(url={repr(self.client.url)})"
+
+    async def __aenter__(self) -> AsyncBlobStorage:
+        return self
+
+    async def __aexit__(self, ex_type: Any, ex_value: Any, ex_traceback: Any) -> None:
+        await self.close()
+
+    async def new_container(self, name: str) -> AsyncBlobContainer:
+        await self.client.create_container(name)
+        await self.containers()
+        return self.containers[name]
+
+    def blob_from_url(self, url: str) -> AsyncBlob:
+        container, blob = Str(url).slice.after(f"{self.client.primary_hostname}/").split("/", 1)
+        return self.containers[container][blob]
+
+    async def close(self) -> None:
+        """Release the transport of this object, unless its aiohttp session was provided (in which case its owner is responsible for closing it)."""
+        await self.client.close()
+
+    @classmethod
+    def from_connection(cls, connection: str = None, session: aiohttp.ClientSession = None) -> AsyncBlobStorage:
+        config = BlobConfig()
+        connection = connection or config.data.default_connection
+        credentials = config.data.connections[connection]
+        return cls(url=credentials.url, key=credentials.key, session=session)
+
+
+class AsyncBlobContainerNameSpace(NameSpace):
+    """A namespace class representing a collection of blob containers. Await a call to this object to list the containers in storage. Item access does not require the container to have been listed."""
+
+    def __init__(self, storage: AsyncBlobStorage) -> None:
+        self._storage = storage
+
+    async def __call__(self, *args, **kwargs) -> AsyncBlobContainerNameSpace:
+        super().__call__({container.name: AsyncBlobContainer(name=container.name, storage=self._storage) async for container in self._storage.client.list_containers()})
+        return self
+
+    def __getitem__(self, name: str) -> AsyncBlobContainer:
+        if name not in self:
+            self[name] = AsyncBlobContainer(name=name, storage=self._storage)
+
+        return super().__getitem__(name=name)
+
+
+class AsyncBlobContainer:
+    """An asynchronous counterpart to BlobContainer, with methods for accessing (supports item access) and iterating over its blobs with 'async for'."""
+
+    def __init__(self, name: str, storage: AsyncBlobStorage) -> None:
+        self.name, self.storage = name, storage
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={repr(self.name)})"
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __aiter__(self) -> AsyncIterator[AsyncBlob]:
+        return self.blobs()
+
+    def __getitem__(self, key: str) -> AsyncBlob:
+        return AsyncBlob(name=key, container=self)
+
+    @cached_property
+    def client(self) -> ContainerClient:
+        return self.storage.client.get_container_client(self.name)
+
+    async def blobs(self, prefix: str = None, page_size: int = 5000) -> AsyncIterator[AsyncBlob]:
+        """Lazily yield the blobs in this container (or only those whose names start with the given prefix), requesting them from the server in pages of 'page_size' as they are consumed."""
+        async for properties in self.client.list_blobs(name_starts_with=prefix, results_per_page=page_size):
+            yield self[properties.name]
+
+    async def count(self, prefix: str = None, page_size: int = 5000) -> int:
+        """Count the blobs in this container (or only those whose names start with the given prefix)."""
+        return sum([1 async for _ in self.client.list_blobs(name_starts_with=prefix, results_per_page=page_size)])
+
+    async def is_empty(self, prefix: str = None) -> bool:
+        """Whether this container has no blobs (or none whose names start with the given prefix). Requests a single item, however many blobs there are."""
+        async for _ in self.client.list_blobs(name_starts_with=prefix, results_per_page=1):
+            return False
+
+        return True
+
+    async def upload_file(self, file: PathLike, name: str = None) -> AsyncBlob:
+        return await self[name if name else File.from_pathlike(file).name].upload.from_file(file)
+
+    async def upload_blobs(self, data: Mapping[str, bytes], overwrite: bool = False, max_concurrency: int = 100) -> list[AsyncBlob]:
+        """Create a blob from each of the given bytes, keyed by blob name, with at most 'max_concurrency' uploads in flight at a time. Returns the blobs in the order they were given."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def upload(name: str, content: bytes) -> AsyncBlob:
+            async with semaphore:
+                return await self[name].upload(overwrite=overwrite).from_bytes(content)
+
+        return list(await asyncio.gather(*(upload(name, content) for name, content in data.items())))
+
+    async def delete(self) -> None:
+        if not await self.is_empty():
+            raise PermissionError(f"May not delete non-empty container '{self.name}'.")
+        else:
+            await self.storage.client.delete_container(self.name)
+            await self.storage.containers()
+
+
+class AsyncBlob:
+    """An asynchronous counterpart to Blob, with methods for interacting with it."""
+
+    def __init__(self, name: str, container: AsyncBlobContainer) -> None:
+        self.name, self.container = name, container
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={repr(self.name)}, container={repr(self.container.name)})"
+
+    @cached_property
+    def client(self) -> BlobClient:
+        return self.container.client.get_blob_client(self.name)
+
+    @property
+    def url(self) -> str:
+        return self.client.url
+
+    @cached_property
+    def upload(self) -> AsyncUploadAccessor:
+        return AsyncUploadAccessor(parent=self)
+
+    @cached_property
+    def download(self) -> AsyncDownloadAccessor:
+        return AsyncDownloadAccessor(parent=self)
+
+    async def properties(self) -> Dict:
+        """Return the properties of this blob."""
+        return Dict(await self.client.get_blob_properties())
+
+    async def delete(self) -> None:
+        """Permanently delete this blob within its container in storage."""
+        await self.client.delete_blob()
+
+    async def exists(self) -> bool:
+        return await self.client.exists()
+
+
+class AsyncUploadAccessor:
+    def __init__(self, parent: AsyncBlob) -> None:
+        self.parent = parent
+        self()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(parent={repr(self.parent)}, overwrite={self.overwrite}, max_concurrency={self.max_concurrency})"
+
+    def __call__(self, overwrite: bool = False, max_concurrency: int = 1) -> AsyncUploadAccessor:
+        """Set the options of the next upload. Blobs too large for a single request are uploaded in blocks, with at most 'max_concurrency' blocks in flight at a time."""
+        self.overwrite, self.max_concurrency = overwrite, max_concurrency
+        return self
+
+    async def from_file(self, file: PathLike) -> AsyncBlob:
+        """Create a new blob within this container in storage from the given file path."""
+        with open(File.from_pathlike(file), "rb") as stream:
+            await self.parent.client.upload_blob(data=stream, overwrite=self.overwrite, max_concurrency=self.max_concurrency)
+
+        return self.parent
+
+    async def from_bytes(self, data: bytes) -> AsyncBlob:
+        """Create a new blob within this container in storage from the given bytes."""
+        await self.parent.client.upload_blob(data=data, overwrite=self.overwrite, max_concurrency=self.max_concurrency)
+        return self.parent
+
+    async def from_stream(self, stream: BytesIO) -> AsyncBlob:
+        """Create a new blob within this container in storage from the given stream."""
+        stream.seek(0)
+        await self.parent.client.upload_blob(data=stream, overwrite=self.overwrite, max_concurrency=self.max_concurrency)
+        return self.parent
+
+
+class AsyncDownloadAccessor:
+    def __init__(self, parent: AsyncBlob) -> None:
+        self.parent = parent
+        self()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(parent={repr(self.parent)}, max_concurrency={self.max_concurrency}, validate_content={self.validate_content})"
+
+    def __call__(self, max_concurrency: int = 1, validate_content: bool = False) -> AsyncDownloadAccessor:
+        """Set the options of the next download. Blobs too large for a single request are downloaded in ranges, with at most 'max_concurrency' ranges in flight at a time."""
+        self.max_concurrency, self.validate_content = max_concurrency, validate_content
+        return self
+
+    async def to_folder(self, folder: PathLike, name: str = None) -> File:
+        """Download this blob to the given folder. It will keep its blob 'basename' as its new name."""
+        return await self.as_file(Dir.from_pathlike(folder).new_file(Str(self.parent.name).slice.after_last("/") or self.parent.name if name is None else name))
+
+    async def as_file(self, file: PathLike) -> File:
+        """Download this blob to the given path."""
+        file = File.from_pathlike(file)
+        with open(file, "wb") as stream:
+            await (await self._download()).readinto(stream)
+
+        return file
+
+    async def as_bytes(self) -> bytes:
+        return await (await self._download()).readall()
+
+    async def as_stream(self, stream: BytesIO = None) -> BytesIO:
+        stream = stream or BytesIO()
+        await (await self._download()).readinto(stream)
+        stream.seek(0)
+        return stream
+
+    async def _download(self) -> Any:
+        return await self.parent.client.download_blob(max_concurrency=self.max_concurrency, validate_content=self.validate_content)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Any, Callable, NoReturn, Union
+from collections.abc import Iterable
+from typing import Any, Callable, Collection, NoReturn, Union
 
 import O365.utils.utils as utils
 from subtypes import ValueEnum
@@ -8,6 +9,23 @@ from subtypes import ValueEnum
 # TODO: Add all attributes from https://docs.microsoft.com/en-us/previous-versions/office/office-365-api/api/version-2.0/complex-types-for-mail-contacts-calendar#Filter
 
 
+def _in_values(values: Collection) -> tuple:
+    """Return the given values of an 'in' check as a flat tuple. A single collection of values (as in 'is_in(["a", "b"])') is unpacked, so that it is not compared as one value."""
+    values = tuple(values)
+    if len(values) == 1 and isinstance(values[0], Iterable) and not isinstance(values[0], (str, bytes)):
+        return tuple(values[0])
+
+    return values
+
+
+def is_in(query: utils.Query, values: Collection) -> utils.Query:
+    """Add an 'in' check against the given values (or a single collection of them) to the given O365 query, for which it has no method of its own."""
+    negation, query._negation = query._negation, False
+    word = f"({', '.join(str(query._parse_filter_word(value)) for value in _in_values(values))})"
+    query._add_filter(*query._prepare_sentence(query._attribute, "in", word, negation))
+    return query
+
+
 class Direction(ValueEnum):
     """An Enum of the directions an 'order_by' clause can go in."""
 
@@ -120,6 +138,11 @@ class FilterableAttribute(BaseAttribute):
         """Return a boolean expression indicating whether this attribute ends with the given value."""
         return BooleanExpression(cls.name, utils.Query.endswith, text)
 
+    @classmethod
+    def is_in(cls, *values: Any) -> BooleanExpression:
+        """Return a boolean expression indicating whether this attribute is equal to any of the given values, which may also be given as a single collection."""
+        return BooleanExpression(cls.name, is_in, _in_values(values))
+
     @classmethod
     def asc(cls) -> FilterableAttribute:
         """Create a direction-aware instance of this attribute that can be provided to 'order_by' clauses."""
@@ -195,4 +218,27 @@ class BooleanExpressionClause(BaseExpressionElement):
     """A class representing a binary clause of where each side contains either a boolean expression or another clause."""
 
     def __init__(self, left: BaseExpressionElement, operator: utils.ChainOperator, right: Union[BooleanExpression, BooleanExpressionClause]) -> None:
-        self.left, self.operator, self.right = left, operator, right
+        self.left, self.operator, self.right, self.negated = left, operator, right, False
+
+    def __invert__(self) -> BooleanExpressionClause:
+        return self.negate()
+
+    def negate(self) -> BooleanExpressionClause:
+        """Negate this clause using the 'not' logical operator."""
+        self.negated = not self.negated
+        return self
+
+
+class BooleanExpressionChain(BaseExpressionElement):
+    """A class representing any number of boolean expressions or chains joined by the same operator, as produced by flattening nested clauses."""
+
+    def __init__(self, operator: utils.ChainOperator, elements: list[Union[BooleanExpression, BooleanExpressionChain]], negated: bool = False) -> None:
+        self.operator, self.elements, self.negated = operator, elements, negated
+
+    def __invert__(self) -> BooleanExpressionChain:
+        return self.negate()
+
+    def negate(self) -> BooleanExpressionChain:
+        """Negate this chain using the 'not' logical operator."""
+        self.negated = not self.negated
+        return self
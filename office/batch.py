@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Optional, TYPE_CHECKING
+
+from maybe import Maybe
+
+from .executor import Throttle
+
+if TYPE_CHECKING:
+    from O365.connection import Connection, Protocol
+
+
+class BatchRequest:
+    """
+    A class representing a single sub-request of a Graph JSON batch. The entity it acts upon can be provided so that its response can be mapped back to it.
+    If an 'apply' callable is provided, it is called with the body of the response once the sub-request succeeds, so that its outcome can be applied back onto that entity.
+    """
+
+    def __init__(self, method: str, url: str, body: Any = None, headers: dict = None, entity: Any = None, apply: Callable[[Any], None] = None) -> None:
+        self.method, self.url, self.body, self.headers, self.entity, self.apply = method.upper(), url, body, Maybe(headers).else_({}), entity, apply
+        self.id: Optional[str] = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(method={repr(self.method)}, url={repr(self.url)})"
+
+    def _serialize(self, protocol: Protocol) -> dict:
+        url = self.url[len(protocol.service_url) - 1:] if self.url.startswith(protocol.service_url) else self.url
+        payload = {"id": self.id, "method": self.method, "url": url}
+
+        if self.body is not None:
+            payload["body"], payload["headers"] = self.body, {"Content-Type": "application/json", **self.headers}
+        elif self.headers:
+            payload["headers"] = self.headers
+
+        return payload
+
+
+class BatchResponse:
+    """A class representing the response to a single sub-request of a Graph JSON batch. Evaluates truthy if the sub-request succeeded."""
+
+    def __init__(self, request: BatchRequest, status: int, body: Any = None, headers: dict = None) -> None:
+        self.request, self.status, self.body, self.headers = request, status, body, Maybe(headers).else_({})
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(status={self.status}, entity={repr(self.entity)}{'' if self else f', error={repr(self.error)}'})"
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    @property
+    def ok(self) -> bool:
+        """Whether the sub-request succeeded."""
+        return 200 <= self.status < 300
+
+    @property
+    def throttled(self) -> bool:
+        """Whether the sub-request was throttled by the server and may be retried."""
+        return self.status in Throttle.throttling_statuses
+
+    @property
+    def entity(self) -> Any:
+        """The entity the sub-request corresponding to this response acted upon, if any."""
+        return self.request.entity
+
+    @property
+    def error(self) -> Optional[str]:
+        """The error message returned for the sub-request corresponding to this response, if it failed."""
+        if self.ok:
+            return None
+
+        return (self.body or {}).get("error", {}).get("message", "") if isinstance(self.body, dict) else str(Maybe(self.body).else_(""))
+
+
+class Batch:
+    """
+    A class which collects Graph requests and sends them as JSON batches of up to 'Batch.max_size' sub-requests each, mapping every response back to its request.
+    Sub-requests that are throttled are resent (up to 'max_retries' times) once the back-off period of the given throttle has elapsed.
+    """
+
+    max_size = 20
+
+    def __init__(self, con: Connection, protocol: Protocol, throttle: Throttle = None, max_retries: int = 5) -> None:
+        self.con, self.protocol, self.throttle, self.max_retries = con, protocol, Maybe(throttle).else_(Throttle()), max_retries
+        self.pending: list[BatchRequest] = []
+        self.responses: list[BatchResponse] = []
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(pending={len(self.pending)}, responses={len(self.responses)})"
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    @property
+    def url(self) -> str:
+        return f"{self.protocol.service_url}$batch"
+
+    @property
+    def failures(self) -> list[BatchResponse]:
+        """The responses to any sub-requests that have failed so far."""
+        return [response for response in self.responses if not response]
+
+    def add(self, request: BatchRequest) -> Batch:
+        """Add a sub-request to this batch. Whenever 'Batch.max_size' sub-requests are pending they will be sent."""
+        self.pending.append(request)
+        if len(self.pending) >= self.max_size:
+            self.flush()
+
+        return self
+
+    def flush(self) -> list[BatchResponse]:
+        """Send any pending sub-requests and return their responses."""
+        requests, self.pending = self.pending, []
+        responses = self.send(requests) if requests else []
+        self.responses += responses
+        return responses
+
+    def execute(self) -> list[BatchResponse]:
+        """Send any pending sub-requests and return the responses to every sub-request sent by this batch."""
+        self.flush()
+        return self.responses
+
+    def send(self, requests: list[BatchRequest]) -> list[BatchResponse]:
+        """Immediately send the given sub-requests (at most 'Batch.max_size' of them) as a single batch and return their responses. Safe to call from several threads at once."""
+        responses: list[BatchResponse] = []
+
+        for attempt in range(self.max_retries + 1):
+            self.throttle.wait()
+            results = self._send(requests)
+            throttled = [response for response in results if response.throttled]
+            responses += [response for response in results if not response.throttled]
+
+            if not throttled or attempt == self.max_retries:
+                return responses + throttled
+
+            self.throttle.back_off(headers=max((response.headers for response in throttled), key=lambda headers: self.throttle.delay_for(headers=headers, attempt=attempt)), attempt=attempt)
+            requests = [response.request for response in throttled]
+
+        return responses
+
+    def _send(self, requests: list[BatchRequest]) -> list[BatchResponse]:
+        for index, request in enumerate(requests, start=1):
+            request.id = str(index)
+
+        response = self.con.post(self.url, data={"requests": [request._serialize(self.protocol) for request in requests]})
+        results = {result["id"]: result for result in response.json().get("responses", [])} if response else {}
+
+        responses = [
+            BatchResponse(request=request, status=result.get("status", 0), body=result.get("body"), headers=result.get("headers"))
+            for request, result in ((request, results.get(request.id, {})) for request in requests)
+        ]
+
+        for response in responses:
+            if response and response.request.apply is not None:
+                response.request.apply(response.body)
+
+        return responses
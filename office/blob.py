@@ -1,16 +1,31 @@
 from __future__ import annotations
 
-from io import BytesIO
-from typing import Iterator, TYPE_CHECKING
-
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import datetime as dt
+import gzip
+import hashlib
+from io import BytesIO, RawIOBase, SEEK_SET, SEEK_CUR, SEEK_END
+import math
+import mmap
+import os
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Callable, IO, Iterator, Optional, Union, TYPE_CHECKING
+
+from maybe import Maybe
 from subtypes import NameSpace, Str, Dict
 from pathmagic import File, Dir, PathLike
 from miscutils import cached_property, ReprMixin
 
 from .config import BlobConfig as Config
+from .executor import BulkExecutor, ExecutionStatistics
+from .resources.blob_content_types import content_types
 
 if TYPE_CHECKING:
-    from azure.storage.blob import ContainerClient, BlobClient
+    from azure.storage.blob import ContainerClient, BlobClient, BlobProperties, ContentSettings
 
 
 class BlobStorage:
@@ -48,18 +63,100 @@ class BlobContainerNameSpace(NameSpace):
         self()
 
     def __call__(self, *args, **kwargs) -> BlobContainerNameSpace:
-        super().__call__({container.name: BlobContainer(name=container.name, storage=self._storage) for container in self._storage.client.list_containers()})
+        """Refresh the containers of this namespace. Containers which still exist keep their existing objects, along with the blob properties they have cached."""
+        existing = dict(self)
+        super().__call__({
+            container.name: existing[container.name] if container.name in existing else BlobContainer(name=container.name, storage=self._storage)
+            for container in self._storage.client.list_containers()
+        })
         return self
 
     def __getitem__(self, name: str) -> BlobContainer:
         return super().__getitem__(name=name)
 
 
+class BlobPropertiesCache:
+    """
+    A thread-safe cache of the properties of the blobs within a container, filled by listings of the container and by requests for the properties of single blobs. Entries are trusted for 'ttl',
+    after which the properties of a blob are revalidated with a conditional request against their ETag. A complete listing of a prefix also records that any blob under it which was not listed
+    does not exist, so existence checks can be answered without a request for each blob. Uploads and deletions made through this library update the cache.
+    At most 'maxsize' blobs are held, discarding the least recently used one whenever it is full, so listing a large container does not hold every blob's properties in memory.
+    Once any blob has been discarded, listings made before then no longer count as complete.
+    """
+
+    def __init__(self, ttl: dt.timedelta = dt.timedelta(minutes=1), maxsize: int = 10000) -> None:
+        self.ttl, self.maxsize = ttl, maxsize
+        self._entries: OrderedDict[str, tuple[bool, Optional[Dict], float]] = OrderedDict()
+        self._listings: dict[str, float] = {}
+        self._evicted_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(size={len(self)}, maxsize={self.maxsize}, ttl={repr(self.ttl)})"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def properties(self, name: str, stale: bool = False) -> Optional[Dict]:
+        """Return the cached properties of the given blob, or None if they are unknown or (unless 'stale' is True) have expired."""
+        entry = self._get(name)
+        return None if entry is None or not (stale or self._is_fresh(entry[2])) else entry[1]
+
+    def exists(self, name: str) -> Optional[bool]:
+        """Return whether the given blob exists according to this cache, or None if that is unknown."""
+        entry = self._get(name)
+        if entry is not None and self._is_fresh(entry[2]):
+            return entry[0]
+
+        return False if any(name.startswith(prefix) and self._is_fresh(listed_at) for prefix, listed_at in list(self._listings.items())) else None
+
+    def store(self, name: str, exists: bool = True, properties: Dict = None) -> None:
+        """Record whether the given blob exists and (optionally) its properties."""
+        with self._lock:
+            self._entries[name] = exists, properties, time.monotonic()
+            self._entries.move_to_end(name)
+            if len(self._entries) > self.maxsize:
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+                # the discarded blobs are no longer known to exist, so no listing can be used to rule out the existence of unlisted blobs
+                self._listings.clear()
+                self._evicted_at = time.monotonic()
+
+    def listed(self, prefix: str, listed_at: float) -> None:
+        """Record that every blob under the given prefix was listed (and stored in this cache) as of the given time, according to 'time.monotonic'. Ignored if any blob was discarded since then."""
+        with self._lock:
+            if self._evicted_at < listed_at:
+                self._listings[prefix] = listed_at
+
+    def clear(self) -> None:
+        """Discard every entry of this cache."""
+        with self._lock:
+            self._entries.clear()
+            self._listings.clear()
+
+    def _get(self, name: str) -> Optional[tuple[bool, Optional[Dict], float]]:
+        with self._lock:
+            if (entry := self._entries.get(name)) is not None:
+                self._entries.move_to_end(name)
+
+            return entry
+
+    def _is_fresh(self, stored_at: float) -> bool:
+        return time.monotonic() - stored_at < self.ttl.total_seconds()
+
+
 class BlobContainer:
-    """A class representing a blob container, with methods for accessing (supports item access) and iterating over its blobs."""
+    """
+    A class representing a blob container, with methods for accessing (supports item access) and iterating over its blobs. The properties of (at most 'cache_size' of) its blobs are cached
+    in 'BlobContainer.cache' for 'cache_ttl'.
+    """
+
+    max_batch_size = 256
 
-    def __init__(self, name: str, storage: BlobStorage) -> None:
+    def __init__(self, name: str, storage: BlobStorage, cache_ttl: dt.timedelta = dt.timedelta(minutes=1), cache_size: int = 10000) -> None:
         self.name, self.storage = name, storage
+        self.cache = BlobPropertiesCache(ttl=cache_ttl, maxsize=cache_size)
         self._cached_len = 0
 
     def __repr__(self) -> str:
@@ -69,14 +166,13 @@ class BlobContainer:
         return self.name
 
     def __len__(self) -> int:
-        self._cached_len = sum([1 for blob in self.client.list_blobs(self.name)])
-        return self._cached_len
+        return self.count()
 
     def __bool__(self) -> bool:
-        return len(self) > 0
+        return not self.is_empty()
 
     def __iter__(self) -> Iterator[Blob]:
-        return iter(Blob(name=blob.name, container=self) for blob in self.client.list_blobs())
+        return self.blobs()
 
     def __getitem__(self, key: str) -> Blob:
         return Blob(name=key, container=self)
@@ -89,16 +185,130 @@ class BlobContainer:
     def properties(self) -> Dict:
         return Dict(self.client.get_container_properties())
 
+    def count(self, prefix: str = None, page_size: int = 5000) -> int:
+        """Count the blobs in this container (or only those whose names start with the given prefix) using a metadata-free listing, holding at most one page of 'page_size' items in memory at a time."""
+        count = sum(sum(1 for _ in page) for page in self.client.list_blobs(name_starts_with=prefix, results_per_page=page_size).by_page())
+        if prefix is None:
+            self._cached_len = count
+
+        return count
+
+    def blobs(self, prefix: str = None, page_size: int = 5000, metadata: bool = True) -> Iterator[Blob]:
+        """
+        Lazily yield the blobs in this container (or only those whose names start with the given prefix), requesting them from the server in pages of 'page_size' as they are consumed.
+        The listed blobs are recorded in 'BlobContainer.cache', so checking whether they exist does not require another request. If 'metadata' is True, so are their properties.
+        """
+        listed_at = time.monotonic()
+        for properties in self.client.list_blobs(name_starts_with=prefix, include=["metadata"] if metadata else None, results_per_page=page_size):
+            yield self._listed(properties, metadata=metadata)
+
+        self.cache.listed(prefix or "", listed_at=listed_at)
+
+    def walk(self, prefix: str = None, delimiter: str = "/", page_size: int = 5000, metadata: bool = True) -> Iterator[Union[Blob, VirtualDirectory]]:
+        """
+        Lazily yield the blobs directly under the given prefix, treating the given delimiter as a path separator. Every deeper level of the hierarchy is yielded as a single VirtualDirectory,
+        which can itself be walked.
+        """
+        from azure.storage.blob import BlobPrefix
+
+        for item in self.client.walk_blobs(name_starts_with=prefix, include=["metadata"] if metadata else None, delimiter=delimiter, results_per_page=page_size):
+            yield VirtualDirectory(name=item.name, container=self, delimiter=delimiter) if isinstance(item, BlobPrefix) else self._listed(item, metadata=metadata)
+
+    def is_empty(self, prefix: str = None) -> bool:
+        """Whether this container has no blobs (or none whose names start with the given prefix). Requests a single item, however many blobs there are."""
+        return next(iter(self.client.list_blobs(name_starts_with=prefix, results_per_page=1)), None) is None
+
     def upload_file(self, file: PathLike, name: str = None) -> UploadAccessor:
         return self[name if name else File.from_pathlike(file).name].upload.from_file(file)
 
+    def sync_from_dir(self, path: PathLike, prefix: str = "", delete: bool = False, max_workers: int = 4) -> SyncResult:
+        """
+        Upload every file within the given directory (recursively) that is new or has changed to a blob of the same relative name under the given prefix, using 'max_workers' threads.
+        If 'delete' is True, blobs under the prefix without a corresponding file are deleted.
+        """
+        return DirectorySync(container=self, path=path, prefix=prefix).upload(delete=delete, max_workers=max_workers)
+
+    def sync_to_dir(self, path: PathLike, prefix: str = "", delete: bool = False, max_workers: int = 4) -> SyncResult:
+        """
+        Download every blob under the given prefix that is new or has changed to a file of the same relative name within the given directory, using 'max_workers' threads.
+        If 'delete' is True, files within the directory without a corresponding blob are deleted.
+        """
+        return DirectorySync(container=self, path=path, prefix=prefix).download(delete=delete, max_workers=max_workers)
+
+    def delete_blobs(self, prefix: str = None, where: Callable[[Blob], bool] = None, older_than: Union[dt.datetime, dt.timedelta] = None, max_workers: int = 4, page_size: int = 5000,
+                     progress: Callable[[ExecutionStatistics], Any] = None) -> ExecutionStatistics:
+        """
+        Delete every blob whose name starts with the given prefix, which was last modified before 'older_than' (a point in time, or an age) and for which 'where' returns True.
+        The listing is streamed and the matching blobs are deleted by batch requests of up to 'BlobContainer.max_batch_size' blobs each, with 'max_workers' batches in flight at a time.
+        If a 'progress' callable is provided, it is called with the statistics of the run after every batch. Returns the statistics once every batch has finished.
+        """
+        executor = BulkExecutor(max_workers=max_workers, progress=progress)
+        return executor.map(self._delete_batch, self._deletion_batches(prefix=prefix, where=where, older_than=older_than, page_size=page_size))
+
     def delete(self) -> None:
-        if list(self):
+        if not self.is_empty():
             raise PermissionError(f"May not delete non-empty ({len(self)} blobs found) container '{self.name}'.")
         else:
             self.storage.client.delete_container(self.name)
             self.storage.containers()
 
+    def _listed(self, properties: BlobProperties, metadata: bool) -> Blob:
+        self.cache.store(properties.name, exists=True, properties=Dict(properties) if metadata else None)
+        return self[properties.name]
+
+    def _deletion_batches(self, prefix: Optional[str], where: Optional[Callable[[Blob], bool]], older_than: Union[dt.datetime, dt.timedelta, None], page_size: int) -> Iterator[list[str]]:
+        cutoff = dt.datetime.now(dt.timezone.utc) - older_than if isinstance(older_than, dt.timedelta) else older_than
+        if cutoff is not None and cutoff.tzinfo is None:
+            cutoff = cutoff.astimezone()
+
+        batch = []
+        for properties in self.client.list_blobs(name_starts_with=prefix, include=["metadata"] if where is not None else None, results_per_page=page_size):
+            if (cutoff is None or properties.last_modified < cutoff) and (where is None or where(self._listed(properties, metadata=True))):
+                batch.append(properties.name)
+                if len(batch) == self.max_batch_size:
+                    yield batch
+                    batch = []
+
+        if batch:
+            yield batch
+
+    def _delete_batch(self, names: list[str]) -> list[bool]:
+        outcomes = []
+        for name, response in zip(names, self.client.delete_blobs(*names, raise_on_any_failure=False)):
+            # a blob that no longer exists counts as deleted, since it may have been removed by a concurrent run
+            outcomes.append(response.status_code < 300 or response.status_code == 404)
+            if outcomes[-1]:
+                self.cache.store(name, exists=False)
+
+        return outcomes
+
+
+class VirtualDirectory:
+    """A class representing a virtual directory within a container, which is the common prefix (up to the delimiter) of the names of the blobs within it."""
+
+    def __init__(self, name: str, container: BlobContainer, delimiter: str = "/") -> None:
+        self.name, self.container, self.delimiter = name, container, delimiter
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={repr(self.name)}, container={repr(self.container.name)})"
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __iter__(self) -> Iterator[Union[Blob, VirtualDirectory]]:
+        return self.walk()
+
+    def __bool__(self) -> bool:
+        return not self.container.is_empty(prefix=self.name)
+
+    def blobs(self, page_size: int = 5000, metadata: bool = True) -> Iterator[Blob]:
+        """Lazily yield every blob within this virtual directory, including those within nested virtual directories."""
+        return self.container.blobs(prefix=self.name, page_size=page_size, metadata=metadata)
+
+    def walk(self, page_size: int = 5000, metadata: bool = True) -> Iterator[Union[Blob, VirtualDirectory]]:
+        """Lazily yield the blobs and virtual directories directly within this virtual directory."""
+        return self.container.walk(prefix=self.name, delimiter=self.delimiter, page_size=page_size, metadata=metadata)
+
 
 class Blob:
     """A class representing a blob in storage within a container, with methods for interacting with it."""
@@ -116,9 +326,23 @@ class Blob:
     def client(self) -> BlobClient:
         return self.container.client.get_blob_client(self.name)
 
-    @cached_property
+    @property
     def properties(self) -> Dict:
-        return Dict(self.client.get_blob_properties())
+        """The properties of this blob, as cached by its container. Once they have expired, they are revalidated with a request conditional on their ETag."""
+        from azure.core import MatchConditions
+        from azure.core.exceptions import ResourceNotModifiedError
+
+        if (properties := self.container.cache.properties(self.name)) is not None:
+            return properties
+
+        previous = self.container.cache.properties(self.name, stale=True)
+        try:
+            properties = Dict(self.client.get_blob_properties(**({} if previous is None else {"etag": previous.etag, "match_condition": MatchConditions.IfModified})))
+        except ResourceNotModifiedError:
+            properties = previous
+
+        self.container.cache.store(self.name, exists=True, properties=properties)
+        return properties
 
     @property
     def url(self) -> str:
@@ -132,79 +356,520 @@ class Blob:
     def download(self) -> DownloadAccessor:
         return DownloadAccessor(parent=self)
 
+    def open(self, mode: str = "rb", block_size: int = 1024 ** 2, max_blocks: int = 64, max_readahead: int = 16) -> BlobFile:
+        """Open this blob as a seekable, read-only binary file whose content is fetched with ranged requests as it is read. Only the 'rb' mode is supported."""
+        if mode != "rb":
+            raise ValueError(f"Unsupported mode {repr(mode)}, blobs may only be opened in 'rb' mode.")
+
+        return BlobFile(blob=self, block_size=block_size, max_blocks=max_blocks, max_readahead=max_readahead)
+
     def delete(self) -> None:
         """Permanently delete this blob within its container in storage."""
         self.client.delete_blob()
+        self.container.cache.store(self.name, exists=False)
 
     def exists(self) -> bool:
+        """Whether this blob exists. Answered by the cache of its container where possible, and otherwise by requesting its properties."""
+        from azure.core.exceptions import ResourceNotFoundError
+
+        if (exists := self.container.cache.exists(self.name)) is not None:
+            return exists
+
         try:
-            if self.properties:
-                return True
-        except Exception:
+            return bool(self.properties)
+        except ResourceNotFoundError:
+            self.container.cache.store(self.name, exists=False)
             return False
 
 
+class ContentTypeIndex:
+    """An index of content types by (case-insensitive) file extension, which resolves the content type of a name from its longest known extension, so that multi-dot extensions take precedence."""
+
+    compressible = {"application/json", "application/xml", "application/javascript", "image/svg+xml"}
+
+    def __init__(self, mapping: dict[str, str]) -> None:
+        self.index = {extension.lower(): content_type for extension, content_type in mapping.items()}
+        self.max_parts = max(extension.count(".") + 1 for extension in self.index)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(extensions={len(self.index)})"
+
+    def guess(self, name: str) -> Optional[str]:
+        """Return the content type of the given (file or blob) name, or None if its extension is unknown."""
+        extensions = name.rsplit("/", 1)[-1].lower().split(".")[1:]
+        for count in range(min(len(extensions), self.max_parts), 0, -1):
+            if (content_type := self.index.get(".".join(extensions[-count:]))) is not None:
+                return content_type
+
+        return None
+
+    def is_compressible(self, content_type: Optional[str]) -> bool:
+        """Whether the given content type is text-like, and therefore worth compressing."""
+        return content_type is not None and (content_type.startswith("text/") or content_type in self.compressible or content_type.endswith(("+json", "+xml")))
+
+
 class UploadAccessor(ReprMixin):
+    max_blocks = 50000
+    chunk_size = 4 * 1024 ** 2
+    content_types = ContentTypeIndex(content_types)
+
     def __init__(self, parent: Blob) -> None:
         self.parent = parent
         self()
 
-    def __call__(self, overwrite: bool = False) -> UploadAccessor:
-        self.overwrite = overwrite
+    def __call__(self, overwrite: bool = False, block_size: int = 8 * 1024 ** 2, max_workers: int = None, content_type: str = None, compress: bool = False) -> UploadAccessor:
+        """
+        Set the options of the next upload. If 'max_workers' is provided, files are split into blocks of 'block_size' bytes which are staged concurrently by that many threads and then committed.
+        Should such an upload fail, uploading the same file again only stages the blocks that are missing or whose content has changed since.
+        Unless a 'content_type' is provided, it is guessed from the extension of the blob's name. If 'compress' is True and the content type is text-like, the content is gzipped as it is
+        uploaded (in which case it is streamed rather than staged in parallel blocks) and the blob's 'Content-Encoding' is set accordingly.
+        """
+        self.overwrite, self.block_size, self.max_workers, self.content_type, self.compress = overwrite, block_size, max_workers, content_type, compress
         return self
 
     def from_file(self, file: PathLike) -> Blob:
         """Create a new blob within this container in storage from the given file path."""
         file = File.from_pathlike(file)
 
-        with open(file, "rb") as stream:
-            self.parent.client.upload_blob(data=stream, overwrite=self.overwrite)
+        if self.max_workers is not None and not self._compresses():
+            return self._upload_blocks(file)
 
-        return self.parent
+        with open(file, "rb") as stream:
+            return self._upload(stream)
 
     def from_bytes(self, data: bytes) -> Blob:
-        """Create a new blob within this container in storage from the given file path."""
-        self.parent.client.upload_blob(data=data, overwrite=self.overwrite)
-        return self.parent
+        """Create a new blob within this container in storage from the given bytes."""
+        return self._upload(data)
 
     def from_stream(self, stream: BytesIO) -> Blob:
-        """Create a new blob within this container in storage from the given file path."""
+        """Create a new blob within this container in storage from the given stream."""
         stream.seek(0)
-        self.parent.client.upload_blob(data=stream, overwrite=self.overwrite)
+        return self._upload(stream)
+
+    def _upload(self, data: Union[bytes, IO[bytes]]) -> Blob:
+        if self._compresses():
+            data = gzip.compress(data) if isinstance(data, bytes) else self._compressed(data)
+
+        self.parent.client.upload_blob(data=data, overwrite=self.overwrite, content_settings=self._content_settings())
+        return self._uploaded()
+
+    def _compressed(self, stream: IO[bytes]) -> Iterator[bytes]:
+        compressor = zlib.compressobj(wbits=31)
+        while chunk := stream.read(self.chunk_size):
+            if data := compressor.compress(chunk):
+                yield data
+
+        yield compressor.flush()
+
+    def _compresses(self) -> bool:
+        return self.compress and self.content_types.is_compressible(self._content_type())
+
+    def _content_type(self) -> Optional[str]:
+        return self.content_type or self.content_types.guess(self.parent.name)
+
+    def _content_settings(self) -> ContentSettings:
+        from azure.storage.blob import ContentSettings
+
+        return ContentSettings(content_type=self._content_type() or "application/octet-stream", content_encoding="gzip" if self._compresses() else None)
+
+    def _upload_blocks(self, file: File) -> Blob:
+        from azure.core import MatchConditions
+        from azure.storage.blob import BlobBlock
+
+        stat = os.stat(file)
+        if not stat.st_size:
+            return self.from_bytes(b"")
+
+        block_size = max(self.block_size, math.ceil(stat.st_size / self.max_blocks))
+        key = self._block_key(file, size=stat.st_size, modified=stat.st_mtime_ns, block_size=block_size)
+        staged = self._staged_blocks()
+
+        def stage(index: int) -> str:
+            with open(file, "rb") as stream:
+                stream.seek(index * block_size)
+                data = stream.read(block_size)
+
+            # a block staged by an earlier failed upload is only reused if its id (and so its content hash) and size both match, so blocks of a file changed in place are staged again
+            block_id = self._block_id(key, index=index, data=data)
+            if staged.get(block_id) != len(data):
+                self.parent.client.stage_block(block_id=block_id, data=data, length=len(data), validate_content=True)
+
+            return block_id
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            blocks = list(pool.map(stage, range(math.ceil(stat.st_size / block_size))))
+
+        conditions = {} if self.overwrite else {"match_condition": MatchConditions.IfMissing}
+        self.parent.client.commit_block_list([BlobBlock(block_id=block_id) for block_id in blocks], content_settings=self._content_settings(), **conditions)
+        return self._uploaded()
+
+    def _uploaded(self) -> Blob:
+        self.parent.container.cache.store(self.parent.name, exists=True)
         return self.parent
 
+    def _staged_blocks(self) -> dict[str, int]:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            _, uncommitted = self.parent.client.get_block_list(block_list_type="uncommitted")
+        except ResourceNotFoundError:
+            return {}
+
+        return {block.id: block.size for block in uncommitted}
+
+    @staticmethod
+    def _block_key(file: File, size: int, modified: int, block_size: int) -> str:
+        # the key identifies the version of the file and the block size, so that blocks staged by an earlier failed upload of the same file can be recognized and skipped
+        return hashlib.md5(f"{file.name}:{size}:{modified}:{block_size}".encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _block_id(key: str, index: int, data: bytes) -> str:
+        # the name, size and modification time of a file do not prove its content is unchanged, so every id also carries the MD5 of its block (all ids are the same length, as the service requires)
+        return f"{key}-{index:06d}-{hashlib.md5(data).hexdigest()}"
+
 
 class DownloadAccessor(ReprMixin):
+    max_validated_range_size = 4 * 1024 ** 2
+
     def __init__(self, parent: Blob) -> None:
         self.parent = parent
         self()
 
-    def __call__(self) -> UploadAccessor:
+    def __call__(self, range_size: int = 8 * 1024 ** 2, max_workers: int = None, validate_content: bool = False) -> DownloadAccessor:
+        """
+        Set the options of the next download. If 'max_workers' is provided, downloads to files (which are preallocated and memory-mapped) and to buffers fetch ranges of 'range_size' bytes
+        concurrently straight into them. If 'validate_content' is True, the MD5 checksum of every range is verified, which limits ranges to 'DownloadAccessor.max_validated_range_size' bytes.
+        """
+        self.range_size, self.max_workers, self.validate_content = range_size, max_workers, validate_content
         return self
 
     def to_folder(self, folder: PathLike, name: str = None) -> File:
         """Download this blob to the given folder. It will keep its blob 'basename' as its new name."""
-        file = Dir.from_pathlike(folder).new_file(Str(self.parent.name).slice.after_last("/") or self.parent.name if name is None else name)
-
-        with open(file, "wb") as stream:
-            self.parent.client.download_blob().readinto(stream)
-
-        return file
+        return self._to_file(Dir.from_pathlike(folder).new_file(Str(self.parent.name).slice.after_last("/") or self.parent.name if name is None else name))
 
     def as_file(self, file: PathLike) -> File:
         """Download this blob to the given path."""
-        file = File.from_pathlike(file)
-
-        with open(file, "wb") as stream:
-            self.parent.client.download_blob().readinto(stream)
-
-        return file
+        return self._to_file(File.from_pathlike(file))
 
     def as_bytes(self) -> bytes:
         return self.parent.client.download_blob().readall()
 
+    def as_buffer(self, buffer: Any = None) -> Any:
+        """Download this blob straight into the given writable buffer (such as a bytearray, memoryview or NumPy array) and return it. If none is given, a bytearray of the right size is allocated."""
+        properties = self.parent.client.get_blob_properties()
+        buffer = bytearray(properties.size) if buffer is None else buffer
+        self._into(memoryview(buffer).cast("B"), size=properties.size, etag=properties.etag)
+        return buffer
+
+    def into(self, buffer: Any) -> int:
+        """Download this blob straight into the start of the given writable buffer (such as a bytearray, memoryview or NumPy array) without any intermediate copies, and return its size in bytes."""
+        properties = self.parent.client.get_blob_properties()
+        self._into(memoryview(buffer).cast("B"), size=properties.size, etag=properties.etag)
+        return properties.size
+
+    def chunks(self, size: int = 4 * 1024 ** 2) -> Iterator[memoryview]:
+        """
+        Lazily yield the content of this blob in consecutive chunks of (at most) the given size. Every chunk is downloaded into the same buffer, so each yielded memoryview is only valid
+        until the next one is requested, and must be copied if it is needed for longer.
+        """
+        from azure.core import MatchConditions
+
+        properties = self.parent.client.get_blob_properties()
+        total, view = properties.size, memoryview(bytearray(min(size, properties.size)))
+
+        for offset in range(0, total, size):
+            length = min(size, total - offset)
+            self.parent.client.download_blob(offset=offset, length=length, validate_content=self.validate_content, etag=properties.etag, match_condition=MatchConditions.IfNotModified).readinto(MappedRange(view[:length]))
+            yield view[:length]
+
     def as_stream(self, stream: BytesIO = None) -> BytesIO:
         stream = stream or BytesIO()
         self.parent.client.download_blob().readinto(stream)
         stream.seek(0)
         return stream
+
+    def _to_file(self, file: File) -> File:
+        if self.max_workers is None:
+            with open(file, "wb") as stream:
+                self.parent.client.download_blob(validate_content=self.validate_content).readinto(stream)
+        else:
+            self._download_ranges(file)
+
+        return file
+
+    def _download_ranges(self, file: File) -> None:
+        properties = self.parent.client.get_blob_properties()
+        size = properties.size
+
+        # the ranges are written into a temporary file first, so that a failed download never leaves a full-size file with holes in it that would pass for a complete one
+        # it is created the way the file itself would have been (rather than through tempfile, which only lets its owner read it), so that the umask decides its permissions
+        with open(os.path.join(os.path.dirname(os.path.abspath(file)), f"tmp{uuid.uuid4().hex}.part"), "x+b") as stream:
+            try:
+                stream.truncate(size)
+                if size:
+                    with mmap.mmap(stream.fileno(), size) as mapping:
+                        view = memoryview(mapping)
+                        try:
+                            self._into(view, size=size, etag=properties.etag)
+                        finally:
+                            view.release()
+            except BaseException:
+                stream.close()
+                os.remove(stream.name)
+                raise
+
+        os.replace(stream.name, file)
+
+    def _into(self, view: memoryview, size: int, etag: str) -> None:
+        from azure.core import MatchConditions
+
+        if len(view) < size:
+            raise ValueError(f"Buffer of {len(view)} bytes is too small for blob '{self.parent.name}' of {size} bytes.")
+
+        # every request is conditioned on the version of the blob the size was read from, so that an overwrite mid-download fails rather than mixing old and new content
+        conditions = {"etag": etag, "match_condition": MatchConditions.IfNotModified}
+
+        if self.max_workers is None:
+            with view[:size] as part:
+                self.parent.client.download_blob(validate_content=self.validate_content, **conditions).readinto(MappedRange(part))
+            return
+
+        range_size = min(self.range_size, self.max_validated_range_size) if self.validate_content else self.range_size
+
+        def fetch(offset: int) -> None:
+            length = min(range_size, size - offset)
+            # every slice is released as soon as its range is written (even if that fails), so that none outlive the download and keep a memory-mapped file from being closed
+            with view[offset:offset + length] as part:
+                self.parent.client.download_blob(offset=offset, length=length, validate_content=self.validate_content, **conditions).readinto(MappedRange(part))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            list(pool.map(fetch, range(0, size, range_size)))
+
+
+class MappedRange(RawIOBase):
+    """A writable stream over a slice of a buffer (such as a memory-mapped file), so that downloaded data is written straight into it."""
+
+    def __init__(self, view: memoryview) -> None:
+        self.view, self.position = view, 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        length = len(data)
+        self.view[self.position:self.position + length] = data
+        self.position += length
+        return length
+
+
+class BlobFile(RawIOBase):
+    """
+    A seekable, read-only file over a blob. Its content is fetched in blocks of 'block_size' bytes with ranged requests only once it is read, and the 'max_blocks' most recently used
+    blocks are kept in memory. Reading sequentially doubles the number of blocks fetched by each request (up to 'max_readahead'), while seeking elsewhere resets it to one.
+    Every request is conditional on the ETag the blob had when the file was opened, so changes to the blob while it is open cause reads to fail rather than return mixed content.
+    """
+
+    def __init__(self, blob: Blob, block_size: int = 1024 ** 2, max_blocks: int = 64, max_readahead: int = 16) -> None:
+        super().__init__()
+        self.blob, self.block_size, self.max_blocks, self.max_readahead = blob, block_size, max_blocks, max_readahead
+
+        properties = self.blob.client.get_blob_properties()
+        self.size, self.etag = properties.size, properties.etag
+        self.position, self.requests = 0, 0
+
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+        self._readahead, self._fetched_until = 1, None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(blob={repr(self.blob.name)}, size={self.size}, position={self.position}, requests={self.requests})"
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = SEEK_SET) -> int:
+        self._checkClosed()
+        origin = {SEEK_SET: 0, SEEK_CUR: self.position, SEEK_END: self.size}[whence]
+        if origin + offset < 0:
+            raise ValueError(f"Negative seek position {origin + offset}.")
+
+        self.position = origin + offset
+        return self.position
+
+    def readinto(self, buffer: Any) -> int:
+        self._checkClosed()
+        view = memoryview(buffer).cast("B")
+        end, written = min(self.position + len(view), self.size), 0
+
+        while self.position < end:
+            index, start = divmod(self.position, self.block_size)
+            block = self._block(index)
+            length = min(len(block) - start, end - self.position)
+            view[written:written + length] = block[start:start + length]
+            self.position, written = self.position + length, written + length
+
+        return written
+
+    def readall(self) -> bytes:
+        return self.read(max(self.size - self.position, 0))
+
+    def _block(self, index: int) -> bytes:
+        if index in self._blocks:
+            self._blocks.move_to_end(index)
+            return self._blocks[index]
+
+        self._readahead = min(self._readahead * 2, self.max_readahead, self.max_blocks) if index == self._fetched_until else 1
+        count = next((offset for offset in range(1, self._readahead) if index + offset in self._blocks), self._readahead)
+        self._fetch(index, count=count)
+        return self._blocks[index]
+
+    def _fetch(self, index: int, count: int) -> None:
+        from azure.core import MatchConditions
+
+        offset = index * self.block_size
+        length = min(count * self.block_size, self.size - offset)
+        data = self.blob.client.download_blob(offset=offset, length=length, etag=self.etag, match_condition=MatchConditions.IfNotModified).readall()
+        self.requests += 1
+
+        for position in range(0, len(data), self.block_size):
+            self._blocks[index + position // self.block_size] = data[position:position + self.block_size]
+
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+
+        self._fetched_until = index + count
+
+
+class SyncResult:
+    """A class representing the outcome of synchronizing a directory with a container, holding the relative names of the files that were transferred or deleted."""
+
+    def __init__(self, transferred: list[str], deleted: list[str], unchanged: int) -> None:
+        self.transferred, self.deleted, self.unchanged = transferred, deleted, unchanged
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(transferred={len(self.transferred)}, deleted={len(self.deleted)}, unchanged={self.unchanged})"
+
+    def __bool__(self) -> bool:
+        return bool(self.transferred or self.deleted)
+
+
+class DirectorySync:
+    """
+    A class which synchronizes a local directory with the blobs under a prefix of a container. Changes are detected from a single listing of the container compared against the size, modification
+    time and MD5 of each file. The state of every file as of the last synchronization is persisted in a manifest, so that unchanged files do not need to be hashed again.
+    """
+
+    chunk_size = 1024 ** 2
+
+    def __init__(self, container: BlobContainer, path: PathLike, prefix: str = "") -> None:
+        self.container, self.dir, self.prefix = container, Dir.from_pathlike(path), prefix
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(container={repr(self.container.name)}, dir={repr(str(self.dir))}, prefix={repr(self.prefix)})"
+
+    @property
+    def manifest(self) -> File:
+        """The file in which the state of this directory as of its last synchronization is persisted."""
+        key = hashlib.md5(f"{self.container.client.url}|{self.prefix}|{os.path.abspath(self.dir)}".encode()).hexdigest()
+        return self.container.storage.config.folder.new_dir("manifests").new_file(key, "json")
+
+    def upload(self, delete: bool = False, max_workers: int = 4) -> SyncResult:
+        """Upload any new or changed files and return the outcome."""
+        manifest, files, blobs = self.manifest.content or {}, self._files(), self._blobs()
+        state = {name: self._state(path, previous=manifest.get(name)) for name, path in files.items()}
+        changed = [name for name in files if self._differs(state[name], blob=blobs.get(name), previous=manifest.get(name))]
+
+        def transfer(name: str) -> None:
+            self.container[self.prefix + name].upload(overwrite=True).from_file(files[name])
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(transfer, changed))
+
+        deleted = [name for name in blobs if name not in files] if delete else []
+        if deleted:
+            extra = {self.prefix + name for name in deleted}
+            self.container.delete_blobs(prefix=self.prefix or None, where=lambda blob: blob.name in extra, max_workers=max_workers)
+
+        self.manifest.content = {name: {**entry, "etag": None if name in changed else blobs[name]["etag"]} for name, entry in state.items()}
+        return SyncResult(transferred=changed, deleted=deleted, unchanged=len(files) - len(changed))
+
+    def download(self, delete: bool = False, max_workers: int = 4) -> SyncResult:
+        """Download any new or changed blobs and return the outcome."""
+        manifest, files, blobs = self.manifest.content or {}, self._files(), self._blobs()
+        state = {name: self._state(path, previous=manifest.get(name)) for name, path in files.items()}
+        changed = [name for name, blob in blobs.items() if name not in state or self._differs(state[name], blob=blob, previous=manifest.get(name))]
+
+        # every target path is resolved before anything is written, so that a blob whose name would place it outside the directory aborts the download
+        paths = {name: self._path(name) for name in changed}
+
+        def transfer(name: str) -> None:
+            path = paths[name]
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.container[self.prefix + name].download().as_file(path)
+            state[name] = self._state(path, previous=None, md5=blobs[name]["md5"])
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(transfer, changed))
+
+        deleted = [name for name in files if name not in blobs] if delete else []
+        for name in deleted:
+            os.remove(files[name])
+            state.pop(name)
+
+        self.manifest.content = {name: {**entry, "etag": blobs[name]["etag"]} if name in blobs else entry for name, entry in state.items()}
+        return SyncResult(transferred=changed, deleted=deleted, unchanged=len(blobs) - len(changed))
+
+    def _files(self) -> dict[str, str]:
+        files = {}
+        for root, _, names in os.walk(self.dir):
+            for name in names:
+                path = os.path.join(root, name)
+                files[os.path.relpath(path, self.dir).replace(os.sep, "/")] = path
+
+        return files
+
+    def _path(self, name: str) -> str:
+        root = os.path.realpath(self.dir)
+        path = os.path.realpath(os.path.join(root, *name.split("/")))
+        if path == root or os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Blob '{self.prefix + name}' would be downloaded outside of directory '{root}'.")
+
+        return path
+
+    def _blobs(self) -> dict[str, dict]:
+        return {
+            blob.name[len(self.prefix):]: {"size": blob.size, "etag": blob.etag, "md5": bytes(blob.content_settings.content_md5).hex() if blob.content_settings.content_md5 else None}
+            for blob in self.container.client.list_blobs(name_starts_with=self.prefix or None)
+        }
+
+    def _state(self, path: str, previous: Optional[dict], md5: str = None) -> dict:
+        stat = os.stat(path)
+        if md5 is None:
+            unchanged = previous is not None and previous["size"] == stat.st_size and previous["mtime"] == stat.st_mtime_ns
+            md5 = previous["md5"] if unchanged else self._md5(path)
+
+        return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "md5": md5, "etag": Maybe(previous).else_({}).get("etag")}
+
+    def _md5(self, path: str) -> str:
+        digest = hashlib.md5()
+        with open(path, "rb") as stream:
+            while chunk := stream.read(self.chunk_size):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def _differs(state: dict, blob: Optional[dict], previous: Optional[dict]) -> bool:
+        if blob is None or blob["size"] != state["size"]:
+            return True
+
+        if blob["md5"] is not None:
+            return blob["md5"] != state["md5"]
+
+        # blobs uploaded in blocks have no MD5, so they are assumed unchanged if neither the file nor the blob has changed since the last synchronization
+        return previous is None or previous["md5"] != state["md5"] or (previous.get("etag") is not None and previous["etag"] != blob["etag"])
@@ -1,18 +1,22 @@
 from __future__ import annotations
 
 import datetime as dt
-from typing import Union, Collection, TYPE_CHECKING, Optional
+from typing import Any, Callable, Iterable, Union, Collection, TYPE_CHECKING, Optional
 
 import O365.calendar as calendar
 
+from ..attribute import Attribute
 from ..query import Query, BulkAction, BulkActionContext
+from ..batch import BatchRequest
+from ..delta import Delta, DeltaResult
+from ..store import StorableMixin
 from ..fluent import FluentEntity
 
 if TYPE_CHECKING:
     from ..people import Contact
 
 
-class Event(calendar.Event):
+class Event(StorableMixin, calendar.Event):
     """A class representing a Microsoft Outlook message. Provides methods and properties for interacting with it."""
 
     def __repr__(self) -> str:
@@ -25,13 +29,41 @@ class Event(calendar.Event):
     def fluent(self) -> FluentEvent:
         return FluentEvent(parent=self)
 
+    def save(self) -> bool:
+        entity_id = self.object_id
+        return self._invalidating(super().save(), entity_id=entity_id)
+
+    def delete(self) -> bool:
+        return self._invalidating(super().delete(), entity_id=self.object_id)
+
+    def accept_event(self, *args: Any, **kwargs: Any) -> bool:
+        return self._invalidating(super().accept_event(*args, **kwargs), entity_id=self.object_id)
+
+    def decline_event(self, *args: Any, **kwargs: Any) -> bool:
+        return self._invalidating(super().decline_event(*args, **kwargs), entity_id=self.object_id)
+
+    def cancel_event(self, *args: Any, **kwargs: Any) -> bool:
+        return self._invalidating(super().cancel_event(*args, **kwargs), entity_id=self.object_id)
+
+    def _delete_request(self) -> BatchRequest:
+        return BatchRequest(method="DELETE", url=self.build_url(self._endpoints.get("event").format(id=self.object_id)), entity=self)
+
+    class Attributes:
+        class Id(Attribute):
+            name = "id"
+
+        class ChangeKey(Attribute):
+            name = "change_key"
+
 
 class BulkEventAction(BulkAction):
     """A class representing a bulk action performed on the resultset of a folder query."""
 
+    identifiers = (Event.Attributes.Id, Event.Attributes.ChangeKey)
+
     def delete(self) -> BulkActionContext:
         """Delete all events that match the query this bulk action was created from."""
-        return BulkActionContext(query=self._query, action=Event.delete)
+        return self._context(action=Event.delete, request=Event._delete_request, removes=True)
 
 
 class EventQuery(Query):
@@ -42,6 +74,47 @@ class EventQuery(Query):
         """Perform a bulk action on the resultset of this query."""
         return BulkEventAction(self)
 
+    def execute(self) -> list[Event]:
+        """Execute this query and return any events that match."""
+        return list(self._fetch())
+
+    def delta(self, start: dt.datetime = None, end: dt.datetime = None, reset: bool = False) -> DeltaResult:
+        """
+        Return the events between 'start' and 'end' that were added, changed or removed within this calendar since the last time this method was called with the same window (even by another process).
+        The first call (or any call with 'reset=True') returns every event in the window as added. Both 'start' and 'end' are required by the server.
+        """
+        delta = self._delta(start=start, end=end)
+        if reset:
+            delta.reset()
+
+        # the window returns occurrences and exceptions of recurring events under their own ids, which do not belong in the stored events collection
+        return delta.sync()
+
+    def _fetch_from_server(self, page_size: int = None) -> Iterable[Event]:
+        # O365 overrides the batch size whenever no limit is set, so pages of a specific size are requested directly
+        return self._container.get_events(limit=self._limit, query=self._query, include_recurring=False) if page_size is None else self._paginate(page_size=page_size)
+
+    def _constructor(self) -> Callable:
+        return self._container.event_constructor
+
+    def _collection_url(self) -> str:
+        if self._container.calendar_id is None:
+            return self._container.build_url(self._container._endpoints.get("default_events"))
+
+        return self._container.build_url(self._container._endpoints.get("get_events").format(id=self._container.calendar_id))
+
+    def _delta(self, start: dt.datetime = None, end: dt.datetime = None) -> Delta:
+        if start is None or end is None:
+            raise ValueError("Delta queries on events require both a start and an end datetime.")
+
+        if self._container.calendar_id is None:
+            url = self._container.build_url(f"{self._container._endpoints.get('default_events_view')}/delta")
+        else:
+            url = self._container.build_url(f"{self._container._endpoints.get('events_view').format(id=self._container.calendar_id)}/delta")
+
+        params = {self._container._cc("startDateTime"): start.isoformat(), self._container._cc("endDateTime"): end.isoformat(), **self._delta_params()}
+        return Delta(container=self._container, url=url, constructor=self._container.event_constructor, params=params)
+
 
 class FluentEvent(FluentEntity):
     """A class representing an event that doesn't yet exist. All public methods allow chaining. At the end of the method chain call FluentEvent.create() to create the event."""
@@ -49,6 +122,7 @@ class FluentEvent(FluentEntity):
     def __init__(self, parent: Event = None) -> None:
         self.entity, self.office = parent, parent.con.office
         self._temp_body: Optional[str] = None
+        self._large_attachments: list[str] = []
         self._start: Optional[dt.datetime] = None
         self._end: Optional[dt.datetime] = None
 
@@ -97,8 +171,29 @@ class FluentEvent(FluentEntity):
         return self
 
     def create(self) -> bool:
-        """Create this event as it currently is."""
+        """Create this event as it currently is. If it has large attachments, they are uploaded before its attendees are added, so that their invitations include them."""
         if self._temp_body is not None:
             self.entity.body = f"{self._temp_body}<br><br>{self.office.outlook.signature}" if self._signing else self._temp_body
 
-        return self.entity.save()
+        if not self._large_attachments:
+            return self.entity.save()
+
+        # invitations are sent as soon as an event with attendees is saved, so the attendees are only added once the large attachments have been uploaded to it
+        attendees = list(self.entity.attendees)
+        self.entity.attendees.clear()
+        if not self.entity.save():
+            self.entity.attendees.add(attendees)
+            return False
+
+        try:
+            self._upload_large_attachments()
+            self.entity.attendees.add(attendees)
+            if self.entity.save():
+                return True
+        except Exception:
+            # the event would otherwise be left behind in the calendar without its attachments (and, having no attendees yet, deleting it sends no cancellations)
+            self.entity.delete()
+            raise
+
+        self.entity.delete()
+        return False
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import re
+import threading
+from typing import Any, Hashable, Union
+
+import O365.utils.utils as utils
+
+from .attribute import BooleanExpression, BooleanExpressionClause, BooleanExpressionChain, is_in
+
+
+class LRUCache:
+    """A thread-safe mapping holding at most 'maxsize' entries, which discards the least recently used entry whenever it is full."""
+
+    def __init__(self, maxsize: int = 512) -> None:
+        self.maxsize = maxsize
+        self.hits, self.misses = 0, 0
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(size={len(self)}, maxsize={self.maxsize}, hits={self.hits}, misses={self.misses})"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value for the given key (marking it as the most recently used), or the default if there is none."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def clear(self) -> None:
+        """Discard every entry of this cache."""
+        with self._lock:
+            self._entries.clear()
+            self.hits, self.misses = 0, 0
+
+
+class Placeholder:
+    """A stand-in for a value of a boolean expression, which is compiled into a token that can later be substituted with the real value."""
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(index={self.index})"
+
+    def __str__(self) -> str:
+        return f"\x00{self.index}\x00"
+
+
+class FilterTemplate:
+    """
+    A class representing a compiled OData filter string whose values have been left as placeholders, so that it can be reused (like a prepared statement) by any filter clause of the same shape.
+    Two clauses have the same shape if they only differ in the values their attributes are compared against.
+    """
+
+    pattern = re.compile("\x00(\\d+)\x00")
+
+    def __init__(self, text: str, attributes: list[str]) -> None:
+        self.text, self.attributes = text, attributes
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(text={repr(self.pattern.sub(lambda match: '?', self.text))})"
+
+    def render(self, query: utils.Query, values: list) -> str:
+        """Return the filter string of this template with its placeholders substituted by the given values, formatted by the given O365 query."""
+        current, words = query._attribute, []
+        for attribute, value in zip(self.attributes, values):
+            query._attribute = attribute
+            words.append(str(query._parse_filter_word(value)))
+
+        query._attribute = current
+        return self.pattern.sub(lambda match: words[int(match.group(1))], self.text)
+
+    @classmethod
+    def from_query(cls, query: utils.Query) -> FilterTemplate:
+        """Create a template from an O365 query whose filters were built from a clause whose values were all replaced by placeholders."""
+        attributes: dict[int, str] = {}
+        for entry in query._filters:
+            if not isinstance(entry, utils.ChainOperator):
+                attributes.update({int(index): entry[0] for index in cls.pattern.findall(entry[1])})
+
+        return cls(text=query.get_filters(), attributes=[attributes[index] for index in range(len(attributes))])
+
+    @classmethod
+    def inspect(cls, element: Union[BooleanExpression, BooleanExpressionClause, BooleanExpressionChain], values: list) -> Hashable:
+        """Return the shape of the given clause, appending its values to the given list in the order their placeholders are numbered."""
+        if isinstance(element, BooleanExpression):
+            if element.func is is_in:
+                values.extend(element.arg)
+                return element.attr, element.func, element.negated, len(element.arg)
+
+            values.append(element.arg)
+            return element.attr, element.func, element.negated
+
+        operands = [element.left, element.right] if isinstance(element, BooleanExpressionClause) else element.elements
+        return type(element), element.operator, element.negated, tuple(cls.inspect(operand._resolve(), values) for operand in operands)
+
+    @classmethod
+    def parameterize(cls, element: Union[BooleanExpression, BooleanExpressionClause, BooleanExpressionChain], counter: list[int] = None) -> Union[BooleanExpression, BooleanExpressionClause, BooleanExpressionChain]:
+        """Return a copy of the given clause with each of its values replaced by a numbered placeholder."""
+        counter = [0] if counter is None else counter
+
+        if isinstance(element, BooleanExpression):
+            count = len(element.arg) if element.func is is_in else 1
+            placeholders = tuple(Placeholder(index) for index in range(counter[0], counter[0] + count))
+            counter[0] += count
+
+            expression = BooleanExpression(element.attr, element.func, placeholders if element.func is is_in else placeholders[0])
+            expression.negated = element.negated
+            return expression
+
+        if isinstance(element, BooleanExpressionClause):
+            clause = BooleanExpressionClause(left=cls.parameterize(element.left._resolve(), counter), operator=element.operator, right=cls.parameterize(element.right._resolve(), counter))
+            clause.negated = element.negated
+            return clause
+
+        return BooleanExpressionChain(operator=element.operator, elements=[cls.parameterize(operand, counter) for operand in element.elements], negated=element.negated)
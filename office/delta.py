@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+from typing import Any, Callable, Optional
+
+from requests.exceptions import HTTPError
+
+from pathmagic import File
+
+from .config import OfficeConfig
+
+
+class DeltaResult:
+    """
+    A class representing the changes made to a collection since it was last synchronized. Removed items are represented by their ids, since they no longer exist.
+    If the synchronization was 'complete' (the collection's first, or one after a reset), every item of the collection is among those added.
+    """
+
+    def __init__(self, added: list, changed: list, removed: list[str], complete: bool = False) -> None:
+        self.added, self.changed, self.removed, self.complete = added, changed, removed, complete
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(added={len(self.added)}, changed={len(self.changed)}, removed={len(self.removed)})"
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+
+class Delta:
+    """
+    A class for incrementally synchronizing a collection using Graph delta queries. The first synchronization returns every item in the collection as added, while subsequent ones only return what
+    was added, changed or removed since. The delta link is persisted (per account) under the library's config folder once a synchronization completes, so that it survives process restarts.
+    Should the server no longer recognize a persisted delta link, the collection is synchronized in full again.
+    """
+
+    expired_codes = {"syncStateNotFound", "syncStateInvalid", "resyncRequired"}
+
+    def __init__(self, container: Any, url: str, constructor: Callable, params: dict = None) -> None:
+        self.container, self.url, self.constructor, self.params = container, url, constructor, params
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(url={repr(self.url)}, synced_at={self.synced_at})"
+
+    @property
+    def file(self) -> File:
+        """The file in which the delta link of this collection is persisted."""
+        key = hashlib.md5(f"{self.account}:{self.url}?{sorted((self.params or {}).items())}".encode()).hexdigest()
+        return OfficeConfig().folder.new_dir("delta").new_file(key, "json")
+
+    @property
+    def account(self) -> str:
+        """The account this collection belongs to, which keeps the delta links of different accounts apart even where their urls (such as '/me/...') are identical."""
+        return getattr(getattr(self.container.con, "office", None), "resource", None) or self.container.main_resource
+
+    @property
+    def synced_at(self) -> Optional[dt.datetime]:
+        """The time at which this collection was last synchronized, if ever."""
+        state = self.file.content or {}
+        return dt.datetime.fromisoformat(state["synced_at"]) if state.get("synced_at") else None
+
+    def sync(self) -> DeltaResult:
+        """Return the changes made to this collection since it was last synchronized, and persist the new delta link."""
+        try:
+            return self._sync()
+        except HTTPError as ex:
+            if not self._is_expired(ex):
+                raise
+
+            self.reset()
+            return self._sync()
+
+    def reset(self) -> None:
+        """Forget the persisted delta link, so that the next synchronization returns every item in the collection again."""
+        self.file.content = {}
+
+    def _sync(self) -> DeltaResult:
+        state, started = self.file.content or {}, dt.datetime.now(dt.timezone.utc)
+        synced_at = dt.datetime.fromisoformat(state["synced_at"]) if state.get("delta_link") else None
+        url, params = (state["delta_link"], None) if state.get("delta_link") else (self.url, self.params)
+
+        added, changed, removed, delta_link = [], [], [], None
+        while url:
+            response = self.container.con.get(url, params=params)
+            data = response.json() if response else {}
+
+            for item in data.get("value", []):
+                if "@removed" in item:
+                    removed.append(item.get("id"))
+                else:
+                    entity = self.constructor(parent=self.container, **{self.container._cloud_data_key: item})
+                    (added if synced_at is None or (entity.created is not None and entity.created > synced_at) else changed).append(entity)
+
+            url, params, delta_link = data.get("@odata.nextLink"), None, data.get("@odata.deltaLink", delta_link)
+
+        if delta_link is not None:
+            self.file.content = {"delta_link": delta_link, "synced_at": started.isoformat()}
+
+        return DeltaResult(added=added, changed=changed, removed=removed, complete=synced_at is None)
+
+    def _is_expired(self, error: HTTPError) -> bool:
+        if error.response is None or not (self.file.content or {}).get("delta_link"):
+            return False
+
+        try:
+            code = error.response.json().get("error", {}).get("code")
+        except ValueError:
+            code = None
+
+        return error.response.status_code == 410 or code in self.expired_codes
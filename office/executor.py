@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from requests.exceptions import HTTPError, RequestException, RetryError
+
+
+class Throttle:
+    """A gate shared by every worker issuing requests against the same mailbox. Once any request is throttled, all workers wait out the 'Retry-After' period before sending another."""
+
+    throttling_statuses = {429, 503}
+    throttling_codes = {"ServerBusy"}
+
+    def __init__(self, backoff: float = 2.0, max_backoff: float = 120.0) -> None:
+        self.backoff, self.max_backoff = backoff, max_backoff
+        self.retries, self.waited = 0, 0.0
+        self._resume_at, self._lock = 0.0, threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(retries={self.retries}, waited={round(self.waited, 2)})"
+
+    @property
+    def remaining(self) -> float:
+        """The number of seconds left until the current back-off period (if any) has elapsed."""
+        return max(self._resume_at - time.monotonic(), 0.0)
+
+    def wait(self) -> None:
+        """Block until the current back-off period (if any) has elapsed."""
+        delay = self.remaining
+        if delay > 0:
+            time.sleep(delay)
+            with self._lock:
+                self.waited += delay
+
+    def back_off(self, headers: Optional[dict] = None, attempt: int = 0) -> None:
+        """Pause all workers for the duration given by the 'Retry-After' header, or for an exponentially increasing duration if none was given."""
+        with self._lock:
+            self.retries += 1
+            self._resume_at = max(self._resume_at, time.monotonic() + self.delay_for(headers=headers, attempt=attempt))
+
+    def delay_for(self, headers: Optional[dict] = None, attempt: int = 0) -> float:
+        """Return the number of seconds to wait before retrying, given the headers of a throttled response and the number of previous attempts."""
+        retry_after = {str(key).lower(): value for key, value in (headers or {}).items()}.get("retry-after")
+        try:
+            return min(float(retry_after), self.max_backoff)
+        except (TypeError, ValueError):
+            return min(self.backoff ** attempt, self.max_backoff)
+
+
+class RateLimiter:
+    """A thread-safe token bucket which lets at most 'rate' units through per 'period' seconds (in bursts of up to 'rate' units), blocking callers until enough units are available."""
+
+    def __init__(self, rate: float, period: float = 60.0) -> None:
+        self.rate, self.period = rate, period
+        self._tokens, self._updated_at, self._lock = float(rate), time.monotonic(), threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(rate={self.rate}, period={self.period})"
+
+    def acquire(self, units: float = 1) -> None:
+        """Block until the given number of units (capped at 'rate') may pass, and consume them."""
+        units = min(units, self.rate)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated_at) * self.rate / self.period)
+                self._updated_at = now
+
+                if self._tokens >= units:
+                    self._tokens -= units
+                    return
+
+                delay = (units - self._tokens) * self.period / self.rate
+
+            time.sleep(delay)
+
+
+class ExecutionStatistics:
+    """A class recording the outcome of a bulk action run by a BulkExecutor, such as its throughput and how often it was throttled."""
+
+    def __init__(self, throttle: Throttle) -> None:
+        self.throttle = throttle
+        self.succeeded, self.failed = 0, 0
+        self._retries, self._waited = throttle.retries, throttle.waited
+        self.errors: list[Exception] = []
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(succeeded={self.succeeded}, failed={self.failed}, retries={self.retries}, throttled_seconds={round(self.throttled_seconds, 2)}, elapsed={round(self.elapsed, 2)}, throughput={round(self.throughput, 2)})"
+
+    @property
+    def processed(self) -> int:
+        """The number of items the action was performed on, whether it succeeded or not."""
+        return self.succeeded + self.failed
+
+    @property
+    def retries(self) -> int:
+        """The number of times requests were retried after being throttled."""
+        return self.throttle.retries - self._retries
+
+    @property
+    def throttled_seconds(self) -> float:
+        """The total number of seconds workers spent waiting for throttling back-offs to elapse."""
+        return self.throttle.waited - self._waited
+
+    @property
+    def elapsed(self) -> float:
+        """The number of seconds the action has been (or was) running for."""
+        if self.started is None:
+            return 0.0
+
+        return (self.finished if self.finished is not None else time.monotonic()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """The number of items processed per second."""
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    def record(self, result: Any) -> None:
+        """Record the result of a single call. Lists of results (such as the responses of a JSON batch) are recorded item by item, using their truthiness to indicate success."""
+        outcomes = result if isinstance(result, list) else [result]
+        succeeded = sum(1 for outcome in outcomes if outcome is None or outcome)
+        with self._lock:
+            self.succeeded += succeeded
+            self.failed += len(outcomes) - succeeded
+
+    def record_error(self, error: Exception) -> None:
+        """Record a call that raised an exception."""
+        with self._lock:
+            self.failed += 1
+            self.errors.append(error)
+
+
+class BulkExecutor:
+    """
+    A class that runs a callable over a collection of items using a pool of 'max_workers' threads, with at most 'max_in_flight' items submitted but not yet finished at any time.
+    Calls that fail because the server throttled them (HTTP 429/503, or an azure-core error with a 'ServerBusy' code) cause every worker to back off for the 'Retry-After' period, after which they are retried up to 'max_retries' times.
+    If a 'progress' callable is provided, it is called with the statistics of the run every time a call finishes. Calls failing with transport errors (those of requests and azure-core) are
+    recorded in the statistics, while any other exception (such as a programming error) stops further items from being submitted and is re-raised once the calls in flight have finished.
+    """
+
+    def __init__(self, max_workers: int = 4, max_in_flight: int = None, max_retries: int = 5, progress: Callable[[ExecutionStatistics], Any] = None) -> None:
+        self.max_workers, self.max_in_flight, self.max_retries, self.progress = max_workers, max_in_flight or max_workers * 2, max_retries, progress
+        self.throttle = Throttle()
+        self.statistics = ExecutionStatistics(throttle=self.throttle)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(max_workers={self.max_workers}, max_in_flight={self.max_in_flight}, max_retries={self.max_retries})"
+
+    def map(self, func: Callable, items: Iterable) -> ExecutionStatistics:
+        """Call the given function on every item and return the statistics of the run once all calls have finished. Every call to this method starts a fresh set of statistics."""
+        self.statistics = ExecutionStatistics(throttle=self.throttle)
+        self.statistics.started, in_flight, raised = time.monotonic(), threading.BoundedSemaphore(self.max_in_flight), []
+
+        def finished(future: Future) -> None:
+            if future.exception() is not None:
+                raised.append(future.exception())
+
+            in_flight.release()
+
+            if self.progress is not None:
+                self.progress(self.statistics)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for item in items:
+                in_flight.acquire()
+                submitted = False
+                try:
+                    if raised:
+                        break
+
+                    pool.submit(self._call, func, item).add_done_callback(finished)
+                    submitted = True
+                finally:
+                    # the slot is only kept by a submitted call (which releases it once finished), so stopping early or failing to submit never leaves it taken
+                    if not submitted:
+                        in_flight.release()
+
+        self.statistics.finished = time.monotonic()
+        if raised:
+            raise raised[0]
+
+        return self.statistics
+
+    def _call(self, func: Callable, item: Any) -> None:
+        for attempt in range(self.max_retries + 1):
+            self.throttle.wait()
+            try:
+                result = func(item)
+            except Exception as ex:
+                if attempt < self.max_retries and self._is_throttled(ex):
+                    self.throttle.back_off(headers=getattr(getattr(ex, "response", None), "headers", None), attempt=attempt)
+                    continue
+
+                self.statistics.record_error(ex)
+                if not self._is_transport_error(ex):
+                    raise
+
+                return
+            else:
+                self.statistics.record(result)
+                return
+
+    def _is_throttled(self, error: Exception) -> bool:
+        if isinstance(error, RetryError):
+            return True
+
+        if isinstance(error, HTTPError):
+            return getattr(error.response, "status_code", None) in self.throttle.throttling_statuses
+
+        # the HttpResponseError of azure-core carries the status and the storage error code (such as 'ServerBusy') on the exception itself
+        return self._is_transport_error(error) and (getattr(error, "status_code", None) in self.throttle.throttling_statuses or getattr(error, "error_code", None) in self.throttle.throttling_codes)
+
+    @staticmethod
+    def _is_transport_error(error: Exception) -> bool:
+        # azure-core is an optional dependency, so its errors are recognized by module rather than imported
+        return isinstance(error, RequestException) or any(cls.__module__.startswith("azure.core") for cls in type(error).__mro__)
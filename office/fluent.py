@@ -1,13 +1,18 @@
 from __future__ import annotations
 
-from typing import Union, List, Collection, TYPE_CHECKING
+from typing import Union, List, Collection, Optional, TYPE_CHECKING
 from collections.abc import Iterable
 import os
+import time
 
+import requests
 from O365.utils import ImportanceLevel
+from requests.exceptions import ConnectionError, HTTPError, RetryError, Timeout
 
 from pathmagic import PathLike
 
+from .executor import Throttle
+
 if TYPE_CHECKING:
     from .outlook.message import Message
     from .people.contact import Contact
@@ -15,10 +20,18 @@ if TYPE_CHECKING:
 
 
 class FluentEntity:
-    """A class representing an entity that doesn't yet exist. All public methods allow chaining."""
+    """
+    A class representing an entity that doesn't yet exist. All public methods allow chaining. Attachments larger than 'upload_threshold' bytes are not inlined into the entity, but uploaded
+    from disk in chunks of 'chunk_size' bytes (a multiple of 320 KiB, as required by Graph) through an upload session once the entity exists, so memory use does not grow with their size.
+    """
+    upload_threshold = 3 * 1024 ** 2
+    chunk_size = 10 * 320 * 1024
+    max_retries = 5
+
     entity: Union[Message, Event] = None
     _signing: bool
     _temp_body: str
+    _large_attachments: list[str]
 
     def subject(self, subject: str) -> FluentEntity:
         """Set the subject of the message."""
@@ -32,7 +45,12 @@ class FluentEntity:
 
     def attach(self, attachments: Union[PathLike, Collection[PathLike]]) -> FluentEntity:
         """Attach a file or a collection of files to this message."""
-        self.entity.attachments.add([os.fspath(attachment) for attachment in attachments] if isinstance(attachments, Iterable) else os.fspath(attachments))
+        for path in [os.fspath(attachment) for attachment in attachments] if isinstance(attachments, Iterable) and not isinstance(attachments, str) else [os.fspath(attachments)]:
+            if os.path.getsize(path) > self.upload_threshold:
+                self._large_attachments.append(path)
+            else:
+                self.entity.attachments.add(path)
+
         return self
 
     def sign(self, signing: bool = True) -> FluentEntity:
@@ -48,6 +66,60 @@ class FluentEntity:
         self.entity.categories = categories
         return self
 
+    def _upload_large_attachments(self) -> None:
+        for path in self._large_attachments:
+            self._upload_attachment(path)
+
+        self._large_attachments = []
+
+    def _upload_attachment(self, path: str) -> None:
+        attachments, size = self.entity.attachments, os.path.getsize(path)
+        url = attachments.build_url(attachments._endpoints.get("create_upload_session").format(id=self.entity.object_id))
+        item = {attachments._cc("attachmentType"): "file", attachments._cc("name"): os.path.basename(path), attachments._cc("size"): size}
+        upload_url = self.entity.con.post(url, data={attachments._cc("attachmentItem"): item}).json()[attachments._cc("uploadUrl")]
+
+        # the upload url is pre-authenticated, so the chunks are sent through a plain session which does not carry the authorization header of the connection
+        with self.entity.con.get_naive_session() as session, open(path, "rb") as stream:
+            offset, attempt, throttle = 0, 0, Throttle()
+            while offset < size:
+                try:
+                    if attempt:
+                        # the server may have stored part of the failed chunk (or all of it, having failed to respond), so the upload resumes from the first byte it still expects
+                        offset = self._next_expected_offset(session, upload_url)
+                        if offset is None:
+                            break
+
+                    stream.seek(offset)
+                    chunk = stream.read(self.chunk_size)
+                    self._upload_chunk(session, upload_url, chunk=chunk, offset=offset, size=size)
+                except (ConnectionError, Timeout, HTTPError, RetryError) as ex:
+                    if attempt == self.max_retries or not self._is_retryable(ex):
+                        raise
+
+                    time.sleep(throttle.delay_for(headers=getattr(getattr(ex, "response", None), "headers", None), attempt=attempt))
+                    attempt += 1
+                else:
+                    offset, attempt = offset + len(chunk), 0
+
+    def _upload_chunk(self, session: requests.Session, url: str, chunk: bytes, offset: int, size: int) -> None:
+        headers = {"Content-Type": "application/octet-stream", "Content-Length": str(len(chunk)), "Content-Range": f"bytes {offset}-{offset + len(chunk) - 1}/{size}"}
+        session.put(url, data=chunk, headers=headers, timeout=self.entity.con.timeout).raise_for_status()
+
+    def _next_expected_offset(self, session: requests.Session, url: str) -> Optional[int]:
+        response = session.get(url, timeout=self.entity.con.timeout)
+        response.raise_for_status()
+        ranges = response.json().get("nextExpectedRanges") or []
+        return int(ranges[0].split("-")[0]) if ranges else None
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        # client errors (such as an expired session or an invalid range) fail the same way however often they are retried
+        if isinstance(error, HTTPError):
+            status = getattr(error.response, "status_code", None)
+            return status is not None and (status == 429 or status >= 500)
+
+        return True
+
     def _parse_contacts_to_emails(self, contacts: Union[Union[str, Contact], Collection[Union[str, Contact]]]) -> list[str]:
         from .people import Contact
 
@@ -17,6 +17,8 @@ if True:
     from .calendar import CalendarService
     from .outlook import OutlookService
     from .people import PeopleService
+    from .store import EntityStore
+    from .outbox import Outbox
     from .token import MemoryTokenBackend, BaseTokenBackend
 
 
@@ -37,6 +39,9 @@ class Office:
     people: Optional[PeopleService] = None
     calendar: Optional[CalendarService] = None
 
+    store: Optional[EntityStore] = None
+    outbox: Optional[Outbox] = None
+
     connection: Optional[str] = None
 
     def __init__(self, client_id: str, client_secret: str, token_backend: BaseTokenBackend, resource: str) -> None:
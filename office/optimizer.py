@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from typing import Any, Hashable, Union
+
+import O365.utils.utils as utils
+
+from .attribute import BaseAttributeMeta, BooleanExpression, BooleanExpressionClause, BooleanExpressionChain, is_in
+
+Element = Union[BooleanExpression, BooleanExpressionClause, BooleanExpressionChain]
+
+
+class ExpressionOptimizer:
+    """
+    A class which rewrites the expression tree of a filter clause into an equivalent but smaller one before it is compiled. Nested clauses joined by the same operator are flattened into a single chain,
+    negations are pushed down onto the expressions (so that double negations cancel out), duplicate expressions are removed, and equality checks against the same attribute that are joined by 'or'
+    are merged into a single 'in' check. Flattening is iterative, so arbitrarily long chains of clauses do not hit the recursion limit.
+    """
+
+    opposites = {
+        utils.ChainOperator.AND: utils.ChainOperator.OR,
+        utils.ChainOperator.OR: utils.ChainOperator.AND,
+    }
+
+    def optimize(self, element: Any) -> Union[BooleanExpression, BooleanExpressionChain]:
+        """Return an optimized copy of the given expression element. The element itself is left unchanged."""
+        return self._optimize(element, negate=False)
+
+    def _optimize(self, element: Any, negate: bool) -> Union[BooleanExpression, BooleanExpressionChain]:
+        if isinstance(element, BaseAttributeMeta):
+            element = element._resolve()
+
+        if isinstance(element, BooleanExpression):
+            expression = BooleanExpression(element.attr, element.func, element.arg)
+            expression.negated = element.negated
+            return expression.negate() if negate else expression
+
+        if isinstance(element, (BooleanExpressionClause, BooleanExpressionChain)):
+            negate = negate != element.negated
+            operator = self.opposites[element.operator] if negate else element.operator
+
+            elements = [self._optimize(operand, negate=negate) for operand in self._flatten(element)]
+            elements = self._deduplicate(elements)
+            if operator == utils.ChainOperator.OR:
+                elements = self._merge_equality_checks(elements)
+
+            return elements[0] if len(elements) == 1 else BooleanExpressionChain(operator=operator, elements=elements)
+
+        raise TypeError(f"Cannot optimize an object of type '{type(element).__name__}'.")
+
+    def _flatten(self, element: Element) -> list:
+        operands, stack = [], [element]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, BaseAttributeMeta):
+                current = current._resolve()
+
+            if current is element or (isinstance(current, (BooleanExpressionClause, BooleanExpressionChain)) and current.operator == element.operator and not current.negated):
+                stack.extend(reversed([current.left, current.right] if isinstance(current, BooleanExpressionClause) else current.elements))
+            else:
+                operands.append(current)
+
+        return operands
+
+    def _deduplicate(self, elements: list) -> list:
+        return list({self._signature(element): element for element in elements}.values())
+
+    def _merge_equality_checks(self, elements: list) -> list:
+        values: dict[str, list] = {}
+        for element in elements:
+            if isinstance(element, BooleanExpression) and not element.negated and element.func in (utils.Query.equals, is_in):
+                values.setdefault(element.attr, []).extend(element.arg if element.func is is_in else [element.arg])
+
+        merged, done = [], set()
+        for element in elements:
+            if isinstance(element, BooleanExpression) and len(values.get(element.attr, ())) > 1 and not element.negated and element.func in (utils.Query.equals, is_in):
+                if element.attr not in done:
+                    merged.append(BooleanExpression(element.attr, is_in, tuple(dict.fromkeys(values[element.attr]))))
+                    done.add(element.attr)
+            else:
+                merged.append(element)
+
+        return merged
+
+    def _signature(self, element: Element) -> Hashable:
+        if isinstance(element, BooleanExpression):
+            return element.attr, element.func, repr(element.arg), element.negated
+
+        return element.operator, element.negated, tuple(self._signature(operand) for operand in element.elements)
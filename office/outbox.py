@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Optional, TYPE_CHECKING
+
+from pathmagic import File, PathLike
+
+from .config import OfficeConfig
+from .batch import Batch, BatchRequest, BatchResponse
+from .executor import RateLimiter, Throttle
+
+if TYPE_CHECKING:
+    from requests import Response
+    from .office import Office
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxEntry:
+    """A class representing a single message held in an Outbox, along with its delivery state and (while it is being sent) the claim of the sender it belongs to."""
+
+    def __init__(self, id: int, url: str, payload: dict, status: str, attempts: int, error: Optional[str], created_at: float, claim: Optional[str] = None) -> None:
+        self.id, self.url, self.payload, self.status, self.attempts, self.error, self.claim = id, url, payload, status, attempts, error, claim
+        self.created_at = dt.datetime.fromtimestamp(created_at, tz=dt.timezone.utc)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={self.id}, status={repr(self.status)}, attempts={self.attempts}{'' if self.error is None else f', error={repr(self.error)}'})"
+
+
+class Outbox:
+    """
+    A SQLite-backed queue of fully rendered messages waiting to be sent, which survives the process exiting (or dying) before they were delivered. Attach it to an Office instance as 'Office.outbox'
+    and queue messages with FluentMessage.enqueue(), then drain it with an OutboxSender, either in a background thread of the same process (see Outbox.start()) or in a separate one.
+    Messages are claimed before being sent, and a claim that is not resolved within 'claim_timeout' is assumed to belong to a sender that died (counting as a failed attempt), so delivery is at-least-once.
+    Only the holder of the current claim of a message can resolve it, so a sender whose claim timed out cannot overwrite the outcome of the sender that took the message over.
+    Failed sends are retried with exponential back-off starting at 'retry_delay', until a message has been attempted 'max_attempts' times, at which point it is marked as failed.
+    """
+
+    statuses = ("pending", "sending", "failed")
+
+    def __init__(self, path: PathLike = None, max_attempts: int = 5, retry_delay: dt.timedelta = dt.timedelta(seconds=30), claim_timeout: dt.timedelta = dt.timedelta(minutes=5)) -> None:
+        self.file = OfficeConfig().folder.new_file("outbox", "db") if path is None else File.from_pathlike(path)
+        self.max_attempts, self.retry_delay, self.claim_timeout = max_attempts, retry_delay, claim_timeout
+        self.connection = sqlite3.connect(str(self.file), check_same_thread=False, timeout=30)
+        self._lock, self._queued = threading.RLock(), threading.Event()
+
+        with self._lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection.execute("PRAGMA synchronous = NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', "
+                "attempts INTEGER NOT NULL DEFAULT 0, available_at REAL NOT NULL, claim TEXT, claimed_at REAL, error TEXT, created_at REAL NOT NULL)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS messages_status ON messages (status, available_at)")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(file={repr(str(self.file))}, {', '.join(f'{status}={count}' for status, count in self.counts().items())})"
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM messages WHERE status != 'failed'").fetchone()[0]
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of messages in this outbox with each status."""
+        with self._lock:
+            counts = dict(self.connection.execute("SELECT status, COUNT(*) FROM messages GROUP BY status").fetchall())
+
+        return {status: counts.get(status, 0) for status in self.statuses}
+
+    def put(self, url: str, payload: dict) -> int:
+        """Persist a message to be posted to the given url with the given payload, and return its id in this outbox."""
+        now = time.time()
+        with self._lock, self.connection:
+            entry_id = self.connection.execute("INSERT INTO messages (url, payload, available_at, created_at) VALUES (?, ?, ?, ?)", (url, json.dumps(payload), now, now)).lastrowid
+
+        self._queued.set()
+        return entry_id
+
+    def claim(self, limit: int) -> list[OutboxEntry]:
+        """
+        Claim up to 'limit' messages which are due to be sent (including any whose previous claim has timed out), so that no other sender picks them up.
+        A timed out claim counts as a failed attempt, so a message which keeps crashing (or hanging) its senders is eventually marked as failed rather than being claimed forever.
+        """
+        now, claim = time.time(), uuid.uuid4().hex
+        stale, error = now - self.claim_timeout.total_seconds(), f"Claim timed out after {self.claim_timeout.total_seconds()} seconds."
+        with self._lock, self.connection:
+            self.connection.execute(
+                "UPDATE messages SET status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END, attempts = attempts + 1, available_at = ?, claim = NULL, claimed_at = NULL, "
+                "error = ? WHERE status = 'sending' AND claimed_at <= ?", (self.max_attempts, now, error, stale)
+            )
+            self.connection.execute(
+                "UPDATE messages SET status = 'sending', claim = ?, claimed_at = ? WHERE id IN (SELECT id FROM messages WHERE status = 'pending' AND available_at <= ? ORDER BY id LIMIT ?)",
+                (claim, now, now, limit)
+            )
+            rows = self.connection.execute("SELECT id, url, payload, status, attempts, error, created_at, claim FROM messages WHERE claim = ? ORDER BY id", (claim,)).fetchall()
+
+        return [self._entry(row) for row in rows]
+
+    def complete(self, entries: list[OutboxEntry]) -> None:
+        """Remove the given claimed messages from this outbox, as they have been delivered. Messages whose claim has since passed to another sender are left to that sender."""
+        with self._lock, self.connection:
+            self.connection.executemany("DELETE FROM messages WHERE id = ? AND claim = ?", [(entry.id, entry.claim) for entry in entries])
+
+    def fail(self, entry: OutboxEntry, error: str, permanent: bool = False) -> None:
+        """
+        Record a failed attempt to send the given claimed message, scheduling it to be retried unless the failure is permanent or it has run out of attempts.
+        Does nothing if the claim on the message has since passed to another sender (which may already have delivered it).
+        """
+        with self._lock, self.connection:
+            row = self.connection.execute("SELECT attempts FROM messages WHERE id = ? AND claim = ?", (entry.id, entry.claim)).fetchone()
+            if row is None:
+                return
+
+            attempts = row[0] + 1
+            status = "failed" if permanent or attempts >= self.max_attempts else "pending"
+            available_at = time.time() + self.retry_delay.total_seconds() * 2 ** (attempts - 1)
+            self.connection.execute("UPDATE messages SET status = ?, attempts = ?, available_at = ?, claim = NULL, claimed_at = NULL, error = ? WHERE id = ? AND claim = ?",
+                                    (status, attempts, available_at, error, entry.id, entry.claim))
+
+    def release(self, entries: list[OutboxEntry]) -> None:
+        """Return the given claimed messages to the queue without counting it as an attempt, such as when their sender is shutting down."""
+        with self._lock, self.connection:
+            self.connection.executemany("UPDATE messages SET status = 'pending', claim = NULL, claimed_at = NULL WHERE id = ? AND claim = ?", [(entry.id, entry.claim) for entry in entries])
+
+    def failed(self) -> list[OutboxEntry]:
+        """Return the messages which could not be delivered."""
+        with self._lock:
+            rows = self.connection.execute("SELECT id, url, payload, status, attempts, error, created_at, claim FROM messages WHERE status = 'failed' ORDER BY id").fetchall()
+
+        return [self._entry(row) for row in rows]
+
+    def retry_failed(self, ids: list[int] = None) -> None:
+        """Queue the failed messages with the given ids (or all of them) to be sent again, with a fresh set of attempts."""
+        with self._lock, self.connection:
+            if ids is None:
+                self.connection.execute("UPDATE messages SET status = 'pending', attempts = 0, available_at = ? WHERE status = 'failed'", (time.time(),))
+            else:
+                self.connection.executemany("UPDATE messages SET status = 'pending', attempts = 0, available_at = ? WHERE id = ? AND status = 'failed'", [(time.time(), entry_id) for entry_id in ids])
+
+        self._queued.set()
+
+    def discard_failed(self, ids: list[int] = None) -> None:
+        """Remove the failed messages with the given ids (or all of them) from this outbox."""
+        with self._lock, self.connection:
+            if ids is None:
+                self.connection.execute("DELETE FROM messages WHERE status = 'failed'")
+            else:
+                self.connection.executemany("DELETE FROM messages WHERE id = ? AND status = 'failed'", [(entry_id,) for entry_id in ids])
+
+    def next_due(self) -> Optional[float]:
+        """Return the number of seconds until the next pending message is due to be sent (zero if one is due already), or None if there are none."""
+        with self._lock:
+            available_at = self.connection.execute("SELECT MIN(available_at) FROM messages WHERE status = 'pending'").fetchone()[0]
+
+        return None if available_at is None else max(0.0, available_at - time.time())
+
+    def start(self, office: Office, **kwargs: Any) -> OutboxSender:
+        """Start sending the messages of this outbox from a background thread using the given Office instance. Keyword arguments are passed on to OutboxSender."""
+        return OutboxSender(outbox=self, office=office, **kwargs).start()
+
+    def _wait(self, timeout: float) -> None:
+        self._queued.wait(timeout)
+        self._queued.clear()
+
+    @staticmethod
+    def _entry(row: tuple) -> OutboxEntry:
+        entry_id, url, payload, status, attempts, error, created_at, claim = row
+        return OutboxEntry(id=entry_id, url=url, payload=json.loads(payload), status=status, attempts=attempts, error=error, created_at=created_at, claim=claim)
+
+
+class OutboxSender:
+    """
+    A class which drains an Outbox by sending its messages as Graph JSON batches of up to 'Batch.max_size' messages each, or directly if a message is too large to fit into a batch.
+    Throttled messages are retried by the batch itself, other server errors and connection failures are retried by the outbox with back-off, and messages rejected outright are marked as failed.
+    If 'messages_per_minute' is given, the rate at which messages are sent is additionally capped to stay clear of the sending limits of the mailbox.
+    """
+
+    max_batch_bytes = 3 * 1024 * 1024
+
+    def __init__(self, outbox: Outbox, office: Office, poll_interval: float = 5.0, messages_per_minute: float = None, throttle: Throttle = None) -> None:
+        self.outbox, self.office, self.poll_interval = outbox, office, poll_interval
+        self.limiter = None if messages_per_minute is None else RateLimiter(rate=messages_per_minute, period=60.0)
+        self.batch = Batch(con=office.account.con, protocol=office.account.protocol, throttle=throttle)
+        self.sent, self.failed = 0, 0
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(outbox={repr(self.outbox)}, running={self.running}, sent={self.sent}, failed={self.failed})"
+
+    @property
+    def running(self) -> bool:
+        """Whether this sender's background thread is currently running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> OutboxSender:
+        """Start draining the outbox from a daemon thread, which waits for new messages once it is empty."""
+        if not self.running:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name=f"{type(self).__name__}-{self.outbox.file.stem}", daemon=True)
+            self._thread.start()
+
+        return self
+
+    def stop(self, timeout: float = None) -> None:
+        """Stop the background thread once it has finished sending its current batch. Any messages still in the outbox remain there for the next sender."""
+        self._stopping.set()
+        self.outbox._queued.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def drain(self) -> int:
+        """Send every message of the outbox that is currently due in the calling thread, and return how many of them were delivered."""
+        sent = self.sent
+        while not self._stopping.is_set() and self.send_once():
+            pass
+
+        return self.sent - sent
+
+    def send_once(self) -> int:
+        """Claim and send a single batch of due messages, and return how many were claimed."""
+        entries = self.outbox.claim(limit=Batch.max_size)
+
+        for group in self._groups(entries):
+            if self._stopping.is_set():
+                self.outbox.release(group)
+                continue
+
+            if self.limiter is not None:
+                self.limiter.acquire(len(group))
+
+            try:
+                outcomes = self._send(group)
+            except Exception as ex:
+                outcomes = [(entry, False, f"{type(ex).__name__}: {ex}") for entry in group]
+
+            self._resolve(outcomes)
+
+        return len(entries)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.drain()
+                due = self.outbox.next_due()
+            except Exception:
+                # the thread must outlive any single failure (such as the database being locked), or the outbox would silently stop draining
+                logger.exception(f"{type(self).__name__} failed to drain {self.outbox}, retrying in {self.poll_interval} seconds.")
+                due = None
+
+            if not self._stopping.is_set():
+                self.outbox._wait(self.poll_interval if due is None else min(due, self.poll_interval))
+
+    def _groups(self, entries: list[OutboxEntry]) -> list[list[OutboxEntry]]:
+        groups: list[list[OutboxEntry]] = []
+        current, size = [], 0
+        for entry in entries:
+            entry_size = len(json.dumps(entry.payload))
+            if entry_size > self.max_batch_bytes:
+                groups.append([entry])
+            elif size + entry_size > self.max_batch_bytes:
+                groups.append(current)
+                current, size = [entry], entry_size
+            else:
+                current.append(entry)
+                size += entry_size
+
+        return groups + ([current] if current else [])
+
+    def _send(self, entries: list[OutboxEntry]) -> list[tuple[OutboxEntry, Optional[bool], Optional[str]]]:
+        if len(entries) == 1 and len(json.dumps(entries[0].payload)) > self.max_batch_bytes:
+            return [self._outcome(self._post(entries[0]))]
+
+        return [self._outcome(response) for response in self.batch.send([BatchRequest("POST", entry.url, body=entry.payload, entity=entry) for entry in entries])]
+
+    def _post(self, entry: OutboxEntry) -> BatchResponse:
+        from requests.exceptions import HTTPError
+
+        try:
+            response = self.batch.con.post(entry.url, data=entry.payload)
+        except HTTPError as ex:
+            # the connection raises for error statuses, which are inspected the same way as those of batched messages
+            if ex.response is None:
+                raise
+
+            response = ex.response
+
+        return BatchResponse(request=BatchRequest("POST", entry.url, body=entry.payload, entity=entry), status=response.status_code, body=self._body(response), headers=dict(response.headers))
+
+    def _resolve(self, outcomes: list[tuple[OutboxEntry, Optional[bool], Optional[str]]]) -> None:
+        delivered = [entry for entry, sent, error in outcomes if sent]
+        self.outbox.complete(delivered)
+        self.sent += len(delivered)
+
+        for entry, sent, error in outcomes:
+            if not sent:
+                # a rejected message (sent is None) will be rejected again, so it is not retried
+                self.outbox.fail(entry, error=error, permanent=sent is None)
+                self.failed += 1
+
+    @staticmethod
+    def _outcome(response: BatchResponse) -> tuple[OutboxEntry, Optional[bool], Optional[str]]:
+        if response:
+            return response.entity, True, None
+
+        rejected = 400 <= response.status < 500 and not response.throttled
+        return response.entity, None if rejected else False, f"{response.status}: {response.error}"
+
+    @staticmethod
+    def _body(response: Response) -> Any:
+        try:
+            return response.json()
+        except ValueError:
+            return response.text
@@ -1,5 +1,6 @@
-__all__ = ["OutlookService", "MessageFolder", "Message"]
+__all__ = ["OutlookService", "MessageFolder", "Message", "MessageTemplate"]
 
 from .service import OutlookService
 from .folder import MessageFolder
 from .message import Message
+from .merge import MessageTemplate
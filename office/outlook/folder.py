@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Callable, Iterable, List
 
 import O365.mailbox as mailbox
 
 from .message import Message, MessageQuery
 from ..attribute import Attribute, NonFilterableAttribute
 from ..query import Query, BulkAction, BulkActionContext
+from ..batch import BatchRequest
 
 
 class MessageFolder(mailbox.Folder):
@@ -32,7 +33,27 @@ class MessageFolder(mailbox.Folder):
         """Order a collection of messages by datetime received."""
         return sorted(messages, reverse=descending, key=lambda val: val.received)
 
+    def _move_folder_request(self, folder: Any) -> BatchRequest:
+        folder_id = folder if isinstance(folder, str) else folder.folder_id
+        return BatchRequest(method="POST", url=self.build_url(self._endpoints.get("move_folder").format(id=self.folder_id)), body={self._cc("destinationId"): folder_id}, entity=self,
+                            apply=lambda body: self._moved(folder=folder, body=body))
+
+    def _copy_folder_request(self, folder: Any) -> BatchRequest:
+        folder_id = folder if isinstance(folder, str) else folder.folder_id
+        return BatchRequest(method="POST", url=self.build_url(self._endpoints.get("copy_folder").format(id=self.folder_id)), body={self._cc("destinationId"): folder_id}, entity=self)
+
+    def _delete_request(self) -> BatchRequest:
+        return BatchRequest(method="DELETE", url=self.build_url(self._endpoints.get("get_folder").format(id=self.folder_id)), entity=self)
+
+    def _moved(self, folder: Any, body: dict) -> None:
+        # the destination is only known as a folder if one was given (rather than its id), since fetching the new parent of every folder would defeat batching the moves
+        self.parent_id = (body or {}).get(self._cc("parentFolderId"), self.parent_id)
+        self.parent = None if isinstance(folder, str) else folder
+
     class Attributes:
+        class Id(Attribute):
+            name = "id"
+
         class ChildFolderCount(Attribute):
             name = "child_folder_count"
 
@@ -55,17 +76,19 @@ class MessageFolder(mailbox.Folder):
 class BulkMessageFolderAction(BulkAction):
     """A class representing a bulk action performed on the resultset of a message folder query."""
 
+    identifiers = (MessageFolder.Attributes.Id,)
+
     def move(self, folder: MessageFolder) -> BulkActionContext:
         """Move all folders that match the query this bulk action was created from into the given folder."""
-        return BulkActionContext(query=self._query, action=MessageFolder.move_folder, args=(folder,))
+        return self._context(action=MessageFolder.move_folder, args=(folder,), request=MessageFolder._move_folder_request, removes=True)
 
     def delete(self) -> BulkActionContext:
         """Delete all folders that match the query this bulk action was created from."""
-        return BulkActionContext(query=self._query, action=MessageFolder.delete)
+        return self._context(action=MessageFolder.delete, request=MessageFolder._delete_request, removes=True)
 
     def copy(self, folder: MessageFolder) -> BulkActionContext:
         """Copy all folders that match the query this bulk action was created from into the given folder."""
-        return BulkActionContext(query=self._query, action=MessageFolder.copy_folder, args=(folder,))
+        return self._context(action=MessageFolder.copy_folder, args=(folder,), request=MessageFolder._copy_folder_request)
 
 
 class MessageFolderQuery(Query):
@@ -74,9 +97,22 @@ class MessageFolderQuery(Query):
     def __getitem__(self, key: str) -> MessageFolder:
         return self._container.get_folder(folder_name=key)
 
-    def execute(self) -> list[Message]:
+    def execute(self) -> list[MessageFolder]:
         """Execute this query and return any folders that match."""
-        return list(self._container.get_folders(limit=self._limit, query=self._query))
+        return list(self._fetch())
+
+    def _fetch_from_server(self, page_size: int = None) -> Iterable[MessageFolder]:
+        # O365 overrides the batch size whenever no limit is set, so pages of a specific size are requested directly
+        return self._container.get_folders(limit=self._limit, query=self._query) if page_size is None else self._paginate(page_size=page_size)
+
+    def _constructor(self) -> Callable:
+        return type(self._container)
+
+    def _collection_url(self) -> str:
+        if self._container.root:
+            return self._container.build_url(self._container._endpoints.get("root_folders"))
+
+        return self._container.build_url(self._container._endpoints.get("child_folders").format(id=self._container.folder_id))
 
     @property
     def bulk(self) -> BulkMessageFolderAction:
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import html
+from string import Formatter
+from typing import Any, Callable, Iterable, Mapping, Optional, TYPE_CHECKING
+
+from requests.exceptions import RetryError
+
+from ..executor import BulkExecutor, ExecutionStatistics, RateLimiter
+from .message import Message, FluentMessage
+
+if TYPE_CHECKING:
+    from .service import OutlookService
+
+
+class CompiledFormat:
+    """
+    A format string (such as 'Dear {name},') which is parsed once, so that rendering it against a row only has to look up and join its fields.
+    If an 'escape' callable is given, every substituted value is passed through it (such as 'html.escape', so that values cannot inject markup).
+    """
+
+    def __init__(self, text: str, escape: Callable[[str], str] = None) -> None:
+        self.text, self.escape = text, escape
+        self.parts = [(literal, field, conversion, spec) for literal, field, spec, conversion in Formatter().parse(text)]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(text={repr(self.text)})"
+
+    def render(self, row: Mapping[str, Any]) -> str:
+        """Return this format string with its fields substituted by the values of the given row."""
+        rendered = []
+        for literal, field, conversion, spec in self.parts:
+            rendered.append(literal)
+            if field is not None:
+                value = row[field]
+                value = repr(value) if conversion == "r" else str(value) if conversion == "s" else ascii(value) if conversion == "a" else value
+                value = format(value, spec or "")
+                rendered.append(value if self.escape is None else self.escape(value))
+
+        return "".join(rendered)
+
+
+class MessageTemplate:
+    """
+    A class representing a message to be sent to every row of a mail merge. The subject, body and recipients are format strings (such as 'Dear {name},') whose fields are looked up in each row.
+    Multiple recipients are separated by semicolons. The body is converted to html, wrapped in the message style and (if signing) followed by the signature once, when the template is compiled.
+    The values substituted into the body are html-escaped, so that the text of a row always appears as written.
+    """
+
+    def __init__(self, subject: str, body: str, to: str = "{email}", cc: str = None, bcc: str = None, sign: bool = False) -> None:
+        self.subject, self.body, self.to, self.cc, self.bcc, self.sign = subject, body, to, cc, bcc, sign
+        self._compiled: Optional[tuple] = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(subject={repr(self.subject)}, to={repr(self.to)})"
+
+    def compile(self, style: dict, signature: Optional[str] = None) -> MessageTemplate:
+        """Parse the format strings of this template and prepare the wrapper of its body, given the message style and the signature to append (if signing)."""
+        start, end = FluentMessage._body_wrapper(style=style, signature=signature if self.sign else None)
+        body = CompiledFormat(self.body.replace("\n", "<br>").replace("\t", "&nbsp;" * 4), escape=html.escape)
+        self._compiled = CompiledFormat(self.subject), body, start, end, *(None if recipients is None else CompiledFormat(recipients) for recipients in (self.to, self.cc, self.bcc))
+        return self
+
+    def render(self, row: Mapping[str, Any]) -> dict:
+        """Return the subject, body and recipients of the message for the given row."""
+        subject, body, start, end, to, cc, bcc = self._compiled
+        return {
+            "subject": subject.render(row),
+            "body": f"{start}{body.render(row)}{end}",
+            **{name: self._recipients(recipients, row) for name, recipients in (("to", to), ("cc", cc), ("bcc", bcc))},
+        }
+
+    @staticmethod
+    def _recipients(recipients: Optional[CompiledFormat], row: Mapping[str, Any]) -> list[str]:
+        return [] if recipients is None else [address.strip() for address in recipients.render(row).split(";") if address.strip()]
+
+
+class SendOutcome:
+    """A class representing the outcome of sending the message of a single row of a mail merge."""
+
+    def __init__(self, index: int, row: Mapping[str, Any]) -> None:
+        self.index, self.row = index, row
+        self.sent, self.error, self.attempts = False, None, 0
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(index={self.index}, sent={self.sent}, attempts={self.attempts}, error={repr(self.error)})"
+
+    def __bool__(self) -> bool:
+        return self.sent
+
+
+class MailMerge:
+    """
+    A class which sends the message of a template to every row of a mail merge, using a pool of 'max_workers' threads. Throttled requests are retried once the 'Retry-After' period has elapsed,
+    but sends that failed in a way the server may have accepted them despite (such as timeouts or repeated gateway errors) are not, so that no recipient is sent the same message twice.
+    Sending is paced so that no more than 'messages_per_minute' messages are sent per minute and, if provided, no more than 'recipients_per_minute' recipients are sent to per minute. Exchange
+    Online enforces both a per-minute message rate (30 by default) and a daily recipient limit per mailbox, so pacing below them avoids sending being suspended part-way through.
+    Either limit may be disabled by passing None. A row whose message cannot be rendered (such as one missing a field of the template) is recorded as failed on its own outcome.
+    """
+
+    def __init__(self, service: OutlookService, template: MessageTemplate, max_workers: int = 4, recipients_per_minute: int = None, save_to_sent_folder: bool = True,
+                 messages_per_minute: Optional[int] = 30) -> None:
+        self.service, self.template, self.save_to_sent_folder = service, template, save_to_sent_folder
+        self.executor = BulkExecutor(max_workers=max_workers)
+        self.message_limiter = None if messages_per_minute is None else RateLimiter(rate=messages_per_minute, period=60.0)
+        self.limiter = None if recipients_per_minute is None else RateLimiter(rate=recipients_per_minute, period=60.0)
+        self.outcomes: list[SendOutcome] = []
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(template={repr(self.template)}, sent={sum(1 for outcome in self.outcomes if outcome)}, failed={sum(1 for outcome in self.outcomes if not outcome)})"
+
+    @property
+    def statistics(self) -> ExecutionStatistics:
+        """The statistics of the run, such as its throughput and how often it was throttled."""
+        return self.executor.statistics
+
+    def send(self, rows: Iterable[Mapping[str, Any]]) -> list[SendOutcome]:
+        """Send the message of the template to every given row, and return the outcome of each in the order of the rows."""
+        self.template.compile(style=Message.style, signature=self.service.signature if self.template.sign else None)
+        self.executor.map(self._send, self._outcomes(rows))
+        return self.outcomes
+
+    def _outcomes(self, rows: Iterable[Mapping[str, Any]]) -> Iterable[SendOutcome]:
+        for index, row in enumerate(rows):
+            outcome = SendOutcome(index=index, row=row)
+            self.outcomes.append(outcome)
+            yield outcome
+
+    def _send(self, outcome: SendOutcome) -> bool:
+        outcome.attempts += 1
+        try:
+            rendered = self.template.render(outcome.row)
+            message = self._message(rendered)
+        except (LookupError, TypeError, ValueError) as ex:
+            # a row which is missing a field of the template (or holds an invalid address) fails on its own, so that the rows around it are still sent
+            outcome.error = ex
+            return False
+
+        try:
+            # retries of a throttled message were never delivered, so they do not count against the pacing budgets again
+            if self.message_limiter is not None and outcome.attempts == 1:
+                self.message_limiter.acquire()
+
+            if self.limiter is not None and outcome.attempts == 1:
+                self.limiter.acquire(len(rendered["to"]) + len(rendered["cc"]) + len(rendered["bcc"]))
+
+            outcome.sent = bool(message.send(save_to_sent_folder=self.save_to_sent_folder))
+            outcome.error = None
+        except RetryError as ex:
+            # the server may have accepted the message before failing to respond, so it is not retried, to avoid sending it twice
+            outcome.error = ex
+            return False
+        except Exception as ex:
+            outcome.error = ex
+            raise
+
+        return outcome.sent
+
+    def _message(self, rendered: dict) -> Message:
+        message = self.service.main.new_message()
+        message.sender.address = self.service.office.resource
+        message.subject, message.body = rendered["subject"], rendered["body"]
+        message.to.add(rendered["to"])
+        message.cc.add(rendered["cc"])
+        message.bcc.add(rendered["bcc"])
+        return message
@@ -1,6 +1,14 @@
 from __future__ import annotations
 
-from typing import Any, List, Union, Collection, TYPE_CHECKING, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+import hashlib
+import os
+import re
+import threading
+import uuid
+from typing import Any, Callable, Iterable, List, Union, Collection, TYPE_CHECKING, Optional
 
 import O365.message as message
 import O365.utils.utils as utils
@@ -8,16 +16,68 @@ import O365.utils.utils as utils
 from subtypes import Str, Html
 from pathmagic import Dir, PathLike, File
 
+from ..config import OfficeConfig
 from ..attribute import Attribute, NonFilterableAttribute, EnumerativeAttribute, BooleanAttribute
 from ..query import Query, BulkAction, BulkActionContext
+from ..batch import BatchRequest
+from ..delta import Delta
+from ..store import StorableMixin
 from ..fluent import FluentEntity
 
 if TYPE_CHECKING:
     from ..people import Contact
 
 
-class Message(message.Message):
-    """A class representing a Microsoft Outlook message. Provides methods and properties for interacting with it."""
+class TextExtractor(HTMLParser):
+    """
+    A streaming html parser which only collects the text of a document (skipping scripts and styles) and breaks lines at block-level elements. It is much faster than a full parse
+    of the document, at the cost of less faithful formatting.
+    """
+
+    block_tags = {"address", "blockquote", "br", "div", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "li", "ol", "p", "pre", "table", "tr", "ul"}
+    skipped_tags = {"head", "script", "style"}
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag in self.skipped_tags:
+            self._skipping += 1
+        elif tag in self.block_tags:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self.skipped_tags:
+            self._skipping = max(self._skipping - 1, 0)
+        elif tag in self.block_tags:
+            self.parts.append("\n")
+
+    def handle_data(self, data: str) -> None:
+        if not self._skipping:
+            self.parts.append(re.sub(r"\s+", " ", data))
+
+    @classmethod
+    def extract(cls, html: str) -> str:
+        """Return the text of the given html document."""
+        parser = cls()
+        parser.feed(html)
+        parser.close()
+
+        lines = (line.strip() for line in "".join(parser.parts).replace("\xa0", " ").split("\n"))
+        return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+class Message(StorableMixin, message.Message):
+    """
+    A class representing a Microsoft Outlook message. Provides methods and properties for interacting with it. The parsed body is memoized until the body changes.
+    If 'Message.fast_text' is True, the text of html bodies is produced by the (much faster, but less faithful) TextExtractor rather than by a full parse.
+    """
+
+    fast_text = False
+    _parsed_html: Optional[tuple[str, Html]] = None
+    _parsed_text: Optional[tuple[str, str]] = None
 
     style = {
         "font-size": 11,
@@ -40,12 +100,25 @@ class Message(message.Message):
     @property
     def text(self) -> str:
         """A property controlling access to the string form of the message body, with all html tags and constructs handled and stripped out."""
-        return Html(self.body).text.strip()
+        body = self.body
+        if self._parsed_text is None or self._parsed_text[0] is not body:
+            if self.body_type.lower() == "text":
+                text = body.strip()
+            else:
+                text = TextExtractor.extract(body) if self.fast_text else self.html.text.strip()
+
+            self._parsed_text = body, text
+
+        return self._parsed_text[1]
 
     @property
     def html(self) -> Html:
         """A property controlling access to the subtypes.Html object corresponding to this message's html body."""
-        return Html(self.body)
+        body = self.body
+        if self._parsed_html is None or self._parsed_html[0] is not body:
+            self._parsed_html = body, Html(body)
+
+        return self._parsed_html[1]
 
     @property
     def fluent(self) -> FluentMessage:
@@ -64,26 +137,74 @@ class Message(message.Message):
 
     def copy(self, *args: Any, **kwargs: Any) -> FluentMessage:
         """Create a new FluentMessage serving as a copy of this message."""
-        new: Message = super().copy(*args, **kwargs)
+        new: Message = self._invalidating(super().copy(*args, **kwargs))
         return new.fluent
 
+    def send(self, *args: Any, **kwargs: Any) -> bool:
+        return self._invalidating(super().send(*args, **kwargs))
+
+    def delete(self) -> bool:
+        return self._invalidating(super().delete(), entity_id=self.object_id)
+
+    def mark_as_read(self) -> bool:
+        return self._invalidating(super().mark_as_read(), entity_id=self.object_id)
+
+    def mark_as_unread(self) -> bool:
+        return self._invalidating(super().mark_as_unread(), entity_id=self.object_id)
+
+    def move(self, *args: Any, **kwargs: Any) -> bool:
+        return self._invalidating(super().move(*args, **kwargs))
+
+    def save_message(self) -> bool:
+        return self._invalidating(super().save_message(), entity_id=self.object_id)
+
+    def save_draft(self, *args: Any, **kwargs: Any) -> bool:
+        return self._invalidating(super().save_draft(*args, **kwargs))
+
     def render(self) -> None:
         """Render the message body html in a separate window. Will block until the window has been closed by a user."""
         from iotools import HtmlGui
         HtmlGui(name=self.subject, text=self.body).start()
 
-    def save_attachments_to(self, path: PathLike) -> list[File]:
-        """Save all attachments of this message to the given folder path."""
+    def save_attachments_to(self, path: PathLike, max_workers: int = 4, skip_existing: bool = True) -> list[File]:
+        """Save all attachments of this message to the given folder path, streaming up to 'max_workers' of them to disk at once. Attachments already saved there are skipped if 'skip_existing' is True."""
         if not self.has_attachments:
             return []
         else:
-            self.attachments.download_attachments()
-            for attachment in self.attachments:
-                attachment.save(path)
+            return AttachmentDownloader(path=path, max_workers=max_workers, skip_existing=skip_existing).download([self])
 
-            return [Dir(path).files[attachment.name] for attachment in self.attachments]
+    def _copy_request(self, folder: Any) -> BatchRequest:
+        folder_id = folder if isinstance(folder, str) else folder.folder_id
+        return BatchRequest(method="POST", url=self.build_url(self._endpoints.get("copy_message").format(id=self.object_id)), body={self._cc("destinationId"): folder_id}, entity=self)
+
+    def _move_request(self, folder: Any) -> BatchRequest:
+        folder_id = folder if isinstance(folder, str) else folder.folder_id
+        return BatchRequest(method="POST", url=self.build_url(self._endpoints.get("move_message").format(id=self.object_id)), body={self._cc("destinationId"): folder_id}, entity=self,
+                            apply=lambda body: self._moved(folder_id=folder_id, body=body))
+
+    def _delete_request(self) -> BatchRequest:
+        return BatchRequest(method="DELETE", url=self.build_url(self._endpoints.get("get_message").format(id=self.object_id)), entity=self)
+
+    def _mark_as_read_request(self) -> BatchRequest:
+        return BatchRequest(method="PATCH", url=self.build_url(self._endpoints.get("get_message").format(id=self.object_id)), body={self._cc("isRead"): True}, entity=self,
+                            apply=lambda body: self._marked_as_read())
+
+    def _moved(self, folder_id: str, body: dict) -> None:
+        # a moved message is given a new id by the server, just as when it is moved individually
+        self.folder_id, self.object_id = folder_id, (body or {}).get(self._cc("id"), self.object_id)
+
+    def _marked_as_read(self) -> None:
+        # the message is already read on the server, so the change is not tracked as one still to be saved
+        self.is_read = True
+        self._track_changes.discard(self._cc("isRead"))
 
     class Attributes:
+        class Id(Attribute):
+            name = "id"
+
+        class ChangeKey(Attribute):
+            name = "change_key"
+
         class From(Attribute):
             name = "from"
 
@@ -133,23 +254,146 @@ class Message(message.Message):
             name = "to_recipients"
 
 
+class AttachmentDownloader:
+    """
+    A class which saves the attachments of any number of messages to a folder. The raw content of each attachment is streamed straight to disk, so no attachment is ever held in memory,
+    and up to 'max_workers' messages are listed and attachments downloaded at once. Messages are consumed lazily, so only those currently being worked on are held in memory.
+    Attachments sharing a name are saved under distinct names (such as 'report (1).pdf'). Every saved attachment is recorded (along with its size on disk) in a manifest kept for the folder,
+    and if 'skip_existing' is True, attachments recorded there whose file is still intact are skipped, as are those whose name is already taken (without being recorded) by a file of their size,
+    such as attachments saved before the manifest was kept. Reference attachments (links to files stored elsewhere) have no content and are ignored.
+    """
+
+    chunk_size = 1024 ** 2
+    downloadable = {"#microsoft.graph.fileAttachment", "#microsoft.graph.itemAttachment"}
+    write_interval = 50
+
+    def __init__(self, path: PathLike, max_workers: int = 4, skip_existing: bool = True) -> None:
+        self.dir, self.max_workers, self.skip_existing = Dir.from_pathlike(path), max_workers, skip_existing
+        # the manifest is kept with the config of this library rather than in the folder itself, so that it neither clutters the folder nor collides with an attachment's name
+        self.manifest = OfficeConfig().folder.new_dir("manifests").new_file(hashlib.md5(os.path.abspath(self.dir).encode()).hexdigest(), "json")
+        self._saved: dict[str, dict] = self.manifest.content or {}
+        self._reserved, self._unwritten, self._lock = {entry["name"] for entry in self._saved.values()}, 0, threading.RLock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(dir={repr(str(self.dir))}, max_workers={self.max_workers}, skip_existing={self.skip_existing})"
+
+    def download(self, messages: Iterable[Message]) -> list[File]:
+        """Save the attachments of the given messages and return the resulting files, in the order of the messages and of their attachments."""
+        files: list[File] = []
+        listings, downloads, in_flight = deque(), deque(), threading.BoundedSemaphore(self.max_workers * 2)
+
+        def submit(message: Message, attachments: list[dict]) -> None:
+            for attachment in attachments:
+                in_flight.acquire()
+                download = pool.submit(self._save, message, attachment)
+                download.add_done_callback(lambda future: in_flight.release())
+                downloads.append(download)
+
+            while downloads and downloads[0].done():
+                files.append(downloads.popleft().result())
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for message in messages:
+                    if message.has_attachments:
+                        listings.append((message, pool.submit(self._attachments, message)))
+                        if len(listings) >= self.max_workers:
+                            message, listing = listings.popleft()
+                            submit(message, listing.result())
+
+                while listings:
+                    message, listing = listings.popleft()
+                    submit(message, listing.result())
+
+                files.extend(download.result() for download in downloads)
+        finally:
+            self._write_manifest()
+
+        return files
+
+    def _attachments(self, message: Message) -> list[dict]:
+        url, params, attachments = message.attachments.build_url(message.attachments._endpoints.get("attachments").format(id=message.object_id)), {"$select": "id,name,size"}, []
+        while url:
+            data = message.con.get(url, params=params).json()
+            attachments.extend(attachment for attachment in data.get("value", []) if attachment.get("@odata.type") in self.downloadable)
+            url, params = data.get("@odata.nextLink"), None
+
+        return attachments
+
+    def _save(self, message: Message, attachment: dict) -> File:
+        key = f"{message.object_id}/{attachment['id']}"
+        path = self._path(key, name=attachment["name"], size=attachment.get("size") if self.skip_existing else None)
+        if self.skip_existing and os.path.isfile(path) and os.path.getsize(path) == self._saved.get(key, {}).get("size"):
+            return File.from_pathlike(path)
+
+        url = message.attachments.build_url(message.attachments._endpoints.get("attachment").format(id=message.object_id, ida=attachment["id"]))
+        # the content is written to a temporary file first, so that an interrupted download never leaves a partial file that would later be mistaken for a complete one
+        # it is opened like any other new file (rather than through tempfile, which only lets its owner read it), so that the umask decides the permissions of the attachment
+        with message.con.get(f"{url}/$value", stream=True) as response, open(os.path.join(self.dir, f"tmp{uuid.uuid4().hex}.part"), "xb") as stream:
+            try:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    stream.write(chunk)
+            except BaseException:
+                stream.close()
+                os.remove(stream.name)
+                raise
+
+        os.replace(stream.name, path)
+        self._record(key, name=os.path.basename(path), size=os.path.getsize(path))
+        return File.from_pathlike(path)
+
+    def _path(self, key: str, name: str, size: int = None) -> str:
+        with self._lock:
+            if key in self._saved:
+                return os.path.join(self.dir, self._saved[key]["name"])
+
+            name = name.replace("/", "_").replace("\\", "_")
+            # a file the manifest doesn't know about is taken to be this attachment (and recorded as such) if it has its name and size, rather than being saved again alongside it
+            existing = os.path.join(self.dir, name)
+            if size is not None and name not in self._reserved and os.path.isfile(existing) and os.path.getsize(existing) == size:
+                self._reserved.add(name)
+                self._record(key, name=name, size=size)
+                return existing
+
+            stem, extension = os.path.splitext(name)
+            candidate, index = name, 1
+            while candidate in self._reserved or os.path.exists(os.path.join(self.dir, candidate)):
+                candidate, index = f"{stem} ({index}){extension}", index + 1
+
+            self._reserved.add(candidate)
+            return os.path.join(self.dir, candidate)
+
+    def _record(self, key: str, name: str, size: int) -> None:
+        with self._lock:
+            self._saved[key], self._unwritten = {"name": name, "size": size}, self._unwritten + 1
+            if self._unwritten >= self.write_interval:
+                self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        with self._lock:
+            if self._unwritten:
+                self.manifest.content, self._unwritten = self._saved, 0
+
+
 class BulkMessageAction(BulkAction):
     """A class representing a bulk action performed on the resultset of a message query."""
 
+    identifiers = (Message.Attributes.Id, Message.Attributes.ChangeKey)
+
     def copy(self, folder: Any) -> BulkActionContext:
-        return BulkActionContext(query=self._query, action=Message.copy, args=(folder,))
+        return self._context(action=Message.copy, args=(folder,), request=Message._copy_request)
 
     def move(self, folder: Any) -> BulkActionContext:
-        return BulkActionContext(query=self._query, action=Message.move, args=(folder,))
+        return self._context(action=Message.move, args=(folder,), request=Message._move_request, removes=True)
 
     def delete(self) -> BulkActionContext:
-        return BulkActionContext(query=self._query, action=Message.delete)
+        return self._context(action=Message.delete, request=Message._delete_request, removes=True)
 
     def mark_as_read(self) -> BulkActionContext:
-        return BulkActionContext(query=self._query, action=Message.mark_as_read)
+        return self._context(action=Message.mark_as_read, request=Message._mark_as_read_request, select=(Message.Attributes.IsDraft,))
 
     def save_draft(self) -> BulkActionContext:
-        return BulkActionContext(query=self._query, action=Message.save_draft)
+        return self._context(action=Message.save_draft, select=None)
 
 
 class MessageQuery(Query):
@@ -162,16 +406,39 @@ class MessageQuery(Query):
 
     def execute(self) -> list[Message]:
         """Execute this query and return any messages that match."""
-        return list(self._container.get_messages(limit=self._limit, query=self._query))
+        return list(self._fetch())
+
+    def save_attachments_to(self, path: PathLike, max_workers: int = 4, skip_existing: bool = True, page_size: int = 100) -> list[File]:
+        """Save all attachments of every message matching this query to the given folder path, streaming up to 'max_workers' of them to disk at once."""
+        return AttachmentDownloader(path=path, max_workers=max_workers, skip_existing=skip_existing).download(self._projected(Message.Attributes.HasAttachments).stream(page_size=page_size))
+
+    def _fetch_from_server(self, page_size: int = None) -> Iterable[Message]:
+        return self._container.get_messages(limit=self._limit, query=self._query, batch=page_size)
+
+    def _constructor(self) -> Callable:
+        return self._container.message_constructor
+
+    def _collection_url(self) -> str:
+        if self._container.root:
+            return self._container.build_url(self._container._endpoints.get("root_messages"))
+
+        return self._container.build_url(self._container._endpoints.get("folder_messages").format(id=self._container.folder_id))
+
+    def _delta(self) -> Delta:
+        if self._container.root:
+            raise ValueError("Delta queries are only supported on the messages of a specific folder, not on the root folder.")
+
+        return Delta(container=self._container, url=f"{self._collection_url()}/delta", constructor=self._container.message_constructor, params=self._delta_params())
 
 
 class FluentMessage(FluentEntity):
-    """A class representing a message that doesn't yet exist. All public methods allow chaining. At the end of the method chain call FluentMessage.send() to send the message."""
+    """A class representing a message that doesn't yet exist. All public methods allow chaining. At the end of the method chain call FluentMessage.send() to send the message, or FluentMessage.enqueue() to send it in the background."""
 
     def __init__(self, parent: Message = None) -> None:
         self.entity, self.office, self._signing = parent, parent.con.office, False
         self.entity.sender.address = self.office.resource
         self._temp_body: Optional[str] = None
+        self._large_attachments: list[str] = []
 
     def from_(self, address: str) -> FluentMessage:
         """Set the email address this message will appear to originate from."""
@@ -205,9 +472,44 @@ class FluentMessage(FluentEntity):
 
     def send(self) -> bool:
         """Send this message as it currently is."""
-        if self._temp_body is not None:
-            start, end = f"""<p style="font-size: {self.entity.style["font-size"]}pt; font-family: {self.entity.style["font-family"]}; margin: {self.entity.style["margin"]}px;">""", "</p>"
-            body = f"{start}{self._temp_body}{end}"
-            self.entity.body = f"{body}<br>{self.office.outlook.signature}" if self._signing else body
+        self._render_body()
+
+        if self._large_attachments:
+            # large attachments can only be uploaded to a message that already exists, so it is saved as a draft first
+            if not self.entity.save_draft():
+                return False
+
+            try:
+                self._upload_large_attachments()
+            except Exception:
+                # the draft would otherwise be left behind in the drafts folder without its attachments
+                self.entity.delete()
+                raise
 
         return self.entity.send()
+
+    def enqueue(self, save_to_sent_folder: bool = True) -> int:
+        """Persist this message as it currently is to 'Office.outbox', from where it will be sent in the background, and return its id in the outbox. Returns without contacting the server."""
+        if self.office.outbox is None:
+            raise RuntimeError("No outbox is attached to this Office instance. Attach one as 'Office.outbox' before queuing messages.")
+
+        if self._large_attachments:
+            raise ValueError(f"Attachments larger than {self.upload_threshold} bytes must be uploaded to an existing message, so this message cannot be queued. Use {type(self).__name__}.send() instead.")
+
+        self._render_body()
+
+        payload = {self.entity._cc("message"): self.entity.to_api_data()}
+        if not save_to_sent_folder:
+            payload[self.entity._cc("saveToSentItems")] = False
+
+        return self.office.outbox.put(url=self.entity.build_url(self.entity._endpoints.get("send_mail")), payload=payload)
+
+    def _render_body(self) -> None:
+        if self._temp_body is not None:
+            start, end = self._body_wrapper(style=self.entity.style, signature=self.office.outlook.signature if self._signing else None)
+            self.entity.body = f"{start}{self._temp_body}{end}"
+
+    @staticmethod
+    def _body_wrapper(style: dict, signature: Optional[str] = None) -> tuple[str, str]:
+        start, end = f"""<p style="font-size: {style["font-size"]}pt; font-family: {style["font-family"]}; margin: {style["margin"]}px;">""", "</p>"
+        return start, end if signature is None else f"{end}<br>{signature}"
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import Any, Iterable, Mapping, Optional, TYPE_CHECKING
 
 from O365.mailbox import MailBox
 
@@ -8,6 +8,7 @@ from miscutils import cached_property
 
 from .folder import MessageFolder
 from .message import FluentMessage
+from .merge import MailMerge, MessageTemplate, SendOutcome
 
 if TYPE_CHECKING:
     from ..office import Office
@@ -16,6 +17,8 @@ if TYPE_CHECKING:
 class OutlookService:
     """A class representing Microsoft Outlook. Controls access to email-related services."""
 
+    text_body_preference = 'outlook.body-content-type="text"'
+
     def __init__(self, office: Office) -> None:
         self.office = office
         self.mailbox = Mailbox(parent=self.office.account, main_resource=self.office.account.main_resource, name='MailBox')
@@ -38,6 +41,23 @@ class OutlookService:
     def signature(self, signature: str) -> None:
         self._signature.content = signature
 
+    @property
+    def prefer_text_bodies(self) -> bool:
+        """
+        A property controlling whether Graph is asked to return the bodies of messages as plain text rather than html, so that they never need to be parsed.
+        Applies to every request sent on behalf of this account from then on.
+        """
+        return self.text_body_preference in self._preferences()
+
+    @prefer_text_bodies.setter
+    def prefer_text_bodies(self, prefer_text_bodies: bool) -> None:
+        preferences = [preference for preference in self._preferences() if preference != self.text_body_preference] + ([self.text_body_preference] if prefer_text_bodies else [])
+        headers = self.office.account.con.default_headers
+        if preferences:
+            headers["Prefer"] = ", ".join(preferences)
+        else:
+            headers.pop("Prefer", None)
+
     @cached_property
     def main(self) -> MessageFolder:
         """A property that returns the main folder."""
@@ -73,10 +93,22 @@ class OutlookService:
         """A property that returns the deleted folder."""
         return self.mailbox.deleted_folder()
 
+    def send_many(self, template: MessageTemplate, rows: Iterable[Mapping[str, Any]], max_workers: int = 4, recipients_per_minute: int = None, save_to_sent_folder: bool = True,
+                  messages_per_minute: Optional[int] = 30) -> list[SendOutcome]:
+        """
+        Send the message of the given template to every given row (a mapping of the fields of the template), using 'max_workers' threads and sending at most 'messages_per_minute' messages
+        and 'recipients_per_minute' recipients (if provided) per minute. Returns the outcome of each row, in the order of the rows.
+        """
+        return MailMerge(service=self, template=template, max_workers=max_workers, recipients_per_minute=recipients_per_minute, save_to_sent_folder=save_to_sent_folder,
+                         messages_per_minute=messages_per_minute).send(rows)
+
     def custom(self, folder_name: str = None, folder_id: str = None) -> MessageFolder:
         """Return the given custom folder by name or id."""
         return self.mailbox.get_folder(folder_name=folder_name, folder_id=folder_id)
 
+    def _preferences(self) -> list[str]:
+        return [preference.strip() for preference in self.office.account.con.default_headers.get("Prefer", "").split(",") if preference.strip()]
+
 
 class Mailbox(MailBox):
     folder_constructor = MessageFolder
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Callable, Iterable, List
 
 import O365.address_book as address_book
 
 from ..attribute import Attribute, NonFilterableAttribute
 from ..query import Query, BulkAction, BulkActionContext
+from ..batch import BatchRequest
+from ..delta import Delta
+from ..store import StorableMixin
 from ..outlook.message import Message, FluentMessage
 
 
-class Contact(address_book.Contact):
+class Contact(StorableMixin, address_book.Contact):
     """A class representing a Microsoft People Contact. Contains various methods for interacting with them and their details."""
 
     message_constructor = Message
@@ -25,7 +28,23 @@ class Contact(address_book.Contact):
         """A property that will create a new FluentMessage with the send target set to be this contact."""
         return FluentMessage(parent=self.new_message())
 
+    def save(self) -> bool:
+        entity_id = self.object_id
+        return self._invalidating(super().save(), entity_id=entity_id)
+
+    def delete(self) -> bool:
+        return self._invalidating(super().delete(), entity_id=self.object_id)
+
+    def _delete_request(self) -> BatchRequest:
+        return BatchRequest(method="DELETE", url=self.build_url(self._endpoints.get("root_contact").format(id=self.object_id)), entity=self)
+
     class Attributes:
+        class Id(Attribute):
+            name = "id"
+
+        class ChangeKey(Attribute):
+            name = "change_key"
+
         class Name(Attribute):
             name = "given_name"
 
@@ -82,12 +101,33 @@ class ContactQuery(Query):
 
     def execute(self) -> list[Contact]:
         """Execute this query and return any contacts that match."""
-        return self._container.get_contacts(limit=self._limit, query=self._query)
+        return list(self._fetch())
+
+    def _fetch_from_server(self, page_size: int = None) -> Iterable[Contact]:
+        # O365 overrides the batch size whenever no limit is set, so pages of a specific size are requested directly
+        return self._container.get_contacts(limit=self._limit, query=self._query) if page_size is None else self._paginate(page_size=page_size)
+
+    def _constructor(self) -> Callable:
+        return self._container.contact_constructor
+
+    def _collection_url(self) -> str:
+        if self._container.root:
+            return self._container.build_url(self._container._endpoints.get("root_contacts"))
+
+        return self._container.build_url(self._container._endpoints.get("folder_contacts").format(id=self._container.folder_id))
+
+    def _delta(self) -> Delta:
+        if self._container.root:
+            raise ValueError("Delta queries are only supported on the contacts of a specific folder, not on the root folder.")
+
+        return Delta(container=self._container, url=f"{self._collection_url()}/delta", constructor=self._container.contact_constructor, params=self._delta_params())
 
 
 class BulkContactAction(BulkAction):
     """A class representing a bulk action performed on the resultset of a contact query."""
 
+    identifiers = (Contact.Attributes.Id, Contact.Attributes.ChangeKey)
+
     def delete(self) -> BulkActionContext:
         """Delete all contacts that match the query this bulk action was created from."""
-        return BulkActionContext(query=self._query, action=Contact.delete)
+        return self._context(action=Contact.delete, request=Contact._delete_request, removes=True)
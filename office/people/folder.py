@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Callable, Iterable, List
 
 import O365.address_book as address_book
 
 from .contact import Contact, ContactQuery
 from ..attribute import Attribute, NonFilterableAttribute
 from ..query import Query, BulkAction, BulkActionContext
+from ..batch import BatchRequest
 from ..outlook import Message
 
 
@@ -32,7 +33,22 @@ class ContactFolder(address_book.ContactFolder):
         """Return the contact with the given address if one exists. Otherwise return None."""
         return self.get_contact_by_email(address)
 
+    def _move_folder_request(self, folder: Any) -> BatchRequest:
+        folder_id = folder if isinstance(folder, str) else folder.folder_id
+        return BatchRequest(method="PATCH", url=self.build_url(self._endpoints.get("get_folder").format(id=self.folder_id)), body={self._cc("parentFolderId"): folder_id}, entity=self,
+                            apply=self._moved)
+
+    def _delete_request(self) -> BatchRequest:
+        return BatchRequest(method="DELETE", url=self.build_url(self._endpoints.get("get_folder").format(id=self.folder_id)), entity=self)
+
+    def _moved(self, body: dict) -> None:
+        body = body or {}
+        self.name, self.parent_id = body.get(self._cc("displayName"), self.name), body.get(self._cc("parentFolderId"), self.parent_id)
+
     class Attributes:
+        class Id(Attribute):
+            name = "id"
+
         class Name(Attribute):
             name = "display_name"
 
@@ -46,13 +62,15 @@ class ContactFolder(address_book.ContactFolder):
 class BulkContactFolderAction(BulkAction):
     """A class representing a bulk action performed on the resultset of a contact folder query."""
 
+    identifiers = (ContactFolder.Attributes.Id,)
+
     def move(self, folder: ContactFolder) -> BulkActionContext:
         """Move all folders that match the query this bulk action was created from into the given folder."""
-        return BulkActionContext(query=self._query, action=ContactFolder.move_folder, args=(folder,))
+        return self._context(action=ContactFolder.move_folder, args=(folder,), request=ContactFolder._move_folder_request, removes=True)
 
     def delete(self) -> BulkActionContext:
         """Delete all folders that match the query this bulk action was created from."""
-        return BulkActionContext(query=self._query, action=ContactFolder.delete)
+        return self._context(action=ContactFolder.delete, request=ContactFolder._delete_request, removes=True)
 
 
 class ContactFolderQuery(Query):
@@ -61,9 +79,22 @@ class ContactFolderQuery(Query):
     def __getitem__(self, key: str) -> ContactFolder:
         return self._container.get_folder(folder_name=key)
 
-    def execute(self) -> list[Contact]:
+    def execute(self) -> list[ContactFolder]:
         """Execute this query and return any folders that match."""
-        return list(self._container.get_folders(limit=self._limit, query=self._query))
+        return list(self._fetch())
+
+    def _fetch_from_server(self, page_size: int = None) -> Iterable[ContactFolder]:
+        # the O365 contact folder listing does not accept a page size, so pages of a specific size are requested directly
+        return self._container.get_folders(limit=self._limit, query=self._query) if page_size is None else self._paginate(page_size=page_size)
+
+    def _constructor(self) -> Callable:
+        return type(self._container)
+
+    def _collection_url(self) -> str:
+        if self._container.root:
+            return self._container.build_url(self._container._endpoints.get("root_folders"))
+
+        return self._container.build_url(self._container._endpoints.get("child_folders").format(id=self._container.folder_id))
 
     @property
     def bulk(self) -> BulkContactFolderAction:
@@ -1,25 +1,39 @@
 from __future__ import annotations
 
 import contextlib
-from typing import Any, Callable, Collection, Generator, Tuple, Union, Optional
+import copy
+import functools
+import itertools
+from typing import Any, Callable, Collection, Generator, Iterable, Iterator, Tuple, Union, Optional
 
 import O365.utils.utils as utils
 
 from maybe import Maybe
 from miscutils import issubclass_safe
 
-from .attribute import BaseAttribute, Attribute, BooleanAttributeMeta, FilterableAttribute, BooleanExpression, BooleanExpressionClause
+from .attribute import BaseAttribute, Attribute, BooleanAttributeMeta, FilterableAttribute, BooleanExpression, BooleanExpressionClause, BooleanExpressionChain
+from .batch import Batch, BatchRequest, BatchResponse
+from .executor import BulkExecutor, ExecutionStatistics
+from .delta import Delta, DeltaResult
+from .store import EntityStore, StorableMixin, UnanswerableQuery
+from .optimizer import ExpressionOptimizer
+from .compiler import LRUCache, FilterTemplate
 
 
 class Query:
-    """A class for querying the api elements within a given collection."""
+    """
+    A class for querying the api elements within a given collection. Compiled select, order and filter clauses are kept in 'Query.cache' (shared by all queries), so that building a query
+    of a previously seen shape only has to substitute its values into the compiled filter template.
+    """
+
+    cache = LRUCache(maxsize=512)
 
     def __init__(self, container: Any) -> None:
         self._container = container
         self._casing_function = self._container.protocol.casing_function
         self._query = utils.Query(protocol=self._container.protocol)
         self._select: Optional[Tuple[BaseAttribute, ...]] = None
-        self._where: Optional[BooleanExpressionClause] = None
+        self._where: Optional[Union[BooleanExpression, BooleanExpressionChain]] = None
         self._order: Optional[FilterableAttribute] = None
         self._limit: Optional[int] = None
 
@@ -42,9 +56,9 @@ class Query:
         return self
 
     def where(self, resolvable_element: Union[Attribute, BooleanExpression, BooleanExpressionClause]) -> Query:
-        """Set the filter clause on this query. Accepts a single boolean attribute, boolean expression or boolean expression clause."""
+        """Set the filter clause on this query. Accepts a single boolean attribute, boolean expression or boolean expression clause, which is optimized before being compiled."""
         self._query.clear_filters()
-        self._where = resolvable_element._resolve()
+        self._where = ExpressionOptimizer().optimize(resolvable_element._resolve())
         self._build_where_clause()
         return self
 
@@ -62,44 +76,178 @@ class Query:
 
     def execute(self) -> Any:
         """Execute this query and return the results."""
+        return list(self._fetch())
+
+    def stream(self, page_size: int = 100) -> Iterator[Any]:
+        """Execute this query and lazily yield its results, requesting them from the server in pages of 'page_size' ($top) as they are consumed, so that only one page is held in memory at a time."""
+        yield from self._fetch(page_size=page_size)
+
+    def count(self) -> int:
+        """Return the number of objects that match this query as counted by the server (using the '$count' path segment), without downloading any of them."""
+        params = {key: value for key, value in self._query.as_params().items() if key in ("$filter", "$search")}
+        response = self._container.con.get(f"{self._collection_url()}/$count", params=params, headers={"ConsistencyLevel": "eventual"})
+        count = int(response.text) if response else 0
+        return count if self._limit is None else min(count, self._limit)
+
+    def delta(self, reset: bool = False) -> DeltaResult:
+        """
+        Return the objects added, changed or removed within this collection since the last time this method was called on it (even by another process), using Graph delta queries.
+        The first call (or any call with 'reset=True') returns every object in the collection as added. Only 'select' may be set on a delta query, since it always tracks the whole collection.
+        """
+        delta = self._delta()
+        if reset:
+            delta.reset()
+
+        result = delta.sync()
+        self._apply_delta(result, complete=result.complete)
+        return result
+
+    def _fetch(self, page_size: int = None) -> Iterable[Any]:
+        store, constructor = self._store, self._constructor()
+        # the store holds plain entities, so it can neither answer a search nor supply expanded relationships
+        if store is None or self._select or self._query._search or self._query._expands:
+            return self._fetch_from_server(page_size=page_size)
+
+        collection = self._collection_url()
+        if store.is_fresh(collection):
+            try:
+                return store.answer(collection, where=self._where, order=self._order, limit=self._limit, casing_function=self._casing_function,
+                                    constructor=lambda data: constructor(parent=self._container, **{self._container._cloud_data_key: data}))
+            except UnanswerableQuery:
+                pass
+
+        complete = self._where is None and self._limit is None
+        return store.record(collection, self._fetch_from_server(page_size=page_size), complete=complete)
+
+    def _fetch_from_server(self, page_size: int = None) -> Iterable[Any]:
         raise NotImplementedError
 
+    def _paginate(self, page_size: int) -> Iterator[Any]:
+        constructor, url, remaining = self._constructor(), self._collection_url(), self._limit
+        params = {"$top": page_size if remaining is None else min(page_size, remaining), **self._query.as_params()}
+
+        while url and remaining != 0:
+            response = self._container.con.get(url, params=params)
+            data = response.json() if response else {}
+
+            for item in data.get("value", [])[:remaining]:
+                yield constructor(parent=self._container, **{self._container._cloud_data_key: item})
+
+            remaining = None if remaining is None else max(remaining - len(data.get("value", [])), 0)
+            url, params = data.get("@odata.nextLink"), None
+
+    @property
+    def _store(self) -> Optional[EntityStore]:
+        store = getattr(getattr(self._container.con, "office", None), "store", None)
+        return store if issubclass_safe(self._constructor(), StorableMixin) else None
+
+    def _constructor(self) -> Optional[Callable]:
+        return None
+
+    def _apply_delta(self, result: DeltaResult, complete: bool = False) -> None:
+        store = self._store
+        if store is None or self._select:
+            return
+
+        collection = self._collection_url()
+        if complete:
+            # a complete synchronization returns every entity of the collection, so any others still stored have since been removed
+            list(store.record(collection, result.added + result.changed, complete=True))
+            return
+
+        known = store.is_known(collection)
+        store.upsert(collection, result.added + result.changed)
+        store.remove(collection, result.removed)
+
+        if known:
+            store.refresh(collection)
+
+    def _invalidate_store(self) -> None:
+        if (store := self._store) is not None:
+            store.invalidate(self._collection_url())
+
+    def _projected(self, *attributes: BaseAttribute) -> Query:
+        if not attributes:
+            return self
+
+        query = copy.copy(self)
+        query._query = copy.copy(self._query)
+        return query.select(*dict.fromkeys([*Maybe(self._select).else_(()), *attributes]))
+
+    def _delta(self) -> Delta:
+        raise NotImplementedError
+
+    def _delta_params(self) -> dict:
+        # a delta link tracks the whole collection, so a narrowed query would silently sync (and persist the link of) every entity of it instead
+        if self._where is not None or self._order is not None or self._limit is not None or self._query._search:
+            raise ValueError("Delta queries synchronize the whole collection and cannot be combined with 'where', 'order_by', 'limit' or 'search'. Filter the returned changes instead.")
+
+        return {key: value for key, value in self._query.as_params().items() if key == "$select"}
+
+    def _collection_url(self) -> str:
+        raise NotImplementedError
+
+    def _compiled(self, key: tuple, compiler: Callable[[utils.Query], Any]) -> Any:
+        key = (type(self._container.protocol), *key)
+        if (compiled := self.cache.get(key)) is None:
+            compiled = self.cache[key] = compiler(utils.Query(protocol=self._container.protocol))
+
+        return compiled
+
     def _build_select_clause(self) -> None:
         if self._select:
-            self._query.select(*[self._casing_function(attribute.name) for attribute in self._select])
+            names = tuple(attribute.name for attribute in self._select)
+            self._query._selects.update(self._compiled(("select", names), lambda query: frozenset(query.select(*[self._casing_function(name) for name in names])._selects)))
 
     def _build_where_clause(self) -> None:
         if self._where is not None:
-            if isinstance(self._where, BooleanExpression):
-                self._build_boolean_expression(self._where)
-            elif isinstance(self._where, BooleanExpressionClause):
-                self._build_boolean_expression_clause(self._where)
-            else:
+            if not isinstance(self._where, (BooleanExpression, BooleanExpressionChain, BooleanExpressionClause)):
                 raise TypeError(f"Argument to filter clause of '{type(self).__name__}' must be '{type(BooleanExpression.__name__)}' or '{type(BooleanExpressionClause.__name__)}', not '{type(self._where).__name__}'.")
 
+            values: list = []
+            template = self._compiled(("where", FilterTemplate.inspect(self._where, values)), lambda query: self._compile_filter_template(query))
+            self._query._filters.append([None, template.render(self._query, values), ()])
+
+    def _compile_filter_template(self, query: utils.Query) -> FilterTemplate:
+        current, self._query = self._query, query
+        try:
+            self._build_side(FilterTemplate.parameterize(self._where))
+        finally:
+            self._query = current
+
+        return FilterTemplate.from_query(query)
+
     def _build_order_by_clause(self) -> None:
         if isinstance(self._order, str):
             self._query.order_by(self._order)
-        elif isinstance(self._order, FilterableAttribute):
-            self._query.order_by(self._casing_function(self._order.name), ascending=self._order.ascending)
-        elif issubclass_safe(self._order, FilterableAttribute):
-            attribute = self._order.asc()
-            self._query.order_by(self._casing_function(attribute.name), ascending=self._order.ascending)
+        elif isinstance(self._order, FilterableAttribute) or issubclass_safe(self._order, FilterableAttribute):
+            attribute = self._order if isinstance(self._order, FilterableAttribute) else self._order.asc()
+            ((name, direction),) = self._compiled(("order", attribute.name, attribute.ascending), lambda query: tuple(query.order_by(self._casing_function(attribute.name), ascending=attribute.ascending)._order_by.items()))
+            self._query._order_by[name] = direction
         else:
             raise TypeError(f"Unrecognized type '{type(self._order)}' of '{self._order}' for 'order_by'.")
 
     def _build_boolean_expression_clause(self, clause: BooleanExpressionClause) -> None:
-        with self._precedence_grouping():
+        with self._negation() if clause.negated else contextlib.nullcontext(), self._precedence_grouping():
             self._build_side(clause.left)
             self._build_chain_operator(clause.operator)
             self._build_side(clause.right)
 
+    def _build_boolean_expression_chain(self, chain: BooleanExpressionChain) -> None:
+        with self._negation() if chain.negated else contextlib.nullcontext(), self._precedence_grouping():
+            for index, element in enumerate(chain.elements):
+                if index:
+                    self._build_chain_operator(chain.operator)
+                self._build_side(element)
+
     def _build_side(self, side: Union[BooleanExpression, BooleanExpressionClause]) -> None:
         if isinstance(side, BooleanAttributeMeta):
             side = side._resolve()
 
         if isinstance(side, BooleanExpression):
             self._build_boolean_expression(side)
+        elif isinstance(side, BooleanExpressionChain):
+            self._build_boolean_expression_chain(side)
         elif isinstance(side, BooleanExpressionClause):
             self._build_boolean_expression_clause(side)
         else:
@@ -115,9 +263,9 @@ class Query:
 
     @contextlib.contextmanager
     def _negation(self) -> Generator[None, None, None]:
+        # the negation is consumed by the next filter or group added to the query, so it must not be reverted afterwards
         self._query.negate()
         yield
-        self._query.negate()
 
     @contextlib.contextmanager
     def _precedence_grouping(self) -> Generator[None, None, None]:
@@ -127,14 +275,37 @@ class Query:
 
 
 class BulkActionContext:
-    """A class representing the context within which a bulk action is performed. It can be used as a context manager and will automatically perform the action upon dropping out of scope if the action was committed."""
-
-    def __init__(self, query: Query, action: Callable, args: Any = None, kwargs: Any = None) -> None:
-        self._query, self._action, self._args, self._kwargs, self._committed = query, action, Maybe(args).else_(()), Maybe(kwargs).else_({}), False
-        self.result: Collection = []
+    """
+    A class representing the context within which a bulk action is performed. It can be used as a context manager and will automatically perform the action upon dropping out of scope if the action was committed.
+    If a 'request' callable is provided (taking the same arguments as the action and returning a BatchRequest), the action will be sent in Graph JSON batches rather than one request per entity.
+    If an executor is provided, the action (or the batches) will be performed concurrently by it, and the statistics of the run will be available afterwards.
+    If a page size is provided, the query results are streamed into the action page by page rather than being loaded up front. In that case the length of this object is the number of entities
+    matching the query as counted by the server until the action is performed (and the number of entities consumed by it afterwards), and only the responses of failed sub-requests are retained. Actions which remove entities from the resultset ('removes', such as deleting or moving them) instead fetch
+    every page before the first entity is removed, since Graph pages through messages and contacts by offset ($skip) and every removal would shift the later entities out of the pages to come.
+    If 'select' is provided, only those attributes (in addition to any the query already selects) are requested from the server, since the action needs nothing else.
+    """
+
+    def __init__(self, query: Query, action: Callable, args: Any = None, kwargs: Any = None, request: Callable[..., BatchRequest] = None, executor: BulkExecutor = None, page_size: int = None,
+                 select: Collection[BaseAttribute] = None, removes: bool = False) -> None:
+        self._query, self._action, self._args, self._kwargs, self._request, self._executor, self._page_size, self._committed = query, action, Maybe(args).else_(()), Maybe(kwargs).else_({}), request, executor, page_size, False
+        self._select, self._removes = Maybe(select).else_(()), removes
+        self.result: Union[Collection, Iterator] = []
+        self.responses: list[BatchResponse] = []
+        self.statistics: Optional[ExecutionStatistics] = None
+        self._consumed, self._performed, self._count = 0, False, None
 
     def __len__(self) -> int:
-        return len(self.result)
+        if not isinstance(self.result, Iterator):
+            return len(self.result)
+
+        if self._performed:
+            return self._consumed
+
+        # the entities of a streamed action are only fetched while it is performed, so until then the server is asked how many there will be
+        if self._count is None:
+            self._count = self._query.count()
+
+        return self._count
 
     def __bool__(self) -> bool:
         return len(self) > 0
@@ -147,6 +318,11 @@ class BulkActionContext:
         if self._committed:
             self._perform_bulk_action()
 
+    @property
+    def failures(self) -> list[BatchResponse]:
+        """The responses to any batched sub-requests that failed while performing this bulk action."""
+        return [response for response in self.responses if not response]
+
     def commit(self) -> None:
         """Commit the action corresponding to this context. It will be performed when this object drops out of context."""
         self._committed = True
@@ -158,15 +334,81 @@ class BulkActionContext:
         return len(self)
 
     def _execute_query(self) -> None:
-        self.result = self._query.execute()
+        self._consumed, self._performed, self._count = 0, False, None
+        query = self._query._projected(*self._select)
+        if self._page_size is None:
+            self.result = query.execute()
+        elif self._removes:
+            self.result = list(self._count_consumed(query.stream(page_size=self._page_size)))
+        else:
+            self.result = self._count_consumed(query.stream(page_size=self._page_size))
+
+    def _count_consumed(self, entities: Iterable) -> Iterator:
+        for entity in entities:
+            self._consumed += 1
+            yield entity
 
     def _perform_bulk_action(self) -> None:
-        for msg in self.result:
-            self._action(msg, *self._args, **self._kwargs)
+        self._performed = True
+        if self._request is None:
+            calls, func = self.result, self._perform_action
+        else:
+            batch = self._new_batch()
+            calls, func = self._chunk_requests(self.result, size=batch.max_size), functools.partial(self._send_batch, batch)
+
+        if self._executor is None:
+            for call in calls:
+                func(call)
+        else:
+            self.statistics = self._executor.map(func, calls)
+
+        self._query._invalidate_store()
+
+    def _perform_action(self, entity: Any) -> Any:
+        return self._action(entity, *self._args, **self._kwargs)
+
+    def _new_batch(self) -> Batch:
+        if self._executor is None:
+            return Batch(con=self._query._container.con, protocol=self._query._container.protocol)
+
+        return Batch(con=self._query._container.con, protocol=self._query._container.protocol, throttle=self._executor.throttle, max_retries=self._executor.max_retries)
+
+    def _send_batch(self, batch: Batch, requests: list[BatchRequest]) -> list[BatchResponse]:
+        responses = batch.send(requests)
+        self.responses.extend(responses if self._page_size is None else [response for response in responses if not response])
+        return responses
+
+    def _chunk_requests(self, entities: Iterable, size: int) -> Iterator[list[BatchRequest]]:
+        requests = (self._request(entity, *self._args, **self._kwargs) for entity in entities)
+        while chunk := list(itertools.islice(requests, size)):
+            yield chunk
 
 
 class BulkAction:
-    """A class representing a bulk action performed on the resultset of a query."""
+    """
+    A class representing a bulk action performed on the resultset of a query. Unless an action needs the full entities, only their 'identifiers' (and any other attributes the action
+    depends on) are requested from the server.
+    """
+
+    identifiers: Tuple[BaseAttribute, ...] = ()
 
     def __init__(self, query: Query) -> None:
         self._query = query
+        self._executor: Optional[BulkExecutor] = None
+        self._page_size: Optional[int] = None
+
+    def __call__(self, max_workers: int = None, max_in_flight: int = None, max_retries: int = 5, page_size: int = None) -> BulkAction:
+        """
+        Perform the bulk action concurrently over a pool of 'max_workers' threads, with at most 'max_in_flight' requests (or batches) queued at once.
+        All workers back off together whenever the server throttles a request. If 'max_workers' is not provided, the action is performed sequentially.
+        If 'page_size' is provided, the resultset of the query is streamed into the action in pages of that size rather than being loaded up front (or, for actions that remove
+        the entities from the resultset, is fetched in pages of that size before the action starts).
+        """
+        self._executor = None if max_workers is None else BulkExecutor(max_workers=max_workers, max_in_flight=max_in_flight, max_retries=max_retries)
+        self._page_size = page_size
+        return self
+
+    def _context(self, action: Callable, args: Any = None, kwargs: Any = None, request: Callable[..., BatchRequest] = None, select: Optional[Tuple[BaseAttribute, ...]] = (),
+                 removes: bool = False) -> BulkActionContext:
+        return BulkActionContext(query=self._query, action=action, args=args, kwargs=kwargs, request=request, executor=self._executor, page_size=self._page_size,
+                                 select=None if select is None else (*self.identifiers, *select), removes=removes)
@@ -681,5 +681,11 @@ content_types = {
 	"zir": "application/vnd.zul",
 	"zip": "application/zip",
 	"zmm": "application/vnd.handheld-entertainment+xml",
-	"zaz": "application/vnd.zzazz.deck+xml"
+	"zaz": "application/vnd.zzazz.deck+xml",
+	"gz": "application/gzip",
+	"tgz": "application/gzip",
+	"tar.gz": "application/gzip",
+	"xz": "application/x-xz",
+	"tar.xz": "application/x-xz",
+	"tar.bz2": "application/x-bzip2"
 }
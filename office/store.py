@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+import operator
+import sqlite3
+import threading
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
+
+import O365.utils.utils as utils
+
+from maybe import Maybe
+from pathmagic import File, PathLike
+
+from .config import OfficeConfig
+from .attribute import BaseAttributeMeta, BooleanExpression, BooleanExpressionClause, BooleanExpressionChain, FilterableAttribute, is_in
+
+
+class StorableMixin:
+    """
+    A mixin for entities which keeps the raw cloud data they were constructed from, so that they can be persisted to (and reconstructed from) an EntityStore.
+    The data is only kept while an EntityStore is attached to the Office instance the entity belongs to, and entities without it are never stored.
+    """
+
+    _cloud_data_key: str
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        store = getattr(getattr(getattr(self, "con", None), "office", None), "store", None)
+        self._cloud_data: dict = (kwargs.get(self._cloud_data_key) or {}) if store is not None else {}
+
+    def _invalidating(self, result: Any, entity_id: Optional[str] = None) -> Any:
+        # a change to a single entity is only reflected by the server, so the stored collections holding it (or, if it was added to or moved between collections
+        # and no 'entity_id' is given, every stored collection) are marked as stale rather than being left to serve the old version until they expire
+        store = getattr(getattr(getattr(self, "con", None), "office", None), "store", None)
+        if store is not None:
+            store.invalidate_all() if entity_id is None else store.invalidate_entity(entity_id)
+
+        return result
+
+
+class UnanswerableQuery(Exception):
+    """An exception raised when a query cannot be evaluated against the locally stored data, and must be sent to the server instead."""
+
+
+class EntityStore:
+    """
+    A SQLite-backed cache of messages, contacts and events, keyed by their id and changeKey and populated as query results come in. Attach it to an Office instance as 'Office.store'.
+    A collection (such as a folder) is considered fresh for 'max_age' after every one of its entities was last retrieved, during which time queries against it are answered from the store.
+    Changing an entity through this library (individually or in bulk) marks the collections it affects as stale. Changes made by anything else are only picked up once 'max_age' has elapsed.
+    Queries using operators the store cannot evaluate locally are always sent to the server.
+    """
+
+    operators = {
+        utils.Query.equals: operator.eq,
+        utils.Query.unequal: operator.ne,
+        utils.Query.greater: operator.gt,
+        utils.Query.greater_equal: operator.ge,
+        utils.Query.less: operator.lt,
+        utils.Query.less_equal: operator.le,
+        utils.Query.contains: lambda value, arg: arg in value,
+        utils.Query.startswith: lambda value, arg: value.startswith(arg),
+        utils.Query.endswith: lambda value, arg: value.endswith(arg),
+        is_in: operator.eq,
+    }
+
+    write_size = 100
+
+    def __init__(self, path: PathLike = None, max_age: dt.timedelta = dt.timedelta(minutes=5)) -> None:
+        self.file = OfficeConfig().folder.new_file("store", "db") if path is None else File.from_pathlike(path)
+        self.max_age = max_age
+        self.connection = sqlite3.connect(str(self.file), check_same_thread=False)
+        self._lock = threading.RLock()
+
+        with self._lock, self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS entities (collection TEXT NOT NULL, id TEXT NOT NULL, change_key TEXT, data TEXT NOT NULL, PRIMARY KEY (collection, id))")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS collections (collection TEXT PRIMARY KEY, refreshed_at TEXT)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS entities_id ON entities (id)")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(file={repr(str(self.file))}, max_age={repr(self.max_age)})"
+
+    def is_fresh(self, collection: str) -> bool:
+        """Whether every entity of the given collection was retrieved within the last 'max_age'."""
+        with self._lock:
+            row = self.connection.execute("SELECT refreshed_at FROM collections WHERE collection = ?", (collection,)).fetchone()
+
+        return row is not None and row[0] is not None and dt.datetime.now(dt.timezone.utc) - dt.datetime.fromisoformat(row[0]) < self.max_age
+
+    def record(self, collection: str, entities: Iterable[StorableMixin], complete: bool = False) -> Iterator[StorableMixin]:
+        """
+        Lazily store the given entities as they are iterated over, yielding them back unchanged. If 'complete' is True the entities are every entity in the collection, so any others
+        are discarded and the collection is marked as fresh once iteration finishes.
+        """
+        refreshed_at, seen, pending = dt.datetime.now(dt.timezone.utc), set(), []
+
+        for entity in entities:
+            pending.append(entity)
+            seen.add(entity.object_id)
+            if len(pending) >= self.write_size:
+                self.upsert(collection, pending)
+                pending = []
+
+            yield entity
+
+        self.upsert(collection, pending)
+
+        if complete:
+            with self._lock, self.connection:
+                stored = {row[0] for row in self.connection.execute("SELECT id FROM entities WHERE collection = ?", (collection,))}
+                self.connection.executemany("DELETE FROM entities WHERE collection = ? AND id = ?", [(collection, entity_id) for entity_id in stored - seen])
+
+            self.refresh(collection, refreshed_at=refreshed_at)
+
+    def upsert(self, collection: str, entities: Iterable[StorableMixin]) -> None:
+        """Insert the given entities into the given collection, replacing any stored versions of them."""
+        rows = [(collection, entity.object_id, entity._cloud_data.get("changeKey"), json.dumps(entity._cloud_data)) for entity in entities if entity._cloud_data]
+        with self._lock, self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO entities (collection, id, change_key, data) VALUES (?, ?, ?, ?)", rows)
+
+    def remove(self, collection: str, ids: Iterable[str]) -> None:
+        """Remove the entities with the given ids from the given collection."""
+        with self._lock, self.connection:
+            self.connection.executemany("DELETE FROM entities WHERE collection = ? AND id = ?", [(collection, entity_id) for entity_id in ids])
+
+    def refresh(self, collection: str, refreshed_at: dt.datetime = None) -> None:
+        """Mark the given collection as holding every one of its entities as of the given time (or now)."""
+        refreshed_at = dt.datetime.now(dt.timezone.utc) if refreshed_at is None else refreshed_at
+        with self._lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO collections (collection, refreshed_at) VALUES (?, ?)", (collection, refreshed_at.isoformat()))
+
+    def is_known(self, collection: str) -> bool:
+        """Whether every entity of the given collection has been stored at some point (and it has not been invalidated since), however long ago."""
+        with self._lock:
+            return self.connection.execute("SELECT 1 FROM collections WHERE collection = ?", (collection,)).fetchone() is not None
+
+    def invalidate(self, collection: str) -> None:
+        """Mark the given collection as stale, so that queries against it are sent to the server until it has been retrieved in full again."""
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM collections WHERE collection = ?", (collection,))
+
+    def invalidate_entity(self, entity_id: str) -> None:
+        """Mark every collection holding the entity with the given id as stale."""
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM collections WHERE collection IN (SELECT collection FROM entities WHERE id = ?)", (entity_id,))
+
+    def invalidate_all(self) -> None:
+        """Mark every collection as stale."""
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM collections")
+
+    def answer(self, collection: str, where: Optional[Union[BooleanExpression, BooleanExpressionClause, BooleanExpressionChain]], order: Any, limit: Optional[int], casing_function: Callable,
+               constructor: Callable) -> list:
+        """Return the stored entities of the given collection matching the given query clauses, or raise UnanswerableQuery if they cannot be evaluated locally."""
+        predicate = (lambda data: True) if where is None else self._compile(where, casing_function=casing_function)
+
+        with self._lock:
+            matches = [data for data in (json.loads(row[0]) for row in self.connection.execute("SELECT data FROM entities WHERE collection = ?", (collection,))) if predicate(data)]
+
+        if order is not None:
+            attribute = order.asc() if isinstance(order, type) else order
+            if not isinstance(attribute, FilterableAttribute):
+                raise UnanswerableQuery(f"Cannot order stored entities by '{order}'.")
+
+            path = self._path(attribute.name, casing_function=casing_function)
+            matches.sort(key=lambda data: (self._resolve(data, path) is None, Maybe(self._resolve(data, path)).else_("")), reverse=not attribute.ascending)
+
+        return [constructor(data) for data in matches[:limit]]
+
+    def _compile(self, element: Any, casing_function: Callable) -> Callable[[dict], bool]:
+        if isinstance(element, BaseAttributeMeta):
+            element = element._resolve()
+
+        if isinstance(element, (BooleanExpressionClause, BooleanExpressionChain)):
+            operands = [element.left, element.right] if isinstance(element, BooleanExpressionClause) else element.elements
+            predicates, combine, negated = [self._compile(operand, casing_function=casing_function) for operand in operands], all if element.operator == utils.ChainOperator.AND else any, element.negated
+            return lambda data: combine(predicate(data) for predicate in predicates) != negated
+
+        if isinstance(element, BooleanExpression):
+            if element.func not in self.operators:
+                raise UnanswerableQuery(f"Cannot evaluate '{getattr(element.func, '__name__', element.func)}' against stored entities.")
+
+            path, compare, negated = self._path(element.attr, casing_function=casing_function), self.operators[element.func], element.negated
+
+            def predicate(data: dict) -> bool:
+                result = self._compare(self._resolve(data, path), element.arg, compare)
+                return not result if negated else result
+
+            return predicate
+
+        raise UnanswerableQuery(f"Cannot evaluate '{type(element).__name__}' against stored entities.")
+
+    @staticmethod
+    def _path(name: str, casing_function: Callable) -> list[str]:
+        return [casing_function(step) for step in utils.Query._mapping.get(name, name).split("/")]
+
+    @staticmethod
+    def _resolve(data: Any, path: list[str]) -> Any:
+        for index, step in enumerate(path):
+            if isinstance(data, list):
+                # the rest of the path is resolved within every item of a collection (such as the recipients of a message), which matches if any of them does
+                return [EntityStore._resolve(item, path[index:]) for item in data]
+            data = data.get(step) if isinstance(data, dict) else None
+
+        return data
+
+    @staticmethod
+    def _compare(value: Any, arg: Any, compare: Callable) -> bool:
+        if isinstance(value, list):
+            return any(EntityStore._compare(item, arg, compare) for item in value)
+
+        if isinstance(arg, tuple):
+            return any(EntityStore._compare(value, item, compare) for item in arg)
+
+        if isinstance(arg, dt.date) and isinstance(value, str):
+            value, arg = dt.datetime.fromisoformat(value.replace("Z", "+00:00")), arg if isinstance(arg, dt.datetime) else dt.datetime.combine(arg, dt.time())
+            if arg.tzinfo is None:
+                arg = arg.astimezone()
+        elif isinstance(value, str) and isinstance(arg, str):
+            value, arg = value.casefold(), arg.casefold()
+
+        if value is None and compare not in (operator.eq, operator.ne):
+            return False
+
+        try:
+            return bool(compare(value, arg))
+        except TypeError:
+            raise UnanswerableQuery(f"Cannot compare stored value {repr(value)} with {repr(arg)}.")
@@ -1,4 +1,36 @@
-# import pytest
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeAttendees(list):
+    def add(self, attendees: list) -> None:
+        self.extend(attendees)
+
+
+class FakeEvent(SimpleNamespace):
+    """An event which records the attendees it had each time it was saved, and whether it was deleted."""
+
+    def __init__(self) -> None:
+        super().__init__(con=SimpleNamespace(office=None), attendees=FakeAttendees(), saves=[], deleted=False)
+
+    def save(self) -> bool:
+        self.saves.append(list(self.attendees))
+        return True
+
+    def delete(self) -> bool:
+        self.deleted = True
+        return True
+
+
+def fluent_event(upload=lambda: None) -> tuple["FluentEvent", FakeEvent]:
+    from office.calendar.event import FluentEvent
+
+    event = FakeEvent()
+    fluent = FluentEvent(parent=event)
+    fluent.entity.attendees.add(["a@example.com", "b@example.com"])
+    fluent._large_attachments, fluent._upload_large_attachments = ["large.bin"], upload
+    return fluent, event
 
 
 class TestEvent:
@@ -8,6 +40,16 @@ class TestEvent:
     def test_fluent(self):  # synced
         assert True
 
+    def test__delete_request(self):  # synced
+        assert True
+
+    class TestAttributes:
+        class TestId:
+            pass
+
+        class TestChangeKey:
+            pass
+
 
 class TestBulkEventAction:
     def test_delete(self):  # synced
@@ -18,6 +60,24 @@ class TestEventQuery:
     def test_bulk(self):  # synced
         assert True
 
+    def test_execute(self):  # synced
+        assert True
+
+    def test_delta(self):  # synced
+        assert True
+
+    def test__fetch_from_server(self):  # synced
+        assert True
+
+    def test__constructor(self):  # synced
+        assert True
+
+    def test__collection_url(self):  # synced
+        assert True
+
+    def test__delta(self):  # synced
+        assert True
+
 
 class TestFluentEvent:
     def test_from_(self):  # synced
@@ -50,5 +110,19 @@ class TestFluentEvent:
     def test_sensitivity(self):  # synced
         assert True
 
-    def test_create(self):  # synced
-        assert True
+    def test_create(self):
+        fluent, event = fluent_event()
+
+        assert fluent.create()
+        assert event.saves == [[], ["a@example.com", "b@example.com"]] and not event.deleted
+
+    def test_create_failed_upload(self):
+
+        def upload() -> None:
+            raise ConnectionError("upload failed")
+
+        fluent, event = fluent_event(upload=upload)
+        with pytest.raises(ConnectionError):
+            fluent.create()
+
+        assert event.saves == [[]] and event.deleted
@@ -11,7 +11,19 @@ class TestMessageFolder:
     def test_order_messages_by_date():  # synced
         assert True
 
+    def test__move_folder_request(self):  # synced
+        assert True
+
+    def test__copy_folder_request(self):  # synced
+        assert True
+
+    def test__delete_request(self):  # synced
+        assert True
+
     class TestAttributes:
+        class TestId:
+            pass
+
         class TestChildFolderCount:
             pass
 
@@ -49,5 +61,14 @@ class TestMessageFolderQuery:
     def test_execute(self):  # synced
         assert True
 
+    def test__fetch_from_server(self):  # synced
+        assert True
+
+    def test__constructor(self):  # synced
+        assert True
+
+    def test__collection_url(self):  # synced
+        assert True
+
     def test_bulk(self):  # synced
         assert True
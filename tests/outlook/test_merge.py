@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+from requests.exceptions import RetryError
+
+
+class FakeMessage(SimpleNamespace):
+    """A message which records itself as sent on the outbox of its service, instead of sending a request."""
+
+    def __init__(self, outbox: list, fail: dict) -> None:
+        super().__init__(outbox=outbox, fail=fail, sender=SimpleNamespace(address=None), subject=None, body=None)
+        self.to, self.cc, self.bcc = (SimpleNamespace(addresses=[], add=self._adder(name)) for name in ("to", "cc", "bcc"))
+
+    def _adder(self, name: str):
+        def add(addresses: list[str]) -> None:
+            if any("@" not in address for address in addresses):
+                raise ValueError(f"Invalid {name} address in {addresses}.")
+            getattr(self, name).addresses.extend(addresses)
+        return add
+
+    def send(self, save_to_sent_folder: bool = True) -> bool:
+        error = self.fail.get(self.to.addresses[0])
+        if error is not None:
+            raise error
+
+        self.outbox.append(self)
+        return True
+
+
+def merge(rows: list[dict], fail: dict = None, template: "MessageTemplate" = None) -> tuple[list, list]:
+    from office.outlook.merge import MailMerge, MessageTemplate
+
+    outbox = []
+    service = SimpleNamespace(signature=None, office=SimpleNamespace(resource="me@example.com"), main=SimpleNamespace(new_message=lambda: FakeMessage(outbox=outbox, fail=fail or {})))
+    template = template or MessageTemplate(subject="Hello {name}", body="Dear {name},")
+    return MailMerge(service=service, template=template, max_workers=3, messages_per_minute=None).send(rows), outbox
+
+
+class TestCompiledFormat:
+    def test_render(self):  # synced
+        assert True
+
+
+class TestMessageTemplate:
+    def test_compile(self):  # synced
+        assert True
+
+    def test_render(self):
+        from office.outlook.merge import MessageTemplate
+
+        template = MessageTemplate(subject="Hi {name}", body="Dear {name},", to="{email}; {manager}").compile(style={"font-size": 11, "font-family": "Calibri", "margin": 0})
+        rendered = template.render({"name": "<b>Ann</b>", "email": "ann@example.com", "manager": "bob@example.com"})
+
+        assert rendered["subject"] == "Hi <b>Ann</b>"
+        assert "Dear &lt;b&gt;Ann&lt;/b&gt;," in rendered["body"]
+        assert rendered["to"] == ["ann@example.com", "bob@example.com"] and rendered["cc"] == rendered["bcc"] == []
+
+    def test__recipients(self):  # synced
+        assert True
+
+
+class TestSendOutcome:
+    def test___bool__(self):  # synced
+        assert True
+
+
+class TestMailMerge:
+    def test_statistics(self):  # synced
+        assert True
+
+    def test_send(self):
+        rows = [{"name": f"name{index}", "email": f"user{index}@example.com"} for index in range(10)]
+        outcomes, outbox = merge(rows)
+
+        assert [outcome.index for outcome in outcomes] == list(range(10))
+        assert [outcome.row for outcome in outcomes] == rows
+        assert all(outcome.sent and outcome.error is None and outcome.attempts == 1 for outcome in outcomes)
+        assert sorted(message.to.addresses[0] for message in outbox) == sorted(row["email"] for row in rows)
+
+    def test_send_missing_field(self):
+        rows = [{"name": "a", "email": "a@example.com"}, {"email": "b@example.com"}, {"name": "c", "email": "c@example.com"}]
+        outcomes, outbox = merge(rows)
+
+        assert [bool(outcome) for outcome in outcomes] == [True, False, True]
+        assert isinstance(outcomes[1].error, KeyError)
+        assert sorted(message.to.addresses[0] for message in outbox) == ["a@example.com", "c@example.com"]
+
+    def test_send_invalid_address(self):
+        rows = [{"name": "a", "email": "a@example.com"}, {"name": "b", "email": "not an address"}, {"name": "c", "email": "c@example.com"}]
+        outcomes, outbox = merge(rows)
+
+        assert [bool(outcome) for outcome in outcomes] == [True, False, True]
+        assert isinstance(outcomes[1].error, ValueError)
+        assert len(outbox) == 2
+
+    def test__outcomes(self):  # synced
+        assert True
+
+    def test__send(self):
+        rows = [{"name": "a", "email": "a@example.com"}, {"name": "b", "email": "b@example.com"}]
+        outcomes, outbox = merge(rows, fail={"b@example.com": RetryError("gateway timeout")})
+
+        # a send which may have been accepted despite failing is recorded rather than retried, so it is never sent twice
+        assert [bool(outcome) for outcome in outcomes] == [True, False]
+        assert isinstance(outcomes[1].error, RetryError) and outcomes[1].attempts == 1
+        assert [message.to.addresses for message in outbox] == [["a@example.com"]]
+
+    def test__message(self):  # synced
+        assert True
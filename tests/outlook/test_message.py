@@ -1,4 +1,51 @@
-# import pytest
+import contextlib
+import os
+import stat
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def config_folder(tmp_path, monkeypatch):
+    from pathmagic import Dir
+
+    folder = Dir.from_pathlike(tmp_path / "config")
+    monkeypatch.setattr("office.outlook.message.OfficeConfig", lambda: SimpleNamespace(folder=folder))
+    return folder
+
+
+def cloud_message(**cloud_data) -> "Message":
+    from O365.connection import MSGraphProtocol
+    from office.outlook.message import Message
+
+    return Message(con=SimpleNamespace(), protocol=MSGraphProtocol(), **{Message._cloud_data_key: {"id": "old", "isRead": False, "parentFolderId": "inbox", **cloud_data}})
+
+
+def attachment_message(contents: dict[str, bytes]) -> SimpleNamespace:
+    """A message whose attachments (keyed by id) are served from memory."""
+
+    @contextlib.contextmanager
+    def get(url: str, stream: bool = False):
+        content = contents[url.split("/")[-2]]
+        yield SimpleNamespace(iter_content=lambda chunk_size: [content[index:index + chunk_size] for index in range(0, len(content), chunk_size)])
+
+    endpoints = {"attachment": "messages/{id}/attachments/{ida}"}
+    return SimpleNamespace(object_id="message", con=SimpleNamespace(get=get), attachments=SimpleNamespace(build_url=lambda url: url, _endpoints=endpoints))
+
+
+class TestTextExtractor:
+    def test_handle_starttag(self):  # synced
+        assert True
+
+    def test_handle_endtag(self):  # synced
+        assert True
+
+    def test_handle_data(self):  # synced
+        assert True
+
+    def test_extract(self):  # synced
+        assert True
 
 
 class TestMessage:
@@ -35,7 +82,36 @@ class TestMessage:
     def test_save_attachments_to(self):  # synced
         assert True
 
+    def test__copy_request(self):  # synced
+        assert True
+
+    def test__move_request(self):
+        message = cloud_message()
+        request = message._move_request("archive")
+        assert request.url.endswith("/messages/old/move")
+
+        request.apply({"id": "new"})
+        assert (message.object_id, message.folder_id) == ("new", "archive")
+
+    def test__delete_request(self):  # synced
+        assert True
+
+    def test__mark_as_read_request(self):
+        message = cloud_message()
+        request = message._mark_as_read_request()
+        assert request.body == {"isRead": True}
+
+        request.apply({"id": "old", "isRead": True})
+        assert message.is_read
+        assert "isRead" not in message._track_changes
+
     class TestAttributes:
+        class TestId:
+            pass
+
+        class TestChangeKey:
+            pass
+
         class TestFrom:
             pass
 
@@ -85,6 +161,57 @@ class TestMessage:
             pass
 
 
+class TestAttachmentDownloader:
+    def test_download(self):  # synced
+        assert True
+
+    def test__attachments(self):  # synced
+        assert True
+
+    def test__save(self, tmp_path, config_folder):
+        from office.outlook.message import AttachmentDownloader
+
+        downloader = AttachmentDownloader(tmp_path / "attachments")
+        umask = os.umask(0o022)
+        try:
+            file = downloader._save(attachment_message({"first": b"content"}), {"id": "first", "name": "report.pdf"})
+        finally:
+            os.umask(umask)
+
+        assert file.path.read_bytes() == b"content" and stat.S_IMODE(os.stat(file).st_mode) == 0o644
+        assert not [path for path in (tmp_path / "attachments").iterdir() if path.suffix == ".part"]
+
+    @pytest.mark.parametrize("size, saved", [(7, ["report.pdf"]), (8, ["report (1).pdf", "report.pdf"])])
+    def test__path(self, tmp_path, config_folder, size, saved):
+        from office.outlook.message import AttachmentDownloader
+
+        folder = tmp_path / "attachments"
+        folder.mkdir()
+        (folder / "report.pdf").write_bytes(b"content")
+
+        # a file of the attachment's name saved before the manifest was kept is only taken to be the attachment if its size matches
+        downloader = AttachmentDownloader(folder)
+        downloader._save(attachment_message({"first": b"new content"}), {"id": "first", "name": "report.pdf", "size": size})
+
+        assert sorted(path.name for path in folder.iterdir()) == saved
+        assert (folder / "report.pdf").read_bytes() == b"content"
+        assert downloader._saved["message/first"]["name"] == saved[0]
+
+    def test__record(self):  # synced
+        assert True
+
+    def test__write_manifest(self, tmp_path, config_folder):
+        from office.outlook.message import AttachmentDownloader
+
+        downloader = AttachmentDownloader(tmp_path / "attachments")
+        downloader._save(attachment_message({"first": b"content"}), {"id": "first", "name": ".attachments.json"})
+        downloader._write_manifest()
+
+        # the manifest is kept outside the folder, so an attachment can have any name
+        assert sorted(path.name for path in (tmp_path / "attachments").iterdir()) == [".attachments.json"]
+        assert AttachmentDownloader(tmp_path / "attachments")._saved == {"message/first": {"name": ".attachments.json", "size": 7}}
+
+
 class TestBulkMessageAction:
     def test_copy(self):  # synced
         assert True
@@ -109,6 +236,21 @@ class TestMessageQuery:
     def test_execute(self):  # synced
         assert True
 
+    def test_save_attachments_to(self):  # synced
+        assert True
+
+    def test__fetch_from_server(self):  # synced
+        assert True
+
+    def test__constructor(self):  # synced
+        assert True
+
+    def test__collection_url(self):  # synced
+        assert True
+
+    def test__delta(self):  # synced
+        assert True
+
 
 class TestFluentMessage:
     def test_from_(self):  # synced
@@ -131,3 +273,12 @@ class TestFluentMessage:
 
     def test_send(self):  # synced
         assert True
+
+    def test_enqueue(self):  # synced
+        assert True
+
+    def test__render_body(self):  # synced
+        assert True
+
+    def test__body_wrapper(self):  # synced
+        assert True
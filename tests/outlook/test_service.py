@@ -11,6 +11,9 @@ class TestOutlookService:
     def test_signature(self):  # synced
         assert True
 
+    def test_prefer_text_bodies(self):  # synced
+        assert True
+
     def test_main(self):  # synced
         assert True
 
@@ -32,9 +35,15 @@ class TestOutlookService:
     def test_deleted(self):  # synced
         assert True
 
+    def test_send_many(self):  # synced
+        assert True
+
     def test_custom(self):  # synced
         assert True
 
+    def test__preferences(self):  # synced
+        assert True
+
 
 class TestMailbox:
     pass
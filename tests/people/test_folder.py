@@ -11,7 +11,16 @@ class TestContactFolder:
     def test_from_address(self):  # synced
         assert True
 
+    def test__move_folder_request(self):  # synced
+        assert True
+
+    def test__delete_request(self):  # synced
+        assert True
+
     class TestAttributes:
+        class TestId:
+            pass
+
         class TestName:
             pass
 
@@ -37,5 +46,14 @@ class TestContactFolderQuery:
     def test_execute(self):  # synced
         assert True
 
+    def test__fetch_from_server(self):  # synced
+        assert True
+
+    def test__constructor(self):  # synced
+        assert True
+
+    def test__collection_url(self):  # synced
+        assert True
+
     def test_bulk(self):  # synced
         assert True
@@ -0,0 +1,240 @@
+# import pytest
+
+
+class TestAsyncConnection:
+    def test_session(self):  # synced
+        assert True
+
+    def test_get(self):  # synced
+        assert True
+
+    def test_post(self):  # synced
+        assert True
+
+    def test_patch(self):  # synced
+        assert True
+
+    def test_delete(self):  # synced
+        assert True
+
+    def test_request(self):  # synced
+        assert True
+
+    def test_close(self):  # synced
+        assert True
+
+    def test__headers(self):  # synced
+        assert True
+
+    def test__refresh_token(self):  # synced
+        assert True
+
+class TestAsyncQuery:
+    def test___aiter__(self):  # synced
+        assert True
+
+    def test_select(self):  # synced
+        assert True
+
+    def test_where(self):  # synced
+        assert True
+
+    def test_order_by(self):  # synced
+        assert True
+
+    def test_limit(self):  # synced
+        assert True
+
+    def test_execute(self):  # synced
+        assert True
+
+    def test_stream(self):  # synced
+        assert True
+
+    def test_count(self):  # synced
+        assert True
+
+    def test__wrap(self):  # synced
+        assert True
+
+class TestAsyncContainer:
+    def test___getattr__(self):  # synced
+        assert True
+
+class TestAsyncOutlookService:
+    def test_main(self):  # synced
+        assert True
+
+    def test_inbox(self):  # synced
+        assert True
+
+    def test_outbox(self):  # synced
+        assert True
+
+    def test_sent(self):  # synced
+        assert True
+
+    def test_drafts(self):  # synced
+        assert True
+
+    def test_junk(self):  # synced
+        assert True
+
+    def test_deleted(self):  # synced
+        assert True
+
+    def test_custom(self):  # synced
+        assert True
+
+    def test__wrap(self):  # synced
+        assert True
+
+class TestAsyncPeopleService:
+    def test_personal(self):  # synced
+        assert True
+
+    def test_custom(self):  # synced
+        assert True
+
+class TestAsyncCalendarService:
+    def test_default(self):  # synced
+        assert True
+
+    def test_custom(self):  # synced
+        assert True
+
+    def test__construct(self):  # synced
+        assert True
+
+class TestAsyncOffice:
+    def test___aenter__(self):  # synced
+        assert True
+
+    def test___aexit__(self):  # synced
+        assert True
+
+    def test_close(self):  # synced
+        assert True
+
+    def test_from_token(self):  # synced
+        assert True
+
+    def test_from_connection(self):  # synced
+        assert True
+
+
+class TestAsyncBlobStorage:
+    def test___aenter__(self):  # synced
+        assert True
+
+    def test___aexit__(self):  # synced
+        assert True
+
+    def test_new_container(self):  # synced
+        assert True
+
+    def test_blob_from_url(self):  # synced
+        assert True
+
+    def test_close(self):  # synced
+        assert True
+
+    def test_from_connection(self):  # synced
+        assert True
+
+
+class TestAsyncBlobContainerNameSpace:
+    def test___call__(self):  # synced
+        assert True
+
+    def test___getitem__(self):  # synced
+        assert True
+
+
+class TestAsyncBlobContainer:
+    def test___str__(self):  # synced
+        assert True
+
+    def test___aiter__(self):  # synced
+        assert True
+
+    def test___getitem__(self):  # synced
+        assert True
+
+    def test_client(self):  # synced
+        assert True
+
+    def test_blobs(self):  # synced
+        assert True
+
+    def test_count(self):  # synced
+        assert True
+
+    def test_is_empty(self):  # synced
+        assert True
+
+    def test_upload_file(self):  # synced
+        assert True
+
+    def test_upload_blobs(self):  # synced
+        assert True
+
+    def test_delete(self):  # synced
+        assert True
+
+
+class TestAsyncBlob:
+    def test_client(self):  # synced
+        assert True
+
+    def test_url(self):  # synced
+        assert True
+
+    def test_upload(self):  # synced
+        assert True
+
+    def test_download(self):  # synced
+        assert True
+
+    def test_properties(self):  # synced
+        assert True
+
+    def test_delete(self):  # synced
+        assert True
+
+    def test_exists(self):  # synced
+        assert True
+
+
+class TestAsyncUploadAccessor:
+    def test___call__(self):  # synced
+        assert True
+
+    def test_from_file(self):  # synced
+        assert True
+
+    def test_from_bytes(self):  # synced
+        assert True
+
+    def test_from_stream(self):  # synced
+        assert True
+
+
+class TestAsyncDownloadAccessor:
+    def test___call__(self):  # synced
+        assert True
+
+    def test_to_folder(self):  # synced
+        assert True
+
+    def test_as_file(self):  # synced
+        assert True
+
+    def test_as_bytes(self):  # synced
+        assert True
+
+    def test_as_stream(self):  # synced
+        assert True
+
+    def test__download(self):  # synced
+        assert True
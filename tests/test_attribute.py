@@ -1,4 +1,23 @@
-# import pytest
+from types import SimpleNamespace
+
+import pytest
+
+
+def filter_of(where) -> str:
+    from O365.connection import MSGraphProtocol
+    from office.query import Query
+
+    return Query(SimpleNamespace(protocol=MSGraphProtocol())).where(where)._query.get_filters()
+
+
+def test_is_in():
+    from O365.connection import MSGraphProtocol
+    import O365.utils.utils as utils
+    from office.attribute import is_in
+
+    for values in (["a", "b"], (["a", "b"],)):
+        query = utils.Query(protocol=MSGraphProtocol()).on_attribute("subject")
+        assert is_in(query, values).get_filters() == "subject in ('a', 'b')"
 
 
 class TestDirection:
@@ -79,6 +98,13 @@ class TestFilterableAttribute:
     def test_endswith():  # synced
         assert True
 
+    @pytest.mark.parametrize("values", [("a", "b"), (["a", "b"],), (("a", "b"),), ({"a": None, "b": None}.keys(),)])
+    def test_is_in(self, values):
+        from office.outlook.message import Message
+
+        assert filter_of(Message.Attributes.Subject.is_in(*values)) == "subject in ('a', 'b')"
+        assert filter_of(~Message.Attributes.Subject.is_in(*values)) == "not subject in ('a', 'b')"
+
     def test_asc():  # synced
         assert True
 
@@ -118,4 +144,16 @@ class TestBooleanExpression:
 
 
 class TestBooleanExpressionClause:
-    pass
+    def test___invert__(self):  # synced
+        assert True
+
+    def test_negate(self):  # synced
+        assert True
+
+
+class TestBooleanExpressionChain:
+    def test___invert__(self):  # synced
+        assert True
+
+    def test_negate(self):  # synced
+        assert True
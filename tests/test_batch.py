@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+# import pytest
+
+
+class TestBatchRequest:
+    def test__serialize(self):  # synced
+        assert True
+
+
+class TestBatchResponse:
+    def test___bool__(self):  # synced
+        assert True
+
+    def test_ok(self):  # synced
+        assert True
+
+    def test_throttled(self):  # synced
+        assert True
+
+    def test_entity(self):  # synced
+        assert True
+
+    def test_error(self):  # synced
+        assert True
+
+
+class TestBatch:
+    def test___len__(self):  # synced
+        assert True
+
+    def test_url(self):  # synced
+        assert True
+
+    def test_failures(self):  # synced
+        assert True
+
+    def test_add(self):  # synced
+        assert True
+
+    def test_flush(self):  # synced
+        assert True
+
+    def test_execute(self):  # synced
+        assert True
+
+    def test_send(self):  # synced
+        assert True
+
+    def test__send(self):
+        from O365.connection import MSGraphProtocol
+        from office.batch import Batch, BatchRequest
+
+        results = {"responses": [{"id": "1", "status": 201, "body": {"id": "moved"}}, {"id": "2", "status": 404, "body": {"error": {"message": "Not found."}}}]}
+        con = SimpleNamespace(post=lambda url, data: SimpleNamespace(json=lambda: results))
+        applied = []
+
+        moved = BatchRequest("POST", "https://graph.microsoft.com/v1.0/me/messages/a/move", entity="a", apply=applied.append)
+        missing = BatchRequest("POST", "https://graph.microsoft.com/v1.0/me/messages/b/move", entity="b", apply=applied.append)
+        responses = Batch(con=con, protocol=MSGraphProtocol())._send([moved, missing])
+
+        assert [bool(response) for response in responses] == [True, False]
+        assert applied == [{"id": "moved"}]
@@ -1,4 +1,44 @@
-# import pytest
+import base64
+import io
+import os
+import stat
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+import urllib3
+
+
+class RecordingSession(requests.Session):
+    """A requests session which records every request it is asked to send and answers it locally, as if every blob were missing."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.sent: list[requests.PreparedRequest] = []
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        self.sent.append(request)
+
+        if request.method == "GET":
+            status, headers = 404, {"x-ms-error-code": "BlobNotFound"}
+        else:
+            status, headers = 201, {"ETag": '"0x1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"}
+
+        response = requests.Response()
+        response.request, response.url, response.status_code, response.headers = request, request.url, status, requests.structures.CaseInsensitiveDict(headers)
+        response.raw = urllib3.HTTPResponse(body=io.BytesIO(b""), headers=headers, status=status, preload_content=False)
+        return response
+
+
+def recorded_blob(name: str) -> tuple["Blob", RecordingSession]:
+    from azure.core.pipeline.transport import RequestsTransport
+    from azure.storage.blob import BlobServiceClient
+    from office.blob import Blob, BlobContainer
+
+    session = RecordingSession()
+    client = BlobServiceClient(account_url="https://account.blob.core.windows.net", transport=RequestsTransport(session=session, session_owner=False))
+    return Blob(name=name, container=BlobContainer(name="container", storage=SimpleNamespace(client=client))), session
 
 
 class TestBlobStorage:
@@ -11,6 +51,32 @@ class TestBlobContainerNameSpace:
         assert True
 
 
+class TestBlobPropertiesCache:
+    def test___len__(self):  # synced
+        assert True
+
+    def test_properties(self):  # synced
+        assert True
+
+    def test_exists(self):  # synced
+        assert True
+
+    def test_store(self):  # synced
+        assert True
+
+    def test_listed(self):  # synced
+        assert True
+
+    def test_clear(self):  # synced
+        assert True
+
+    def test__get(self):  # synced
+        assert True
+
+    def test__is_fresh(self):  # synced
+        assert True
+
+
 class TestBlobContainer:
     def test___str__(self):  # synced
         assert True
@@ -18,6 +84,18 @@ class TestBlobContainer:
     def test___len__(self):  # synced
         assert True
 
+    def test_count(self):  # synced
+        assert True
+
+    def test_blobs(self):  # synced
+        assert True
+
+    def test_walk(self):  # synced
+        assert True
+
+    def test_is_empty(self):  # synced
+        assert True
+
     def test___bool__(self):  # synced
         assert True
 
@@ -39,9 +117,41 @@ class TestBlobContainer:
     def test_upload_blob_from(self):  # synced
         assert True
 
+    def test_sync_from_dir(self):  # synced
+        assert True
+
+    def test_sync_to_dir(self):  # synced
+        assert True
+
+    def test_delete_blobs(self):  # synced
+        assert True
+
     def test_delete(self):  # synced
         assert True
 
+    def test__listed(self):  # synced
+        assert True
+
+    def test__deletion_batches(self):  # synced
+        assert True
+
+    def test__delete_batch(self):  # synced
+        assert True
+
+
+class TestVirtualDirectory:
+    def test___iter__(self):  # synced
+        assert True
+
+    def test___bool__(self):  # synced
+        assert True
+
+    def test_blobs(self):  # synced
+        assert True
+
+    def test_walk(self):  # synced
+        assert True
+
 
 class TestBlob:
     def test_client(self):  # synced
@@ -53,5 +163,264 @@ class TestBlob:
     def test_download_as(self):  # synced
         assert True
 
+    def test_open(self):  # synced
+        assert True
+
     def test_delete(self):  # synced
         assert True
+
+    def test_properties(self):  # synced
+        assert True
+
+    def test_exists(self):  # synced
+        assert True
+
+
+class TestContentTypeIndex:
+    def test_guess(self):  # synced
+        assert True
+
+    def test_is_compressible(self):  # synced
+        assert True
+
+
+class TestUploadAccessor:
+    def test___call__(self):  # synced
+        assert True
+
+    def test_from_file(self):  # synced
+        assert True
+
+    def test__upload(self):  # synced
+        assert True
+
+    def test__compressed(self):  # synced
+        assert True
+
+    def test__compresses(self):  # synced
+        assert True
+
+    def test__content_type(self):  # synced
+        assert True
+
+    def test__content_settings(self):  # synced
+        assert True
+
+    def test__upload_blocks(self, tmp_path):
+        file = tmp_path / "data.bin"
+        file.write_bytes(b"x" * 10)
+
+        blob, session = recorded_blob("data.bin")
+        blob.upload(max_workers=2, block_size=4).from_file(file)
+
+        staged = [request for request in session.sent if "comp=block&" in request.url]
+        commit = next(request for request in session.sent if "comp=blocklist" in request.url and request.method == "PUT")
+        assert len(staged) == 3
+        assert all("Content-MD5" in request.headers for request in staged)
+        assert commit.headers["If-None-Match"] == "*"
+
+    def test__upload_blocks_resume(self, tmp_path, monkeypatch):
+        from office.blob import UploadAccessor
+
+        file = tmp_path / "data.bin"
+        file.write_bytes(b"aaaabbbbcc")
+        blob, session = recorded_blob("data.bin")
+        blob.upload(max_workers=2, block_size=4).from_file(file)
+        staged = {base64.b64decode(parse_qs(urlparse(request.url).query)["blockid"][0]).decode(): len(request.body) for request in session.sent if "comp=block&" in request.url}
+
+        # the second block changes in place while the size and modification time of the file stay the same
+        modified = os.stat(file).st_mtime_ns
+        file.write_bytes(b"aaaaBBBBcc")
+        os.utime(file, ns=(modified, modified))
+
+        monkeypatch.setattr(UploadAccessor, "_staged_blocks", lambda self: staged)
+        session.sent.clear()
+        blob.upload(max_workers=2, block_size=4).from_file(file)
+
+        restaged = [request.body for request in session.sent if "comp=block&" in request.url]
+        assert restaged == [b"BBBB"]
+
+    def test__upload_blocks_overwrite(self, tmp_path):
+        file = tmp_path / "data.bin"
+        file.write_bytes(b"x" * 10)
+
+        blob, session = recorded_blob("data.bin")
+        blob.upload(overwrite=True, max_workers=2, block_size=4).from_file(file)
+
+        commit = next(request for request in session.sent if "comp=blocklist" in request.url and request.method == "PUT")
+        assert "If-None-Match" not in commit.headers
+
+    def test__staged_blocks(self):  # synced
+        assert True
+
+    def test__block_key(self, tmp_path):
+        from pathmagic import File
+        from office.blob import UploadAccessor
+
+        file = File(tmp_path / "data.bin")
+        key = UploadAccessor._block_key(file, size=10, modified=1, block_size=4)
+        assert len(key) == 16
+        assert key != UploadAccessor._block_key(file, size=10, modified=2, block_size=4)
+
+    def test__block_id(self):
+        from office.blob import UploadAccessor
+
+        unchanged, changed = UploadAccessor._block_id("key", index=1, data=b"bbbb"), UploadAccessor._block_id("key", index=1, data=b"BBBB")
+        assert unchanged.startswith("key-000001-")
+        assert unchanged != changed
+        assert len(unchanged) == len(changed)
+
+    def test__uploaded(self):  # synced
+        assert True
+
+
+class TestDownloadAccessor:
+    def test___call__(self):  # synced
+        assert True
+
+    def test_to_folder(self):  # synced
+        assert True
+
+    def test_as_file(self):  # synced
+        assert True
+
+    def test_as_buffer(self):  # synced
+        assert True
+
+    def test_into(self):  # synced
+        assert True
+
+    def test_chunks(self):  # synced
+        assert True
+
+    def test__to_file(self):  # synced
+        assert True
+
+    def test__download_ranges(self, tmp_path, monkeypatch):
+        from office.blob import DownloadAccessor
+
+        def into(view: memoryview, size: int, etag: str) -> None:
+            view[:size] = b"data"
+
+        accessor = DownloadAccessor(parent=SimpleNamespace(client=SimpleNamespace(get_blob_properties=lambda: SimpleNamespace(size=4, etag="etag"))))
+        monkeypatch.setattr(accessor, "_into", into)
+
+        umask = os.umask(0o022)
+        try:
+            accessor._download_ranges(tmp_path / "data.bin")
+        finally:
+            os.umask(umask)
+
+        assert (tmp_path / "data.bin").read_bytes() == b"data" and stat.S_IMODE(os.stat(tmp_path / "data.bin").st_mode) == 0o644
+        assert [path.name for path in tmp_path.iterdir()] == ["data.bin"]
+
+    def test__into(self):  # synced
+        assert True
+
+
+class TestMappedRange:
+    def test_writable(self):  # synced
+        assert True
+
+    def test_write(self):  # synced
+        assert True
+
+
+class TestBlobFile:
+    def test_readable(self):  # synced
+        assert True
+
+    def test_seekable(self):  # synced
+        assert True
+
+    def test_tell(self):  # synced
+        assert True
+
+    def test_seek(self):  # synced
+        assert True
+
+    def test_readinto(self):  # synced
+        assert True
+
+    def test_readall(self):  # synced
+        assert True
+
+    def test__block(self):  # synced
+        assert True
+
+    def test__fetch(self):  # synced
+        assert True
+
+
+class TestSyncResult:
+    def test___bool__(self):  # synced
+        assert True
+
+
+class TestDirectorySync:
+    def test_manifest(self):  # synced
+        assert True
+
+    def test_upload(self, tmp_path):
+        from pathmagic import Dir
+        from office.blob import DirectorySync
+
+        (tmp_path / "sync").mkdir()
+        (tmp_path / "sync" / "keep.txt").write_bytes(b"keep")
+        listing = [SimpleNamespace(name=f"prefix/{name}", size=4, etag="etag", content_settings=SimpleNamespace(content_md5=None)) for name in ("keep.txt", "old1.txt", "old2.txt")]
+        uploaded, deletions = [], []
+
+        class Container(SimpleNamespace):
+            def __getitem__(self, name: str) -> SimpleNamespace:
+                return SimpleNamespace(upload=lambda overwrite: SimpleNamespace(from_file=lambda path: uploaded.append(name)))
+
+            def delete_blobs(self, prefix: str = None, where=None, max_workers: int = 4) -> None:
+                deletions.append([blob.name for blob in listing if blob.name.startswith(prefix) and where(blob)])
+
+        container = Container(
+            name="container", client=SimpleNamespace(url="https://account.blob.core.windows.net/container", list_blobs=lambda name_starts_with=None: listing),
+            storage=SimpleNamespace(config=SimpleNamespace(folder=Dir.from_pathlike(tmp_path / "config"))),
+        )
+        result = DirectorySync(container=container, path=tmp_path / "sync", prefix="prefix/").upload(delete=True)
+
+        # the blobs without a local file are pruned by a single batched deletion rather than one request each
+        assert uploaded == ["prefix/keep.txt"] and deletions == [["prefix/old1.txt", "prefix/old2.txt"]]
+        assert result.deleted == ["old1.txt", "old2.txt"]
+
+    def test_download(self):  # synced
+        assert True
+
+    def test_download_outside_directory(self, tmp_path):
+        from pathmagic import Dir
+        from office.blob import DirectorySync
+
+        listing = [SimpleNamespace(name=name, size=4, etag="etag", content_settings=SimpleNamespace(content_md5=None)) for name in ("safe.txt", "../escaped.txt")]
+        container = SimpleNamespace(
+            name="container", client=SimpleNamespace(url="https://account.blob.core.windows.net/container", list_blobs=lambda name_starts_with=None: listing),
+            storage=SimpleNamespace(config=SimpleNamespace(folder=Dir.from_pathlike(tmp_path / "config"))),
+        )
+        sync = DirectorySync(container=container, path=tmp_path / "sync")
+
+        with pytest.raises(ValueError):
+            sync.download()
+
+        assert not (tmp_path / "escaped.txt").exists()
+        assert not (tmp_path / "sync" / "safe.txt").exists()
+
+    def test__files(self):  # synced
+        assert True
+
+    def test__path(self):  # synced
+        assert True
+
+    def test__blobs(self):  # synced
+        assert True
+
+    def test__state(self):  # synced
+        assert True
+
+    def test__md5(self):  # synced
+        assert True
+
+    def test__differs(self):  # synced
+        assert True
@@ -0,0 +1,32 @@
+# import pytest
+
+
+class TestDeltaResult:
+    def test___len__(self):  # synced
+        assert True
+
+    def test___bool__(self):  # synced
+        assert True
+
+
+class TestDelta:
+    def test_file(self):  # synced
+        assert True
+
+    def test_account(self):  # synced
+        assert True
+
+    def test_synced_at(self):  # synced
+        assert True
+
+    def test_sync(self):  # synced
+        assert True
+
+    def test_reset(self):  # synced
+        assert True
+
+    def test__sync(self):  # synced
+        assert True
+
+    def test__is_expired(self):  # synced
+        assert True
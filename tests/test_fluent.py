@@ -1,4 +1,54 @@
-# import pytest
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+
+class UploadSession:
+    """A pre-authenticated upload session which stores the chunks put to it, failing the puts listed in 'failures' (in order) with the given errors or statuses."""
+
+    def __init__(self, failures: list = None) -> None:
+        self.received, self.failures, self.puts = bytearray(), list(failures or []), []
+
+    def __enter__(self) -> "UploadSession":
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def put(self, url: str, data: bytes, headers: dict, timeout: float) -> requests.Response:
+        start = int(headers["Content-Range"].split(" ")[1].split("-")[0])
+        self.puts.append(start)
+        failure = self.failures.pop(0) if self.failures else None
+        if not isinstance(failure, int):
+            self.received[start:start + len(data)] = data
+
+        if isinstance(failure, Exception):
+            # the server stored the chunk, but its response was lost
+            raise failure
+
+        return self._response(failure or 202)
+
+    def get(self, url: str, timeout: float) -> requests.Response:
+        response = self._response(200)
+        response._content = f'{{"nextExpectedRanges": ["{len(self.received)}-"]}}'.encode()
+        return response
+
+    @staticmethod
+    def _response(status: int) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        return response
+
+
+def uploader(session: UploadSession) -> "FluentEntity":
+    from office.fluent import FluentEntity
+
+    attachments = SimpleNamespace(build_url=lambda url: url, _endpoints={"create_upload_session": "{id}/createUploadSession"}, _cc=lambda name: name)
+    con = SimpleNamespace(timeout=1, get_naive_session=lambda: session, post=lambda url, data: SimpleNamespace(json=lambda: {"uploadUrl": "https://upload"}))
+    fluent = FluentEntity()
+    fluent.entity, fluent.chunk_size = SimpleNamespace(attachments=attachments, object_id="id", con=con), 4
+    return fluent
 
 
 class TestFluentEntity:
@@ -20,5 +70,33 @@ class TestFluentEntity:
     def test_categories(self):  # synced
         assert True
 
+    def test__upload_large_attachments(self):  # synced
+        assert True
+
+    def test__upload_attachment(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("office.fluent.time.sleep", lambda seconds: None)
+        path = tmp_path / "large.bin"
+        path.write_bytes(b"0123456789")
+
+        session = UploadSession(failures=[None, requests.ConnectionError("response lost"), 503])
+        uploader(session)._upload_attachment(str(path))
+
+        # the chunk whose response was lost is not sent again, since the session reports it as received
+        assert session.puts == [0, 4, 8, 8] and session.received == b"0123456789"
+
+    def test__upload_attachment_client_error(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("office.fluent.time.sleep", lambda seconds: None)
+        path = tmp_path / "large.bin"
+        path.write_bytes(b"0123456789")
+
+        session = UploadSession(failures=[None, 403])
+        with pytest.raises(requests.HTTPError):
+            uploader(session)._upload_attachment(str(path))
+
+        assert session.puts == [0, 4]
+
+    def test__upload_chunk(self):  # synced
+        assert True
+
     def test__parse_contacts_to_emails(self):  # synced
         assert True
@@ -0,0 +1,21 @@
+# import pytest
+
+
+class TestExpressionOptimizer:
+    def test_optimize(self):  # synced
+        assert True
+
+    def test__optimize(self):  # synced
+        assert True
+
+    def test__flatten(self):  # synced
+        assert True
+
+    def test__deduplicate(self):  # synced
+        assert True
+
+    def test__merge_equality_checks(self):  # synced
+        assert True
+
+    def test__signature(self):  # synced
+        assert True
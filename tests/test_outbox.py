@@ -0,0 +1,191 @@
+import datetime as dt
+
+import pytest
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr("office.outbox.time.time", clock)
+    return clock
+
+
+@pytest.fixture
+def outbox(tmp_path, clock) -> "Outbox":
+    from office.outbox import Outbox
+
+    outbox = Outbox(path=tmp_path / "outbox.db", max_attempts=3, retry_delay=dt.timedelta(seconds=10), claim_timeout=dt.timedelta(seconds=60))
+    yield outbox
+    outbox.connection.close()
+
+
+class TestOutboxEntry:
+    pass
+
+
+class TestOutbox:
+    def test___len__(self):  # synced
+        assert True
+
+    def test_counts(self):  # synced
+        assert True
+
+    def test_put(self):  # synced
+        assert True
+
+    def test_claim(self, outbox, clock):
+        ids = [outbox.put("me/sendMail", {"index": index}) for index in range(3)]
+
+        first, second = outbox.claim(limit=2), outbox.claim(limit=2)
+        assert [entry.id for entry in first] == ids[:2] and [entry.payload["index"] for entry in first] == [0, 1]
+        assert [entry.id for entry in second] == ids[2:] and first[0].claim != second[0].claim
+        assert outbox.claim(limit=2) == [] and outbox.counts() == {"pending": 0, "sending": 3, "failed": 0}
+
+    def test_claim_stale(self, outbox, clock):
+        entry_id = outbox.put("me/sendMail", {})
+
+        # every sender holding the message dies, so each claim times out and counts as an attempt until the message fails
+        for attempts in range(3):
+            (entry,) = outbox.claim(limit=1)
+            assert entry.id == entry_id and entry.attempts == attempts
+            clock.now += 61
+
+        assert outbox.claim(limit=1) == []
+        (failed,) = outbox.failed()
+        assert failed.id == entry_id and failed.attempts == 3 and "timed out" in failed.error
+
+    def test_complete(self, outbox, clock):
+        outbox.put("me/sendMail", {})
+        (stale,) = outbox.claim(limit=1)
+        clock.now += 61
+        (current,) = outbox.claim(limit=1)
+
+        # the sender whose claim timed out cannot resolve the message on behalf of the sender that took it over
+        outbox.complete([stale])
+        assert len(outbox) == 1
+
+        outbox.complete([current])
+        assert len(outbox) == 0
+
+    def test_fail(self, outbox, clock):
+        outbox.put("me/sendMail", {})
+        (entry,) = outbox.claim(limit=1)
+
+        outbox.fail(entry, error="503: unavailable")
+        assert outbox.counts()["pending"] == 1 and outbox.next_due() == 10 and outbox.claim(limit=1) == []
+
+        clock.now += 10
+        (entry,) = outbox.claim(limit=1)
+        outbox.fail(entry, error="503: unavailable")
+        # the back-off doubles with every attempt
+        assert outbox.next_due() == 20
+
+        clock.now += 20
+        (entry,) = outbox.claim(limit=1)
+        outbox.fail(entry, error="503: unavailable")
+        assert outbox.counts() == {"pending": 0, "sending": 0, "failed": 1} and outbox.next_due() is None
+
+    def test_fail_stale(self, outbox, clock):
+        outbox.put("me/sendMail", {})
+        (stale,) = outbox.claim(limit=1)
+        clock.now += 61
+        (current,) = outbox.claim(limit=1)
+
+        outbox.fail(stale, error="timeout", permanent=True)
+        assert outbox.counts() == {"pending": 0, "sending": 1, "failed": 0}
+
+        outbox.fail(current, error="400: bad request", permanent=True)
+        assert outbox.counts() == {"pending": 0, "sending": 0, "failed": 1}
+
+    def test_release(self, outbox, clock):
+        outbox.put("me/sendMail", {})
+        outbox.release(outbox.claim(limit=1))
+
+        (entry,) = outbox.claim(limit=1)
+        assert entry.attempts == 0
+
+    def test_failed(self):  # synced
+        assert True
+
+    def test_retry_failed(self, outbox, clock):
+        ids = [outbox.put("me/sendMail", {"index": index}) for index in range(2)]
+        for entry in outbox.claim(limit=2):
+            outbox.fail(entry, error="400: bad request", permanent=True)
+
+        outbox.retry_failed([ids[0]])
+        assert [entry.id for entry in outbox.failed()] == ids[1:]
+
+        (entry,) = outbox.claim(limit=2)
+        assert entry.id == ids[0] and entry.attempts == 0
+
+        outbox.retry_failed()
+        assert outbox.failed() == [] and outbox.counts() == {"pending": 1, "sending": 1, "failed": 0}
+
+    def test_discard_failed(self, outbox, clock):
+        ids = [outbox.put("me/sendMail", {"index": index}) for index in range(3)]
+        for entry in outbox.claim(limit=2):
+            outbox.fail(entry, error="400: bad request", permanent=True)
+
+        outbox.discard_failed([ids[0]])
+        assert [entry.id for entry in outbox.failed()] == [ids[1]]
+
+        outbox.discard_failed()
+        assert outbox.failed() == [] and len(outbox) == 1
+
+    def test_next_due(self):  # synced
+        assert True
+
+    def test_start(self):  # synced
+        assert True
+
+    def test__wait(self):  # synced
+        assert True
+
+    def test__entry(self):  # synced
+        assert True
+
+
+class TestOutboxSender:
+    def test_running(self):  # synced
+        assert True
+
+    def test_start(self):  # synced
+        assert True
+
+    def test_stop(self):  # synced
+        assert True
+
+    def test_drain(self):  # synced
+        assert True
+
+    def test_send_once(self):  # synced
+        assert True
+
+    def test__run(self):  # synced
+        assert True
+
+    def test__groups(self):  # synced
+        assert True
+
+    def test__send(self):  # synced
+        assert True
+
+    def test__post(self):  # synced
+        assert True
+
+    def test__resolve(self):  # synced
+        assert True
+
+    def test__outcome(self):  # synced
+        assert True
+
+    def test__body(self):  # synced
+        assert True
@@ -1,4 +1,28 @@
-# import pytest
+from types import SimpleNamespace
+
+import pytest
+
+
+def streamed_query(entities: list) -> SimpleNamespace:
+    """A query which streams the given entities and counts them server-side, recording how many pages were requested."""
+    query = SimpleNamespace(counted=0, _invalidate_store=lambda: None)
+
+    def count() -> int:
+        query.counted += 1
+        return len(entities)
+
+    query.count = count
+    query._projected = lambda *select: SimpleNamespace(stream=lambda page_size: iter(list(entities)), execute=lambda: list(entities))
+    return query
+
+
+def message_query() -> "MessageQuery":
+    from O365.connection import MSGraphProtocol
+    from office.outlook.message import MessageQuery
+
+    container = SimpleNamespace(protocol=MSGraphProtocol(), root=False, folder_id="inbox", build_url=lambda url: url, _endpoints={"folder_messages": "me/mailFolders/{id}/messages"},
+                                message_constructor=None)
+    return MessageQuery(container)
 
 
 class TestQuery:
@@ -23,18 +47,90 @@ class TestQuery:
     def test_execute(self):  # synced
         assert True
 
+    def test_stream(self):  # synced
+        assert True
+
+    def test_count(self):  # synced
+        assert True
+
+    @pytest.mark.parametrize("narrow", [
+        lambda query, attributes: query.where(attributes.IsRead == False),  # noqa: E712
+        lambda query, attributes: query.order_by(attributes.ReceivedOn.desc()),
+        lambda query, attributes: query.limit(10),
+    ])
+    def test_delta(self, narrow):
+        from office.outlook.message import Message
+
+        # the narrowed query is rejected before any request is sent or delta link is persisted
+        with pytest.raises(ValueError):
+            narrow(message_query(), Message.Attributes).delta()
+
+    def test__fetch(self):
+        from office.outlook.message import Message
+
+        query = message_query()
+        store = SimpleNamespace(is_fresh=lambda collection: True, answer=lambda collection, **kwargs: ["stored"], record=lambda collection, entities, complete: entities)
+        query._container.con = SimpleNamespace(office=SimpleNamespace(store=store))
+        query._container.get_messages, query._container.message_constructor = lambda limit, query, batch: ["server"], Message
+        assert list(query._fetch()) == ["stored"]
+
+        # the store cannot evaluate a search, so a searched query reaches the server even while the collection is fresh
+        query._query.search("foo")
+        assert list(query._fetch()) == ["server"]
+
+    def test__fetch_from_server(self):  # synced
+        assert True
+
+    def test__paginate(self):  # synced
+        assert True
+
+    def test__store(self):  # synced
+        assert True
+
+    def test__constructor(self):  # synced
+        assert True
+
+    def test__apply_delta(self):  # synced
+        assert True
+
+    def test__invalidate_store(self):  # synced
+        assert True
+
+    def test__projected(self):  # synced
+        assert True
+
+    def test__compiled(self):  # synced
+        assert True
+
+    def test__collection_url(self):  # synced
+        assert True
+
+    def test__delta(self):  # synced
+        assert True
+
+    def test__delta_params(self):
+        from office.outlook.message import Message
+
+        assert message_query().select(Message.Attributes.Subject)._delta_params() == {"$select": "subject"}
+
     def test__build_select_clause(self):  # synced
         assert True
 
     def test__build_where_clause(self):  # synced
         assert True
 
+    def test__compile_filter_template(self):  # synced
+        assert True
+
     def test__build_order_by_clause(self):  # synced
         assert True
 
     def test__build_boolean_expression_clause(self):  # synced
         assert True
 
+    def test__build_boolean_expression_chain(self):  # synced
+        assert True
+
     def test__build_side(self):  # synced
         assert True
 
@@ -52,12 +148,32 @@ class TestQuery:
 
 
 class TestBulkActionContext:
-    def test___len__(self):  # synced
-        assert True
+    def test___len__(self):
+        from office.query import BulkActionContext
+
+        acted, query = [], streamed_query(["a", "b", "c"])
+        with BulkActionContext(query=query, action=acted.append, page_size=2) as context:
+            assert len(context) == 3 and context
+            context.commit()
+
+        assert acted == ["a", "b", "c"] and len(context) == 3 and query.counted == 1
+
+    def test___len___removes(self):
+        from office.query import BulkActionContext
+
+        acted, query = [], streamed_query(["a", "b", "c"])
+        with BulkActionContext(query=query, action=acted.append, page_size=2, removes=True) as context:
+            assert len(context) == 3
+            context.commit()
+
+        assert acted == ["a", "b", "c"] and query.counted == 0
 
     def test___bool__(self):  # synced
         assert True
 
+    def test_failures(self):  # synced
+        assert True
+
     def test_commit(self):  # synced
         assert True
 
@@ -67,9 +183,28 @@ class TestBulkActionContext:
     def test__execute_query(self):  # synced
         assert True
 
+    def test__count_consumed(self):  # synced
+        assert True
+
     def test__perform_bulk_action(self):  # synced
         assert True
 
+    def test__perform_action(self):  # synced
+        assert True
+
+    def test__new_batch(self):  # synced
+        assert True
+
+    def test__send_batch(self):  # synced
+        assert True
+
+    def test__chunk_requests(self):  # synced
+        assert True
+
 
 class TestBulkAction:
-    pass
+    def test___call__(self):  # synced
+        assert True
+
+    def test__context(self):  # synced
+        assert True
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def store(tmp_path):
+    from office.store import EntityStore
+
+    store = EntityStore(path=tmp_path / "store.db")
+    for collection, ids in {"inbox": ["a", "b"], "archive": ["c"]}.items():
+        store.upsert(collection, [SimpleNamespace(object_id=entity_id, _cloud_data={"id": entity_id}) for entity_id in ids])
+        store.refresh(collection)
+
+    yield store
+    store.connection.close()
+
+
+class TestStorableMixin:
+    def test__invalidating(self, store):
+        from office.store import StorableMixin
+
+        entity = StorableMixin()
+        entity.con = SimpleNamespace(office=SimpleNamespace(store=store))
+
+        # a change to an entity makes the collections holding it stale, while one that may have added it elsewhere makes every collection stale
+        assert entity._invalidating(True, entity_id="a") is True
+        assert not store.is_fresh("inbox") and store.is_fresh("archive")
+
+        entity._invalidating(True)
+        assert not store.is_fresh("archive")
+
+class TestEntityStore:
+    def test_is_fresh(self):  # synced
+        assert True
+
+    def test_record(self):  # synced
+        assert True
+
+    def test_upsert(self):  # synced
+        assert True
+
+    def test_remove(self):  # synced
+        assert True
+
+    def test_refresh(self):  # synced
+        assert True
+
+    def test_is_known(self):  # synced
+        assert True
+
+    def test_invalidate(self):  # synced
+        assert True
+
+    def test_invalidate_entity(self, store):
+        store.invalidate_entity("c")
+        assert store.is_fresh("inbox") and not store.is_fresh("archive")
+
+    def test_invalidate_all(self, store):
+        store.invalidate_all()
+        assert not store.is_fresh("inbox") and not store.is_fresh("archive")
+
+    def test_answer(self):  # synced
+        assert True
+
+    def test__compile(self):  # synced
+        assert True
+
+    def test__path(self):  # synced
+        assert True
+
+    def test__resolve(self):
+        from office.store import EntityStore
+
+        data = {"toRecipients": [{"emailAddress": {"address": "a@example.com"}}, {"emailAddress": {"address": "b@example.com"}}], "subject": "hello"}
+
+        assert EntityStore._resolve(data, ["subject"]) == "hello"
+        assert EntityStore._resolve(data, ["toRecipients", "emailAddress", "address"]) == ["a@example.com", "b@example.com"]
+        assert EntityStore._resolve(data, ["missing", "address"]) is None
+
+    def test__compare(self):  # synced
+        assert True